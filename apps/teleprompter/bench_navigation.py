@@ -0,0 +1,110 @@
+"""
+Key-to-paint latency for segment navigation
+
+Runs PrompterApp headlessly on a synthetic deck and times each navigation from
+the moment its key binding fires to the end of the next screen refresh. The
+pilot's own overhead per keypress (about 40 ms, mostly waiting for idle) is
+left out.
+
+    python3 bench_navigation.py                          # 300 segments x 80 bullets
+    python3 bench_navigation.py --segments 1000 --bullets 200 --no-cache
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import statistics
+import time
+
+import prompter
+from prompter import PrompterApp
+
+
+def percentile(ordered: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    return ordered[min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def synthetic_script(segments: int, bullets: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    words = "royalty catalog stream citation diagram pillar curate heal test query feedback".split()
+    script = []
+    for i in range(segments):
+        lines = []
+        for j in range(bullets):
+            text = " ".join(rng.choice(words) for _ in range(rng.randint(6, 18)))
+            if j % 10 == 0:
+                lines.append(f"[bold white]{text.upper()}[/]")
+            elif j % 7 == 0:
+                lines.append(f"[cyan]**Query {j}:** {text}[/]")
+            else:
+                lines.append(f"• {text}")
+        script.append({"id": i + 1, "title": f"Segment {i + 1}", "duration": 30 + i % 90, "bullets": lines})
+    return script
+
+
+async def after_refresh(app) -> None:
+    painted = asyncio.get_running_loop().create_future()
+    app.call_after_refresh(painted.set_result, None)
+    await painted
+
+
+def time_actions(app, names: tuple, latencies: list) -> None:
+    """Wrap each action so it records binding-to-paint time in milliseconds."""
+    for name in names:
+        action = getattr(app, name)
+
+        def timed(*args, action=action) -> None:
+            started = time.perf_counter()
+            # Registered first, so it runs before the pre-warming queued by the action
+            app.call_after_refresh(lambda: latencies.append((time.perf_counter() - started) * 1000))
+            action(*args)
+        setattr(app, name, timed)
+
+
+async def bench(segments: int, bullets: int, presses: int, cache: bool) -> dict:
+    prompter.DEMO_SCRIPT = synthetic_script(segments, bullets)
+    app = PrompterApp()
+    segment_cache = getattr(app, "segment_cache", None)
+    if segment_cache and not cache:
+        segment_cache.capacity = 0
+    latencies = []
+    time_actions(app, ("action_next_scene", "action_prev_scene"), latencies)
+    async with app.run_test(size=(120, 40)) as pilot:
+        await pilot.press("x")                  # dismiss the splash
+        await after_refresh(app)
+        rng = random.Random(1)
+        for i in range(presses):
+            # Mostly forward, with some back-steps, like a rehearsal
+            key = "left" if i % 5 == 4 or (app.current_idx == segments - 1) else "right"
+            await pilot.press(key)
+            await after_refresh(app)
+            await asyncio.sleep(rng.uniform(0, 0.02))   # idle time for pre-warming, as between real keypresses
+    latencies.sort()
+    return {
+        "segments": segments,
+        "bullets": bullets,
+        "cache": cache,
+        "presses": presses,
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "max_ms": round(latencies[-1], 2),
+        "cache_hits": segment_cache.hits if segment_cache else None,
+        "cache_misses": segment_cache.misses if segment_cache else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure teleprompter key-to-paint latency")
+    parser.add_argument("--segments", type=int, default=300)
+    parser.add_argument("--bullets", type=int, default=80)
+    parser.add_argument("--presses", type=int, default=200)
+    parser.add_argument("--no-cache", action="store_true", help="compile every segment on every keypress")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(bench(args.segments, args.bullets, args.presses, not args.no_cache)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
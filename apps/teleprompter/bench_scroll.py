@@ -0,0 +1,78 @@
+"""
+Scrolling cost for short and very long segments
+
+Runs PrompterApp headlessly on a single segment of each length and measures:
+
+- manual scrolling: binding-to-paint time of down / page-down presses
+- auto-scrolling: with the timer running at 10 bullets a second, CPU use and
+  the rows scrolled over a few seconds
+
+Both should stay flat as the segment grows, since only the rows on screen
+are painted and bullets are wrapped once, as they scroll into view.
+
+    python3 bench_scroll.py                       # 50 and 5000 lines
+    python3 bench_scroll.py --lines 100,20000 --auto-seconds 10
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import prompter
+from bench_navigation import after_refresh, synthetic_script, time_actions
+from prompter import PrompterApp
+
+
+async def bench(lines: int, presses: int, auto_seconds: float) -> dict:
+    prompter.DEMO_SCRIPT = synthetic_script(1, lines)
+    prompter.DEMO_SCRIPT[0]["duration"] = lines / 10
+    app = PrompterApp()
+    latencies = []
+    time_actions(app, ("action_scroll_segment", "action_scroll_page"), latencies)
+    async with app.run_test(size=(120, 40)) as pilot:
+        await pilot.press("x")                  # dismiss the splash
+        await after_refresh(app)
+        view = app.query_one("#bullet-content")
+        direction = 1
+        for i in range(presses):
+            # Down to the end and back up, so every press moves the view
+            before = view.scroll_row
+            await pilot.press(("page" if i % 10 == 9 else "") + ("down" if direction > 0 else "up"))
+            await after_refresh(app)
+            if view.scroll_row == before:
+                direction = -direction
+        await pilot.press("a")                  # back to following the timer
+        view.scroll_to(0)
+        started_row = view.scroll_row
+        await pilot.press("space")
+        started, cpu_started = time.monotonic(), time.process_time()
+        await asyncio.sleep(auto_seconds)
+        wall = time.monotonic() - started
+        cpu = time.process_time() - cpu_started
+        rows = view.scroll_row - started_row
+    latencies.sort()
+    return {
+        "lines": lines,
+        "presses": presses,
+        "scroll_p50_ms": round(statistics.median(latencies), 2),
+        "scroll_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "scroll_max_ms": round(latencies[-1], 2),
+        "auto_rows_per_s": round(rows / wall, 1),
+        "auto_cpu_percent": round(cpu / wall * 100, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure teleprompter scrolling cost by segment length")
+    parser.add_argument("--lines", default="50,5000", help="comma-separated segment lengths, in bullets")
+    parser.add_argument("--presses", type=int, default=100)
+    parser.add_argument("--auto-seconds", type=float, default=5)
+    args = parser.parse_args()
+    results = [asyncio.run(bench(int(n), args.presses, args.auto_seconds)) for n in args.lines.split(",")]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
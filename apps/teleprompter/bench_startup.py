@@ -0,0 +1,86 @@
+"""
+Startup benchmark: invocation to first frame
+
+Launches prompter.py repeatedly in a pseudo-terminal and times, from just
+before the process is spawned:
+
+- first frame: the splash screen has been painted
+- ready: the prompter widgets are mounted and the first keypress will show
+  segment 1
+
+The app reports both through PROMPTER_FIRST_FRAME_FILE and exits as soon as
+it is ready. --cold drops the compiled script cache before every launch, as
+after an edit to the guide.
+
+    python3 bench_startup.py                 # 10 launches
+    python3 bench_startup.py --runs 20 --cold
+"""
+
+import argparse
+import json
+import os
+import pty
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import data_loader
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompter.py")
+
+
+def drain(fd: int) -> None:
+    # Keep reading the terminal so the app never blocks on a full pty buffer
+    try:
+        while os.read(fd, 65536):
+            pass
+    except OSError:
+        pass
+
+
+def launch(stamp_file: str, timeout: float) -> dict:
+    master, slave = pty.openpty()
+    threading.Thread(target=drain, args=(master,), daemon=True).start()
+    env = dict(os.environ, PROMPTER_FIRST_FRAME_FILE=stamp_file, TERM=os.environ.get("TERM", "xterm-256color"))
+    started = time.time()
+    proc = subprocess.Popen([sys.executable, APP], stdin=slave, stdout=slave, stderr=slave, env=env,
+                            cwd=os.path.dirname(APP))
+    os.close(slave)
+    try:
+        proc.wait(timeout)
+    finally:
+        proc.kill()
+        os.close(master)
+    with open(stamp_file) as f:
+        stamps = json.load(f)
+    os.remove(stamp_file)
+    return {name: (at - started) * 1000 for name, at in stamps.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure teleprompter time to first frame")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--cold", action="store_true", help="remove the compiled script cache before each launch")
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    stamp_file = os.path.join(tempfile.mkdtemp(), "first_frame.json")
+    runs = []
+    launch(stamp_file, args.timeout)            # warm the OS file cache and the script cache
+    for _ in range(args.runs):
+        if args.cold and os.path.exists(getattr(data_loader, "CACHE_PATH", "")):
+            os.remove(data_loader.CACHE_PATH)
+        runs.append(launch(stamp_file, args.timeout))
+    result = {"runs": args.runs, "cold_script_cache": args.cold}
+    for name in runs[0]:
+        times = sorted(r[name] for r in runs)
+        result[f"{name}_p50_ms"] = round(statistics.median(times), 1)
+        result[f"{name}_max_ms"] = round(times[-1], 1)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
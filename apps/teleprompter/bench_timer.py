@@ -0,0 +1,127 @@
+"""
+Timer accuracy and CPU benchmark
+
+Runs PrompterApp headlessly on a single segment that outlasts the run, starts
+the timer, and samples it four times a second against a monotonic reference:
+
+- timing error: the timer's own remaining time minus the true remaining time
+  (drift), and how often the shown mm:ss differs from the true one
+- CPU: process time divided by wall time over the whole run
+- repaints: timer widget renders and pacing-bar updates per second
+
+--legacy runs the old fixed-step timer (subtract 0.1 every 0.1 s) for
+comparison. --busy-ms blocks the event loop for that long every 100 ms, to
+mimic a loaded presenter laptop.
+
+    python3 bench_timer.py                  # 30-minute run
+    python3 bench_timer.py --minutes 2 --busy-ms 20 --legacy
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import prompter
+from prompter import PrompterApp, TimerWidget
+
+
+class LegacyTimer(TimerWidget):
+    def on_mount(self) -> None:
+        self.set_interval(0.1, self.update_timer)
+
+    def reset(self, duration: float) -> None:
+        self.total_duration = duration
+        self.time_remaining = duration
+        self.is_running = False
+
+    def remaining(self) -> float:
+        return self.time_remaining
+
+    def watch_is_running(self, running: bool) -> None:
+        pass
+
+    def update_timer(self) -> None:
+        if self.is_running and self.time_remaining > 0:
+            self.time_remaining -= 0.1
+            self.app.update_progress((1 - self.time_remaining / self.total_duration) * 100)
+        elif self.time_remaining <= 0 and self.is_running:
+            self.is_running = False
+            self.time_remaining = 0
+
+
+def counting(timer_class):
+    class Counted(timer_class):
+        renders = 0
+
+        def render(self) -> str:
+            Counted.renders += 1
+            return super().render()
+    return Counted
+
+
+async def block_loop(busy_ms: float) -> None:
+    while True:
+        time.sleep(busy_ms / 1000)
+        await asyncio.sleep(0.1)
+
+
+async def bench(minutes: float, legacy: bool, busy_ms: float) -> dict:
+    duration = minutes * 60
+    prompter.DEMO_SCRIPT = [{"id": 1, "title": "Timer bench", "duration": duration + 5, "bullets": ["• bench"]}]
+    prompter.TimerWidget = timer_class = counting(LegacyTimer if legacy else TimerWidget)
+    app = PrompterApp()
+    progress_updates = 0
+    update_progress = app.update_progress
+
+    def counted_progress(percent: float) -> None:
+        nonlocal progress_updates
+        progress_updates += 1
+        update_progress(percent)
+    app.update_progress = counted_progress
+
+    async with app.run_test() as pilot:
+        await pilot.press("x")                  # dismiss the splash
+        await pilot.pause()
+        timer = app.query_one("#timer")
+        renders_before = timer_class.renders
+        loader = asyncio.create_task(block_loop(busy_ms)) if busy_ms else None
+        started, cpu_started = time.monotonic(), time.process_time()
+        await pilot.press("space")
+        drift, mismatched, samples = [], 0, 0
+        while (elapsed := time.monotonic() - started) < duration:
+            await asyncio.sleep(0.25)
+            elapsed = time.monotonic() - started
+            true_remaining = duration + 5 - elapsed
+            drift.append(timer.remaining() - true_remaining)
+            mismatched += int(timer.time_remaining) != int(true_remaining)
+            samples += 1
+        wall = time.monotonic() - started
+        cpu = time.process_time() - cpu_started
+        if loader:
+            loader.cancel()
+        renders = timer_class.renders - renders_before
+    return {
+        "timer": "legacy" if legacy else "monotonic",
+        "minutes": minutes,
+        "busy_ms": busy_ms,
+        "cpu_percent": round(cpu / wall * 100, 2),
+        "final_drift_s": round(drift[-1], 3),
+        "max_abs_drift_s": round(max(abs(d) for d in drift), 3),
+        "shown_second_wrong_percent": round(mismatched / samples * 100, 2),
+        "timer_renders_per_s": round(renders / wall, 2),
+        "progress_updates_per_s": round(progress_updates / wall, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure teleprompter timer drift and CPU use")
+    parser.add_argument("--minutes", type=float, default=30)
+    parser.add_argument("--legacy", action="store_true", help="benchmark the old fixed-step timer")
+    parser.add_argument("--busy-ms", type=float, default=0, help="block the event loop this long every 100 ms")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(bench(args.minutes, args.legacy, args.busy_ms)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
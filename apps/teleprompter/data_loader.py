@@ -1,66 +1,67 @@
 import re
 import json
 import os
+import hashlib
+import marshal
 
-def parse_bullets(filepath):
-    if not os.path.exists(filepath):
-        print(f"Error: {filepath} not found.")
-        return None
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Use the FINAL 3-pillar bullets as the source of truth
+GUIDE_PATH = os.path.normpath(os.path.join(SCRIPT_DIR, "..", "..", "docs", "FINAL-3-PILLAR-BULLETS.md"))
+DATA_PATH = os.path.join(SCRIPT_DIR, "script_data.json")
+# Parsed guide, so launching the prompter skips the regex parse
+CACHE_PATH = os.path.join(SCRIPT_DIR, ".script_cache")
+CACHE_VERSION = 1
 
-    with open(filepath, 'r') as f:
-        content = f.read()
+def parse_segment(block, seg_id):
+    lines = block.strip().split('\n')
+    header = lines[0]
 
-    # Define our target segments based on ## SEGMENT headers
-    segments = []
-    segment_blocks = re.split(r"## SEGMENT ", content)
-    
-    for block in segment_blocks[1:]: # Skip preamble
-        lines = block.strip().split('\n')
-        header = lines[0]
-        
-        # Extract title and duration
-        # Format: 1: HOOK (30 seconds)
-        duration_match = re.search(r"\((.*?) seconds?\)", header)
-        duration = int(duration_match.group(1)) if duration_match else 60
-            
-        title = header.split('(')[0].split(':')[-1].strip()
-        
-        # Extract bullets and sub-sections
-        bullets = []
-        for line in lines[1:]:
-            line = line.strip()
-            if not line or line.startswith('---'):
-                continue
-            if line.startswith('- ') or line.startswith('• '):
-                bullets.append(f"• {line[2:]}")
-            elif line.startswith('### '):
-                bullets.append(f"[bold white]{line[4:].upper()}[/]")
-            elif line.startswith('**Query'):
-                bullets.append(f"[cyan]{line}[/]")
-        
-        segments.append({
-            "id": len(segments) + 1,
-            "title": title,
-            "duration": duration,
-            "bullets": bullets
-        })
-        
-    return segments
+    # Extract title and duration
+    # Format: 1: HOOK (30 seconds)
+    duration_match = re.search(r"\((.*?) seconds?\)", header)
+    duration = int(duration_match.group(1)) if duration_match else 60
 
-if __name__ == "__main__":
-    # Use the FINAL 3-pillar bullets as the source of truth
-    guide_path = "../../docs/FINAL-3-PILLAR-BULLETS.md"
-    script_data = parse_bullets(guide_path)
-    
-    if script_data:
-        # Save to the local directory
-        with open("script_data.json", "w") as f:
-            json.dump(script_data, f, indent=4)
-        print(f"Successfully ingested {len(script_data)} segments from {guide_path}")
-    else:
-        print("Failed to ingest bullets.")
+    title = header.split('(')[0].split(':')[-1].strip()
 
-import os
+    # Extract bullets and sub-sections
+    bullets = []
+    for line in lines[1:]:
+        line = line.strip()
+        if not line or line.startswith('---'):
+            continue
+        if line.startswith('- ') or line.startswith('• '):
+            bullets.append(f"• {line[2:]}")
+        elif line.startswith('### '):
+            bullets.append(f"[bold white]{line[4:].upper()}[/]")
+        elif line.startswith('**Query'):
+            bullets.append(f"[cyan]{line}[/]")
+
+    return {
+        "id": seg_id,
+        "title": title,
+        "duration": duration,
+        "bullets": bullets
+    }
+
+def parse_content(content, previous=None):
+    """Parse the guide's text into segments.
+
+    ``previous`` is the memo returned by an earlier call: a block whose text and
+    position are unchanged reuses the segment parsed from it last time.
+    Returns (segments, memo, number of blocks actually parsed).
+    """
+    previous = previous or {}
+    segments, memo, parsed = [], {}, 0
+    # Define our target segments based on ## SEGMENT headers
+    for block in re.split(r"## SEGMENT ", content)[1:]: # Skip preamble
+        key = (len(segments) + 1, block)
+        seg = previous.get(key)
+        if seg is None:
+            seg = parse_segment(block, len(segments) + 1)
+            parsed += 1
+        memo[key] = seg
+        segments.append(seg)
+    return segments, memo, parsed
 
 def parse_bullets(filepath):
     if not os.path.exists(filepath):
@@ -70,52 +71,59 @@ def parse_bullets(filepath):
     with open(filepath, 'r') as f:
         content = f.read()
 
-    # Define our target segments based on ## SEGMENT headers
-    segments = []
-    segment_blocks = re.split(r"## SEGMENT ", content)
-    
-    for block in segment_blocks[1:]: # Skip preamble
-        lines = block.strip().split('\n')
-        header = lines[0]
-        
-        # Extract title and duration
-        # Format: 1: HOOK (30 seconds)
-        duration_match = re.search(r"\((.*?) seconds?\)", header)
-        duration = int(duration_match.group(1)) if duration_match else 60
-            
-        title = header.split('(')[0].split(':')[-1].strip()
-        
-        # Extract bullets and sub-sections
-        bullets = []
-        for line in lines[1:]:
-            line = line.strip()
-            if not line or line.startswith('---'):
-                continue
-            if line.startswith('- ') or line.startswith('• '):
-                bullets.append(f"• {line[2:]}")
-            elif line.startswith('### '):
-                bullets.append(f"[bold white]{line[4:].upper()}[/]")
-            elif line.startswith('**Query'):
-                bullets.append(f"[cyan]{line}[/]")
-        
-        segments.append({
-            "id": len(segments) + 1,
-            "title": title,
-            "duration": duration,
-            "bullets": bullets
-        })
-        
+    return parse_content(content)[0]
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(cached, dict) or cached.get("version") != CACHE_VERSION:
+        return None
+    return cached
+
+def _write_cache(cache_path, cached):
+    # Write then rename, so a launch racing this one never reads half a file
+    tmp = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            marshal.dump(cached, f)
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass
+
+def load_guide(filepath=GUIDE_PATH, cache_path=CACHE_PATH):
+    """The guide's segments, parsed once and then read back from the compiled cache.
+
+    The cache is trusted while the guide's mtime and size are unchanged; if
+    they differ, the content hash decides whether it really needs parsing
+    again (a touch or a checkout doesn't). Raises OSError if the guide is missing.
+    """
+    st = os.stat(filepath)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _read_cache(cache_path)
+    if cached and cached["path"] == filepath and cached["stamp"] == stamp:
+        return cached["segments"]
+
+    with open(filepath, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    if cached and cached["path"] == filepath and cached["sha256"] == digest:
+        segments = cached["segments"]
+    else:
+        segments = parse_content(raw.decode('utf-8'))[0]
+    _write_cache(cache_path, {"version": CACHE_VERSION, "path": filepath, "stamp": stamp,
+                              "sha256": digest, "segments": segments})
     return segments
 
 if __name__ == "__main__":
-    # Use the FINAL 3-pillar bullets as the source of truth
-    guide_path = "../../docs/FINAL-3-PILLAR-BULLETS.md"
-    script_data = parse_bullets(guide_path)
-    
+    script_data = parse_bullets(GUIDE_PATH)
+
     if script_data:
         # Save to the local directory
-        with open("script_data.json", "w") as f:
+        with open(DATA_PATH, "w") as f:
             json.dump(script_data, f, indent=4)
-        print(f"Successfully ingested {len(script_data)} segments from {guide_path}")
+        print(f"Successfully ingested {len(script_data)} segments from {GUIDE_PATH}")
     else:
         print("Failed to ingest bullets.")
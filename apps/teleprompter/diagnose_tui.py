@@ -1,20 +1,81 @@
+"""
+Headless diagnostics and benchmark suite for the prompter
+
+With no arguments, checks that PrompterApp mounts its widgets with a usable
+size and that a key press gets past the splash screen.
+
+--bench runs PrompterApp through app.run_test() on synthetic scripts of
+increasing size (SEGMENTSxBULLETS) and measures, for each:
+
+- startup: PrompterApp() to widgets mounted, and first key to segment 1 painted
+- key-to-paint latency of next, prev, toggle timer and reset, from the
+  moment the key binding fires to the end of the next refresh
+- frames per second (screen updates) and CPU while the timer runs
+- peak Python memory (tracemalloc) over the same key sequence, in its own pass
+  so the tracing does not slow the timed one
+
+plus, once, invocation-to-first-frame of the real prompter.py (bench_startup.py).
+Results are written as JSON and compared with a stored baseline: a metric
+more than --tolerance above its baseline (and above a small absolute noise
+floor) is a regression, and the exit status is 1.
+
+    python3 diagnose_tui.py
+    python3 diagnose_tui.py --bench --save-baseline      # record this machine's baseline
+    python3 diagnose_tui.py --bench                      # compare against it
+    python3 diagnose_tui.py --bench --sizes 10x20,1000x200 --timer-seconds 5
+"""
+
+import argparse
 import asyncio
+import json
 import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import textual
+
+import bench_startup
+import prompter
+from bench_navigation import after_refresh, percentile, synthetic_script, time_actions
 from prompter import PrompterApp
-from textual.widgets import Static
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = os.path.join(SCRIPT_DIR, "bench_results.json")
+BASELINE_PATH = os.path.join(SCRIPT_DIR, "bench_baseline.json")
+SIZES = "10x20,100x80,500x200"
+SCREEN = (120, 40)
+TOLERANCE = 0.25
+# Differences smaller than this are noise, whatever the ratio
+NOISE_FLOOR = {"_ms": 2.0, "_mb": 1.0, "_per_s": 1.0, "_percent": 2.0}
+# One round of the key sequence; "next" turns back at the last segment
+SEQUENCE = ("next", "next", "prev", "toggle", "toggle", "next", "reset")
+ACTIONS = {
+    "next": "action_next_scene",
+    "prev": "action_prev_scene",
+    "toggle": "action_toggle_timer",
+    "reset": "action_reset_scene",
+}
+
 
 async def diagnose_app():
     print("Starting TUI Diagnostic Test...")
-    
+
     # Force headless mode for testing
     os.environ["TEXTUAL"] = ""
-    
+
     app = PrompterApp()
-    
+
     try:
         async with app.run_test() as pilot:
             print(f"App Started. Initial Screen: {app.screen}")
-            
+            # The prompter widgets are mounted once the splash has been painted
+            while not app.ready:
+                await pilot.pause()
+
             # Check if #header exists
             try:
                 header = app.query_one("#header")
@@ -22,6 +83,12 @@ async def diagnose_app():
             except Exception as e:
                 print(f"FAILED: Header not found: {e}")
 
+            # Try to click through splash screen
+            print("Simulating key press to dismiss splash screen...")
+            await pilot.press("space")
+            await pilot.pause()
+            print(f"Screen after press: {app.screen}")
+
             # Check if #bullet-content exists
             try:
                 content = app.query_one("#bullet-content")
@@ -32,58 +99,194 @@ async def diagnose_app():
             except Exception as e:
                 print(f"FAILED: Bullet content not found: {e}")
 
-            # Try to click through splash screen
-            print("Simulating key press to dismiss splash screen...")
-            await pilot.press("space")
-            await pilot.pause()
-            print(f"Screen after press: {app.screen}")
-            
     except Exception as e:
         print(f"CRITICAL ERROR: {e}")
 
-if __name__ == "__main__":
-    asyncio.run(diagnose_app())
 
-from prompter import PrompterApp
-from textual.widgets import Static
+def parse_sizes(sizes: str) -> list:
+    return [tuple(int(n) for n in size.split("x")) for size in sizes.split(",")]
 
-async def diagnose_app():
-    print("Starting TUI Diagnostic Test...")
-    
-    # Force headless mode for testing
-    os.environ["TEXTUAL"] = ""
-    
+
+def key_for(step: str, app) -> str:
+    if step == "next" and app.current_idx >= len(prompter.DEMO_SCRIPT) - 1:
+        step = "prev"
+    return {"next": "right", "prev": "left", "toggle": "space", "reset": "r"}[step]
+
+
+def summarize(latencies: list) -> dict:
+    latencies = sorted(latencies)
+    if not latencies:
+        return {}
+    return {
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+    }
+
+
+def count_frames(app) -> list:
+    """Count screen updates; headless runs build every frame, they just don't write it out."""
+    frames = [0]
+    display = app._display
+
+    def counted(screen, renderable) -> None:
+        if renderable is not None:
+            frames[0] += 1
+        display(screen, renderable)
+    app._display = counted
+    return frames
+
+
+async def bench_size(segments: int, bullets: int, rounds: int, timer_seconds: float) -> dict:
+    prompter.DEMO_SCRIPT = synthetic_script(segments, bullets)
+    latencies = {step: [] for step in ACTIONS}
+    started = time.perf_counter()
     app = PrompterApp()
-    
+    for step, name in ACTIONS.items():
+        time_actions(app, (name,), latencies[step])
+    frames = count_frames(app)
+    result = {}
+    async with app.run_test(size=SCREEN) as pilot:
+        while not app.ready:
+            await after_refresh(app)
+        result["startup_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+        pressed = time.perf_counter()
+        await pilot.press("x")                  # dismiss the splash
+        await after_refresh(app)
+        result["first_segment_ms"] = round((time.perf_counter() - pressed) * 1000, 2)
+
+        for _ in range(rounds):
+            for step in SEQUENCE:
+                await pilot.press(key_for(step, app))
+                await after_refresh(app)
+        for step, values in latencies.items():
+            for stat, value in summarize(values).items():
+                result[f"{step}_{stat}"] = value
+
+        await pilot.press("r", "space")         # fresh segment, timer running
+        frames_before, began, cpu_began = frames[0], time.monotonic(), time.process_time()
+        await asyncio.sleep(timer_seconds)
+        wall = time.monotonic() - began
+        result["timer_frames_per_s"] = round((frames[0] - frames_before) / wall, 2)
+        result["timer_cpu_percent"] = round((time.process_time() - cpu_began) / wall * 100, 2)
+    return result
+
+
+async def memory_size(segments: int, bullets: int, rounds: int) -> float:
+    prompter.DEMO_SCRIPT = synthetic_script(segments, bullets)
+    tracemalloc.start()
     try:
-        async with app.run_test() as pilot:
-            print(f"App Started. Initial Screen: {app.screen}")
-            
-            # Check if #header exists
-            try:
-                header = app.query_one("#header")
-                print(f"SUCCESS: Found #header with size {header.size}")
-            except Exception as e:
-                print(f"FAILED: Header not found: {e}")
+        app = PrompterApp()
+        async with app.run_test(size=SCREEN) as pilot:
+            await pilot.press("x")
+            await after_refresh(app)
+            for _ in range(rounds):
+                for step in SEQUENCE:
+                    await pilot.press(key_for(step, app))
+                await after_refresh(app)
+        return round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+    finally:
+        tracemalloc.stop()
 
-            # Check if #bullet-content exists
-            try:
-                content = app.query_one("#bullet-content")
-                print(f"SUCCESS: Found #bullet-content with size {content.size}")
-                # Is it visible?
-                if content.size.width == 0 or content.size.height == 0:
-                    print("CRITICAL: Widget has zero size! CSS is likely collapsing it.")
-            except Exception as e:
-                print(f"FAILED: Bullet content not found: {e}")
 
-            # Try to click through splash screen
-            print("Simulating key press to dismiss splash screen...")
-            await pilot.press("space")
-            await pilot.pause()
-            print(f"Screen after press: {app.screen}")
-            
-    except Exception as e:
-        print(f"CRITICAL ERROR: {e}")
+def process_startup(runs: int) -> dict:
+    stamp_file = os.path.join(tempfile.mkdtemp(), "first_frame.json")
+    bench_startup.launch(stamp_file, 30)        # warm the OS file cache and the script cache
+    launches = [bench_startup.launch(stamp_file, 30) for _ in range(runs)]
+    return {f"{name}_ms": round(statistics.median(r[name] for r in launches), 1) for name in launches[0]}
+
+
+def run_suite(sizes: list, rounds: int, timer_seconds: float, startup_runs: int) -> dict:
+    results = {
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+        "python": platform.python_version(),
+        "textual": textual.__version__,
+        "sizes": {},
+    }
+    if startup_runs:
+        print(f"Launching prompter.py {startup_runs} times...")
+        results["process"] = process_startup(startup_runs)
+    for segments, bullets in sizes:
+        print(f"Benchmarking {segments} segments x {bullets} bullets...")
+        metrics = asyncio.run(bench_size(segments, bullets, rounds, timer_seconds))
+        metrics["peak_memory_mb"] = asyncio.run(memory_size(segments, bullets, rounds))
+        results["sizes"][f"{segments}x{bullets}"] = metrics
+    return results
+
+
+def flatten(results: dict) -> dict:
+    metrics = {f"process.{name}": value for name, value in results.get("process", {}).items()}
+    for size, values in results["sizes"].items():
+        metrics.update({f"{size}.{name}": value for name, value in values.items()})
+    return metrics
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """One row per metric present in both runs: (metric, baseline, current, change, regressed)."""
+    current, previous = flatten(results), flatten(baseline)
+    rows = []
+    for metric, value in current.items():
+        before = previous.get(metric)
+        if before is None:
+            continue
+        floor = next((f for suffix, f in NOISE_FLOOR.items() if metric.endswith(suffix)), 0.0)
+        change = value / before - 1 if before else 0.0
+        regressed = value > before * (1 + tolerance) and value - before > floor
+        rows.append((metric, before, value, change, regressed))
+    return rows
+
+
+def print_comparison(rows: list, baseline_path: str) -> None:
+    print(f"\nCompared with {baseline_path}:")
+    print(f"{'metric':40} {'baseline':>10} {'current':>10} {'change':>8}")
+    for metric, before, value, change, regressed in rows:
+        flag = "  <-- REGRESSION" if regressed else ""
+        print(f"{metric:40} {before:>10} {value:>10} {change:>+8.0%}{flag}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Diagnose and benchmark the prompter headlessly")
+    parser.add_argument("--bench", action="store_true", help="run the benchmark suite instead of the diagnostic")
+    parser.add_argument("--sizes", default=SIZES, help="comma-separated SEGMENTSxBULLETS scripts")
+    parser.add_argument("--rounds", type=int, default=20, help="repetitions of the key sequence per script")
+    parser.add_argument("--timer-seconds", type=float, default=3)
+    parser.add_argument("--startup-runs", type=int, default=3, help="prompter.py launches to time (0 to skip)")
+    parser.add_argument("--out", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed fractional slowdown")
+    args = parser.parse_args()
+
+    if not args.bench:
+        asyncio.run(diagnose_app())
+        return 0
+
+    results = run_suite(parse_sizes(args.sizes), args.rounds, args.timer_seconds, args.startup_runs)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("machine") != results["machine"]:
+        print(f"Note: baseline was recorded on {baseline.get('machine')}")
+    rows = compare(results, baseline, args.tolerance)
+    print_comparison(rows, args.baseline)
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
 
 if __name__ == "__main__":
-    asyncio.run(diagnose_app())
+    sys.exit(main())
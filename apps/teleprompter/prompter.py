@@ -1,21 +1,34 @@
+import asyncio
 import json
 import os
+import sys
+import time
+from collections import OrderedDict
+from time import monotonic
 from textual.app import App, ComposeResult
 from textual.containers import Container, Vertical, Horizontal
-from textual.widgets import Footer, Static, Label, ProgressBar
+from textual.widget import Widget
+# Footer, Label and ProgressBar are imported in mount_prompter, after the splash is up
+from textual.widgets import Static
 from textual.binding import Binding
 from textual.reactive import reactive
+from textual.strip import Strip
 from rich.text import Text
 from rich.panel import Panel
-from rich.align import Align
+from rich.errors import MarkupError
+from data_loader import DATA_PATH, GUIDE_PATH, load_guide, parse_content
 
-# Load the script data
+# Load the script data: the guide itself (through its compiled cache), else script_data.json
 def load_script():
     try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        data_path = os.path.join(script_dir, "script_data.json")
-        if os.path.exists(data_path):
-            with open(data_path, "r") as f:
+        segments = load_guide(GUIDE_PATH)
+        if segments:
+            return segments
+    except (OSError, ValueError):
+        pass
+    try:
+        if os.path.exists(DATA_PATH):
+            with open(DATA_PATH, "r") as f:
                 return json.load(f)
     except Exception:
         pass
@@ -23,6 +36,281 @@ def load_script():
 
 DEMO_SCRIPT = load_script()
 
+CACHE_SIZE = 64   # compiled segments kept
+PREWARM = 2       # segments compiled ahead on each side of the current one
+WATCH_INTERVAL = 0.5
+PADDING = (2, 4)
+BORDER_Y, BORDER_X = PADDING[0] + 1, PADDING[1] + 1   # frame rows/columns around the bullets
+MIN_SCROLL_STEP = 0.05   # seconds between auto-scroll steps, at most 20 rows a second
+# Set by bench_startup.py: write the first-frame and ready times here, then exit
+FIRST_FRAME_FILE = os.environ.get("PROMPTER_FIRST_FRAME_FILE")
+HEADER = "🎬 [bold purple]Mattie's Promptomatic[/] | [italic cyan]3-Pillar Demo[/]"
+
+def markup(text: str) -> Text:
+    try:
+        return Text.from_markup(text)
+    except MarkupError:
+        return Text(text)
+
+def compile_segment(seg: dict, total: int) -> Panel:
+    # The frame only: bullets are wrapped and painted row by row inside it
+    return Panel(
+        Text(""),
+        title=markup(f"[bold cyan]{seg['title']}[/]"),
+        subtitle=Text(f"[Segment {seg['id']}/{total} | Target: {seg['duration']}s]"),
+        border_style="purple",
+        padding=PADDING
+    )
+
+class CompiledSegment:
+    """A segment's frame, rendered once per viewport size, and its bullets
+    wrapped into rows lazily, in order, once per width. Painting a screen only
+    touches the rows on it, however long the segment is."""
+
+    def __init__(self, seg: dict, total: int):
+        self.seg = seg
+        self.total = total
+        # Older script_data.json files call the bullets "script"
+        self.bullets = seg.get('bullets', seg.get('script', []))
+        self.panel = compile_segment(seg, total)
+        self._key = None
+        self._strips = []
+        self._layout = None
+        self.rows = []
+        self.starts = []   # first row of each wrapped bullet
+
+    def strips(self, console, width: int, height: int, style) -> list:
+        key = (width, height, style)
+        if key != self._key:
+            options = console.options.update(width=width, height=height, highlight=False)
+            lines = console.render_lines(self.panel, options, style=style)
+            self._strips = [Strip(line, width) for line in lines]
+            self._key = key
+        return self._strips
+
+    @property
+    def complete(self) -> bool:
+        return len(self.starts) == len(self.bullets)
+
+    def wrap(self, console, width: int, style, rows: int = 0, bullets: int = 0) -> list:
+        """Wrap bullets until at least ``rows`` rows and ``bullets`` bullets are laid out."""
+        if (width, style) != self._layout:
+            self._layout = (width, style)
+            self.rows, self.starts = [], []
+        if self.complete or (len(self.rows) >= rows and len(self.starts) >= bullets):
+            return self.rows
+        options = console.options.update(width=width, height=None, highlight=False)
+        while not self.complete and (len(self.rows) < rows or len(self.starts) < bullets):
+            lines = console.render_lines(markup(self.bullets[len(self.starts)]), options, style=style)
+            self.starts.append(len(self.rows))
+            self.rows.extend(Strip(line, width) for line in lines)
+        return self.rows
+
+    def paced_row(self, console, width: int, style, fraction: float) -> tuple:
+        """The row being read ``fraction`` of the way through the segment, if every
+        bullet takes the same time, and the fraction at which that row changes."""
+        count = len(self.bullets)
+        if not count:
+            return 0, 2.0
+        position = min(fraction, 1.0) * count
+        bullet = min(count - 1, int(position))
+        self.wrap(console, width, style, bullets=bullet + 2)
+        start = self.starts[bullet]
+        end = self.starts[bullet + 1] if bullet + 1 < len(self.starts) else len(self.rows)
+        height = max(1, end - start)
+        step = min(height - 1, int((position - bullet) * height))
+        return start + step, (bullet + (step + 1) / height) / count
+
+class SegmentCache:
+    """Compiled segments in a bounded LRU. An entry is only reused while its
+    segment dict and the script length are unchanged, so swapping in a new
+    script invalidates exactly the segments that changed."""
+
+    def __init__(self, capacity: int = CACHE_SIZE):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def _valid(self, script: list, idx: int):
+        compiled = self.entries.get(idx)
+        if compiled and compiled.seg is script[idx] and compiled.total == len(script):
+            return compiled
+        return None
+
+    def get(self, script: list, idx: int) -> CompiledSegment:
+        compiled = self._valid(script, idx)
+        if compiled:
+            self.entries.move_to_end(idx)
+            self.hits += 1
+            return compiled
+        self.misses += 1
+        return self._store(script, idx)
+
+    def _store(self, script: list, idx: int) -> CompiledSegment:
+        compiled = CompiledSegment(script[idx], len(script))
+        if self.capacity:
+            self.entries[idx] = compiled
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        return compiled
+
+    def neighbours(self, script: list, idx: int, radius: int = PREWARM) -> list:
+        """Compile the segments around ``idx``, nearest first, keeping ``idx`` most recently used."""
+        if not self.capacity:
+            return []
+        warmed = []
+        for distance in range(radius, 0, -1):
+            for i in (idx + distance, idx - distance):
+                if 0 <= i < len(script):
+                    warmed.append(self._valid(script, i) or self._store(script, i))
+                    self.entries.move_to_end(i)
+        if idx in self.entries:
+            self.entries.move_to_end(idx)
+        return warmed[::-1]
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+class SegmentView(Widget):
+    """The current segment as a scrolling viewport: the cached frame, with only
+    the bullet rows in view copied into it. Scrolls by hand, or follows the
+    timer so the row being read at the segment's pace stays near the top."""
+
+    def __init__(self, cache: SegmentCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.compiled = None
+        self.scroll_row = 0
+        self.auto_scroll = True
+        self._wakeup = None
+
+    @property
+    def text_width(self) -> int:
+        return max(0, self.size.width - 2 * BORDER_X)
+
+    @property
+    def text_height(self) -> int:
+        return max(0, self.size.height - 2 * BORDER_Y)
+
+    def show(self, script: list, idx: int, keep_scroll: bool = False) -> None:
+        self.compiled = self.cache.get(script, idx)
+        self.scroll_to(self.scroll_row if keep_scroll else 0)
+        self.follow()
+        self.refresh()
+
+    def prewarm(self, script: list, idx: int) -> None:
+        # Render the neighbours at the current size so the next keypress is a lookup
+        width, height = self.size
+        for compiled in self.cache.neighbours(script, idx):
+            compiled.strips(self.app.console, width, height, self.rich_style)
+            compiled.wrap(self.app.console, self.text_width, self.rich_style, rows=self.text_height)
+
+    def scroll_to(self, row: int) -> None:
+        if self.compiled is None:
+            return
+        rows = self.compiled.wrap(self.app.console, self.text_width, self.rich_style, rows=row + self.text_height)
+        row = max(0, min(row, len(rows) - self.text_height))
+        if row != self.scroll_row:
+            self.scroll_row = row
+            self.refresh()
+
+    def scroll_by(self, rows: int) -> None:
+        # Taking over by hand stops the automatic pacing until it is switched back on
+        self.auto_scroll = False
+        self.follow()
+        self.scroll_to(self.scroll_row + rows)
+
+    def toggle_auto_scroll(self) -> None:
+        self.auto_scroll = not self.auto_scroll
+        self.follow()
+
+    def follow(self) -> None:
+        """Scroll to the timer's pace, and wake again when the paced row next changes."""
+        if self._wakeup:
+            self._wakeup.stop()
+            self._wakeup = None
+        timer = getattr(self.app, "timer", None)
+        if not (self.auto_scroll and self.compiled and timer and timer.is_running and timer.total_duration):
+            return
+        fraction = 1 - timer.remaining() / timer.total_duration
+        row, next_fraction = self.compiled.paced_row(self.app.console, self.text_width, self.rich_style, fraction)
+        self.scroll_to(row - self.text_height // 3)
+        if next_fraction <= 1:
+            delay = (next_fraction - fraction) * timer.total_duration
+            self._wakeup = self.set_timer(max(MIN_SCROLL_STEP, delay), self.follow)
+
+    def on_resize(self) -> None:
+        self.scroll_to(self.scroll_row)
+        self.follow()
+
+    def on_mouse_scroll_down(self) -> None:
+        self.scroll_by(3)
+
+    def on_mouse_scroll_up(self) -> None:
+        self.scroll_by(-3)
+
+    def render_line(self, y: int) -> Strip:
+        width, height = self.size
+        if self.compiled is None:
+            return Strip.blank(width, self.rich_style)
+        console, style = self.app.console, self.rich_style
+        frame = self.compiled.strips(console, width, height, style)
+        if y >= len(frame):
+            return Strip.blank(width, style)
+        line = y - BORDER_Y
+        if not 0 <= line < self.text_height or not self.text_width:
+            return frame[y]
+        row = self.scroll_row + line
+        rows = self.compiled.wrap(console, self.text_width, style, rows=row + 1)
+        if row >= len(rows):
+            return frame[y]
+        return Strip.join([frame[y].crop(0, BORDER_X), rows[row], frame[y].crop(width - BORDER_X, width)])
+
+class ScriptWatcher:
+    """Notices edits to the guide or script_data.json and re-parses them.
+
+    Only ``## SEGMENT`` blocks whose text changed are parsed again, and any
+    segment equal to the one on screen keeps its dict, so its compiled render
+    stays cached across the reload.
+    """
+
+    def __init__(self, paths=(GUIDE_PATH, DATA_PATH)):
+        self.stamps = {path: self._stamp(path) for path in paths}
+        self.memo = {}
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            st = os.stat(path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def changed(self):
+        """The most recently modified watched file that changed since the last call, or None."""
+        latest = None
+        for path, stamp in self.stamps.items():
+            current = self._stamp(path)
+            if current != stamp:
+                self.stamps[path] = current
+                if current and (latest is None or current > self.stamps[latest]):
+                    latest = path
+        return latest
+
+    def load(self, path, current):
+        """Parse ``path`` into a new script list; returns (script, segments that differ from ``current``)."""
+        with open(path, "r") as f:
+            content = f.read()
+        if path == DATA_PATH:
+            script = json.loads(content)
+        else:
+            script, self.memo, _ = parse_content(content, self.memo)
+        if not script:
+            raise ValueError(f"no segments in {os.path.basename(path)}")
+        script = [old if old == new else new for old, new in zip(current, script)] + script[len(current):]
+        changed = sum(new is not old for new, old in zip(script, current)) + max(0, len(script) - len(current))
+        return script, changed
+
 BANANA_ART = r"""
 [bold yellow]
           .
@@ -45,17 +333,67 @@ class TimerWidget(Static):
     total_duration = reactive(0.0)
     is_running = reactive(False)
 
-    def on_mount(self) -> None:
-        self.set_interval(0.1, self.update_timer)
+    # Counts down against a monotonic deadline, so a late tick never adds drift,
+    # and wakes only when the shown second, colour or pacing percent changes.
+    _deadline = None
+    _wakeup = None
+    _percent = -1
+
+    def reset(self, duration: float) -> None:
+        self._stop()
+        self.total_duration = duration
+        self.time_remaining = duration
+        self.is_running = False
+        self._percent = 0
+
+    def remaining(self) -> float:
+        if self._deadline is None:
+            return self.time_remaining
+        return max(0.0, self._deadline - monotonic())
+
+    def watch_is_running(self, running: bool) -> None:
+        if running and self._deadline is None:
+            self._deadline = monotonic() + self.time_remaining
+            self.update_timer()
+        elif not running and self._deadline is not None:
+            self.time_remaining = self.remaining()
+            self._stop()
+
+    def _stop(self) -> None:
+        self._deadline = None
+        if self._wakeup is not None:
+            self._wakeup.stop()
+            self._wakeup = None
+
+    def _shown(self, remaining: float) -> tuple:
+        return int(remaining), remaining < 5, remaining < self.total_duration / 3
+
+    def _next_change(self, remaining: float) -> float:
+        # Seconds until the display or the pacing percent would next differ
+        boundaries = [int(remaining), 5, self.total_duration / 3]
+        if self.total_duration:
+            boundaries.append(self.total_duration * (1 - (self._percent + 1) / 100))
+        return min(remaining - b for b in boundaries if b <= remaining) + 0.001
 
     def update_timer(self) -> None:
-        if self.is_running and self.time_remaining > 0:
-            self.time_remaining -= 0.1
-            self.app.update_progress(self.time_remaining)
-        elif self.time_remaining <= 0 and self.is_running:
-            self.is_running = False
+        self._wakeup = None
+        if self._deadline is None:
+            return
+        remaining = self.remaining()
+        if remaining <= 0:
+            self._stop()
             self.time_remaining = 0
+            self.is_running = False
+            self.app.update_progress(100)
             self.app.notify("Segment Complete!", severity="information")
+            return
+        if self._shown(remaining) != self._shown(self.time_remaining):
+            self.time_remaining = remaining
+        percent = int((1 - remaining / self.total_duration) * 100) if self.total_duration else 0
+        if percent != self._percent:
+            self._percent = percent
+            self.app.update_progress(percent)
+        self._wakeup = self.set_timer(self._next_change(remaining), self.update_timer)
 
     def render(self) -> str:
         minutes, seconds = divmod(int(self.time_remaining), 60)
@@ -122,7 +460,7 @@ class PrompterApp(App):
     .started #splash-container { display: none; }
     .started #header { display: block; }
     .started #main-container { display: block; }
-    .started #footer-container { display: flex; }
+    .started #footer-container { display: block; }
     """
 
     BINDINGS = [
@@ -130,6 +468,11 @@ class PrompterApp(App):
         Binding("right", "next_scene", "Next", show=True),
         Binding("left", "prev_scene", "Back", show=True),
         Binding("r", "reset_scene", "Reset", show=True),
+        Binding("down", "scroll_segment(1)", "Scroll", show=True),
+        Binding("up", "scroll_segment(-1)", "Scroll up", show=False),
+        Binding("pagedown", "scroll_page(1)", "Page down", show=False),
+        Binding("pageup", "scroll_page(-1)", "Page up", show=False),
+        Binding("a", "toggle_auto_scroll", "Auto-scroll", show=True),
         Binding("q", "quit", "Quit", show=True),
     ]
 
@@ -137,61 +480,123 @@ class PrompterApp(App):
     is_running = reactive(False)
     has_started = reactive(False)
 
+    def __init__(self, live_reload: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.segment_cache = SegmentCache()
+        self.watcher = ScriptWatcher() if live_reload else None
+        self.ready = False
+        self.start_pending = False
+        self.first_frame_at = None
+
     def compose(self) -> ComposeResult:
+        # Only the splash screen; the rest is mounted once it has been painted
         with Container(id="app-container"):
             yield Static(BANANA_ART, id="splash-container")
-            yield Static("🎬 [bold purple]Mattie's Promptomatic[/] | [italic cyan]3-Pillar Demo[/]", id="header")
-            with Vertical(id="main-container"):
-                yield Static(id="bullet-content")
-            with Horizontal(id="footer-container"):
-                yield Label("TIME: ")
-                yield TimerWidget(id="timer")
-                yield ProgressBar(id="pacing-bar", total=100, show_percentage=False)
-        yield Footer()
 
     def on_key(self) -> None:
-        if not self.has_started:
-            self.has_started = True
-            self.add_class("started")
-            self.update_view()
+        if self.has_started:
+            return
+        if self.ready:
+            self.start()
+        else:
+            # Pressed before the prompter is mounted: start as soon as it is
+            self.start_pending = True
+
+    def start(self) -> None:
+        self.has_started = True
+        self.add_class("started")
+        self.update_view()
 
-    def update_progress(self, time_remaining: float) -> None:
+    def on_mount(self) -> None:
+        self.call_after_refresh(self.mount_prompter)
+
+    async def mount_prompter(self) -> None:
+        from textual.widgets import Footer, Label, ProgressBar
+
+        self.first_frame_at = time.time()
+        await self.query_one("#app-container").mount_all([
+            Static(HEADER, id="header"),
+            Vertical(SegmentView(self.segment_cache, id="bullet-content"), id="main-container"),
+            Horizontal(
+                Label("TIME: "),
+                TimerWidget(id="timer"),
+                ProgressBar(id="pacing-bar", total=100, show_percentage=False),
+                id="footer-container",
+            ),
+        ])
+        await self.mount(Footer())
+        self.pacing_bar = self.query_one("#pacing-bar", ProgressBar)
+        self.bullet_content = self.query_one("#bullet-content", SegmentView)
+        self.timer = self.query_one("#timer", TimerWidget)
+        # Compile the opening segment while the splash screen is up
+        self.segment_cache.get(DEMO_SCRIPT, 0)
+        if self.watcher:
+            self.set_interval(WATCH_INTERVAL, self.check_script)
+        self.ready = True
+        if self.start_pending:
+            self.start()
+        if FIRST_FRAME_FILE:
+            with open(FIRST_FRAME_FILE, "w") as f:
+                json.dump({"first_frame": self.first_frame_at, "ready": time.time()}, f)
+            self.exit()
+
+    def check_script(self) -> None:
+        path = self.watcher.changed()
+        if path:
+            self.run_worker(self.reload_script(path), group="reload", exclusive=True)
+
+    async def reload_script(self, path: str) -> None:
+        saved_at = os.path.getmtime(path) if os.path.exists(path) else time.time()
+        started = monotonic()
         try:
-            seg = DEMO_SCRIPT[self.current_idx]
-            self.query_one("#pacing-bar").progress = ((seg['duration'] - time_remaining) / seg['duration']) * 100
-        except Exception:
-            pass
+            script, changed = await asyncio.to_thread(self.watcher.load, path, DEMO_SCRIPT)
+        except (OSError, ValueError) as e:
+            # Mid-save or broken edit: keep presenting the current script
+            self.query_one("#header", Static).update(f"{HEADER}  [red]↻ reload failed: {e}[/]")
+            return
+        parse_ms = (monotonic() - started) * 1000
+        self.swap_script(script)
+        self.call_after_refresh(self.show_reload, changed, len(script), parse_ms, saved_at)
+
+    def swap_script(self, script: list) -> None:
+        """Replace the script in one step, keeping the current segment and the timer as they are."""
+        global DEMO_SCRIPT
+        DEMO_SCRIPT = script
+        idx = min(self.current_idx, len(script) - 1)
+        if idx != self.current_idx:
+            # Not through the watcher, which would reset the timer
+            self.set_reactive(PrompterApp.current_idx, idx)
+        if self.has_started:
+            self.bullet_content.show(script, idx, keep_scroll=True)
+            self.call_after_refresh(self.bullet_content.prewarm, script, idx)
+
+    def show_reload(self, changed: int, total: int, parse_ms: float, saved_at: float) -> None:
+        on_screen = max(0.0, time.time() - saved_at)
+        self.query_one("#header", Static).update(
+            f"{HEADER}  [dim]↻ {changed}/{total} segments changed, parsed in {parse_ms:.0f} ms, "
+            f"on screen {on_screen:.2f} s after save[/]")
+
+    def update_progress(self, percent: float) -> None:
+        self.pacing_bar.progress = percent
 
     def watch_current_idx(self) -> None:
         if self.has_started:
             self.update_view()
 
     def update_view(self) -> None:
-        try:
-            seg = DEMO_SCRIPT[self.current_idx]
-            content = "\n".join(seg['bullets'])
-            self.query_one("#bullet-content").update(
-                Panel(
-                    Align.left(content),
-                    title=f"[bold cyan]{seg['title']}[/]",
-                    subtitle=f"[Segment {seg['id']}/{len(DEMO_SCRIPT)} | Target: {seg['duration']}s]",
-                    border_style="purple",
-                    padding=(2, 4)
-                )
-            )
-            timer = self.query_one("#timer")
-            timer.total_duration = float(seg['duration'])
-            timer.time_remaining = float(seg['duration'])
-            timer.is_running = False
-            self.is_running = False
-            self.query_one("#pacing-bar").progress = 0
-        except Exception:
-            pass
+        idx = min(self.current_idx, len(DEMO_SCRIPT) - 1)
+        self.timer.reset(float(DEMO_SCRIPT[idx]['duration']))
+        self.bullet_content.show(DEMO_SCRIPT, idx)
+        self.is_running = False
+        self.pacing_bar.progress = 0
+        # Paint first, then compile the neighbours the next keypress will need
+        self.call_after_refresh(self.bullet_content.prewarm, DEMO_SCRIPT, idx)
 
     def action_toggle_timer(self) -> None:
         if not self.has_started: return
         self.is_running = not self.is_running
-        self.query_one("#timer").is_running = self.is_running
+        self.timer.is_running = self.is_running
+        self.bullet_content.follow()
 
     def action_next_scene(self) -> None:
         if not self.has_started: return
@@ -207,215 +612,17 @@ class PrompterApp(App):
         if not self.has_started: return
         self.update_view()
 
-if __name__ == "__main__":
-    PrompterApp().run()
-
-from textual.app import App, ComposeResult
-from textual.containers import Container, Vertical, Horizontal
-from textual.widgets import Footer, Static, Label, ProgressBar
-from textual.binding import Binding
-from textual.reactive import reactive
-from rich.text import Text
-from rich.panel import Panel
-from rich.align import Align
-
-# Load the script data
-def load_script():
-    try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        data_path = os.path.join(script_dir, "script_data.json")
-        if os.path.exists(data_path):
-            with open(data_path, "r") as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return [{"id": 1, "title": "Setup Required", "duration": 30, "bullets": ["• Please run data_loader.py!", "• Your script data was not found."]}]
-
-DEMO_SCRIPT = load_script()
-
-BANANA_ART = r"""
-[bold yellow]
-          .
-         //
-        //
-  _____//_____
- /            \\
-|  NANO BANANA |
-|      PRO     |
- \____________/
-[/]
-[bold purple]Mattie's Promptomatic[/]
-[dim]Version 1.2.0[/]
-
-[blink]Press ANY KEY to begin your demo...[/]
-"""
-
-class TimerWidget(Static):
-    time_remaining = reactive(0.0)
-    total_duration = reactive(0.0)
-    is_running = reactive(False)
-
-    def on_mount(self) -> None:
-        self.set_interval(0.1, self.update_timer)
-
-    def update_timer(self) -> None:
-        if self.is_running and self.time_remaining > 0:
-            self.time_remaining -= 0.1
-            self.app.update_progress(self.time_remaining)
-        elif self.time_remaining <= 0 and self.is_running:
-            self.is_running = False
-            self.time_remaining = 0
-            self.app.notify("Segment Complete!", severity="information")
-
-    def render(self) -> str:
-        minutes, seconds = divmod(int(self.time_remaining), 60)
-        time_str = f"{minutes:02d}:{seconds:02d}"
-        color = "green"
-        if self.time_remaining < 5: color = "red"
-        elif self.time_remaining < (self.total_duration / 3): color = "yellow"
-        return f"[{color}]{time_str}[/]"
-
-class PrompterApp(App):
-    CSS = """
-    Screen { 
-        background: #0a0a0a; 
-        align: center middle;
-    }
-    
-    #app-container {
-        width: 100%;
-        height: 100%;
-    }
-
-    #splash-container {
-        width: 100%;
-        height: 100%;
-        content-align: center middle;
-        background: #050505;
-    }
-
-    #header { 
-        height: 3; 
-        background: #1a1a1a; 
-        border-bottom: solid #a855f7; 
-        content-align: center middle;
-        display: none;
-    }
-
-    #main-container { 
-        height: 1fr; 
-        padding: 2;
-        display: none;
-    }
-
-    #bullet-content { 
-        height: 1fr; 
-        color: #e5e5e5;
-    }
-
-    #footer-container { 
-        height: 3; 
-        background: #1a1a1a; 
-        border-top: solid #333; 
-        layout: horizontal; 
-        padding: 0 2; 
-        align: center middle;
-        display: none;
-    }
-
-    #pacing-bar { 
-        width: 1fr; 
-        margin-left: 2; 
-    }
-
-    /* States */
-    .started #splash-container { display: none; }
-    .started #header { display: block; }
-    .started #main-container { display: block; }
-    .started #footer-container { display: flex; }
-    """
-
-    BINDINGS = [
-        Binding("space", "toggle_timer", "Start/Pause", show=True),
-        Binding("right", "next_scene", "Next", show=True),
-        Binding("left", "prev_scene", "Back", show=True),
-        Binding("r", "reset_scene", "Reset", show=True),
-        Binding("q", "quit", "Quit", show=True),
-    ]
-
-    current_idx = reactive(0)
-    is_running = reactive(False)
-    has_started = reactive(False)
-
-    def compose(self) -> ComposeResult:
-        with Container(id="app-container"):
-            yield Static(BANANA_ART, id="splash-container")
-            yield Static("🎬 [bold purple]Mattie's Promptomatic[/] | [italic cyan]3-Pillar Demo[/]", id="header")
-            with Vertical(id="main-container"):
-                yield Static(id="bullet-content")
-            with Horizontal(id="footer-container"):
-                yield Label("TIME: ")
-                yield TimerWidget(id="timer")
-                yield ProgressBar(id="pacing-bar", total=100, show_percentage=False)
-        yield Footer()
-
-    def on_key(self) -> None:
-        if not self.has_started:
-            self.has_started = True
-            self.add_class("started")
-            self.update_view()
-
-    def update_progress(self, time_remaining: float) -> None:
-        try:
-            seg = DEMO_SCRIPT[self.current_idx]
-            self.query_one("#pacing-bar").progress = ((seg['duration'] - time_remaining) / seg['duration']) * 100
-        except Exception:
-            pass
-
-    def watch_current_idx(self) -> None:
-        if self.has_started:
-            self.update_view()
-
-    def update_view(self) -> None:
-        try:
-            seg = DEMO_SCRIPT[self.current_idx]
-            content = "\n".join(seg['bullets'])
-            self.query_one("#bullet-content").update(
-                Panel(
-                    Align.left(content),
-                    title=f"[bold cyan]{seg['title']}[/]",
-                    subtitle=f"[Segment {seg['id']}/{len(DEMO_SCRIPT)} | Target: {seg['duration']}s]",
-                    border_style="purple",
-                    padding=(2, 4)
-                )
-            )
-            timer = self.query_one("#timer")
-            timer.total_duration = float(seg['duration'])
-            timer.time_remaining = float(seg['duration'])
-            timer.is_running = False
-            self.is_running = False
-            self.query_one("#pacing-bar").progress = 0
-        except Exception:
-            pass
-
-    def action_toggle_timer(self) -> None:
+    def action_scroll_segment(self, rows: int) -> None:
         if not self.has_started: return
-        self.is_running = not self.is_running
-        self.query_one("#timer").is_running = self.is_running
+        self.bullet_content.scroll_by(rows)
 
-    def action_next_scene(self) -> None:
+    def action_scroll_page(self, pages: int) -> None:
         if not self.has_started: return
-        if self.current_idx < len(DEMO_SCRIPT) - 1:
-            self.current_idx += 1
+        self.bullet_content.scroll_by(pages * max(1, self.bullet_content.text_height - 1))
 
-    def action_prev_scene(self) -> None:
+    def action_toggle_auto_scroll(self) -> None:
         if not self.has_started: return
-        if self.current_idx > 0:
-            self.current_idx -= 1
-
-    def action_reset_scene(self) -> None:
-        if not self.has_started: return
-        self.update_view()
+        self.bullet_content.toggle_auto_scroll()
 
 if __name__ == "__main__":
-    PrompterApp().run()
+    PrompterApp(live_reload="--watch" in sys.argv[1:]).run()
@@ -1,9 +1,9 @@
 #!/bin/bash
 # Le Prompt-O-Matic Runner
 
-# Always update script data from the markdown guide
-echo "Ingesting latest script from CAPCUT-DEMO-GUIDE.md..."
-python3 data_loader.py
+# prompter.py reads the markdown guide itself, through a compiled cache that
+# is rebuilt only when the guide changes (python3 data_loader.py still
+# exports script_data.json)
 
 # Check for virtual environment
 if [ ! -d "venv" ]; then
@@ -11,33 +11,15 @@ if [ ! -d "venv" ]; then
     python3 -m venv venv
 fi
 
-# Activate venv and install requirements
+# Activate venv and install requirements, only when requirements.txt changed
 source venv/bin/activate
-echo "Installing/Updating dependencies..."
-pip install -r requirements.txt -q
-
-# Run the app
-echo "Lancement du Mattie's Promptomatic... Prêt?"
-python3 prompter.py
-
-
-
-# Always update script data from the markdown guide
-echo "Ingesting latest script from CAPCUT-DEMO-GUIDE.md..."
-python3 data_loader.py
-
-# Check for virtual environment
-if [ ! -d "venv" ]; then
-    echo "Creating virtual environment..."
-    python3 -m venv venv
+REQUIREMENTS_SUM=$(cksum < requirements.txt)
+if [ "$(cat venv/.requirements.cksum 2>/dev/null)" != "$REQUIREMENTS_SUM" ]; then
+    echo "Installing/Updating dependencies..."
+    pip install -r requirements.txt -q && echo "$REQUIREMENTS_SUM" > venv/.requirements.cksum
 fi
 
-# Activate venv and install requirements
-source venv/bin/activate
-echo "Installing/Updating dependencies..."
-pip install -r requirements.txt -q
-
 # Run the app
 echo "Lancement du Mattie's Promptomatic... Prêt?"
-python3 prompter.py
-
+# Pass --watch to reload script edits without restarting
+exec python3 prompter.py "$@"
@@ -5,7 +5,8 @@ import crypto from 'crypto';
 import { chromium } from 'playwright';
 
 const STORAGE_STATE_PATH = path.join(process.cwd(), 'tmp/aoma-stage-storage.json');
-const URLS_PATH = path.join(process.cwd(), 'aoma_crawl/urls.json');
+// AOMA_URLS_FILE=aoma_crawl/requeue.json re-crawls pages flagged by scripts/crawl-corpus/fingerprint.py
+const URLS_PATH = path.resolve(process.cwd(), process.env.AOMA_URLS_FILE || 'aoma_crawl/urls.json');
 const OUT_DIR = path.join(process.cwd(), 'aoma_crawl');
 const HTML_DIR = path.join(OUT_DIR, 'html');
 const FILES_DIR = path.join(OUT_DIR, 'files');
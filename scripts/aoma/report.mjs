@@ -24,6 +24,15 @@ function safeReadJson(p, dflt) {
   const failures = pages.filter((p) => !p.htmlPath);
   const binaries = successes.reduce((sum, p) => sum + (Array.isArray(p.binaries) ? p.binaries.filter(b => b && b.ok).length : 0), 0);
   const totalHtmlBytes = successes.reduce((sum, p) => sum + (p.htmlSize || 0), 0);
+  // Set by scripts/crawl-corpus/dedup.py: one stored body per bodySha256
+  const uniqueBodies = new Set(successes.map((p) => p.bodySha256).filter(Boolean)).size;
+  const duplicates = successes.filter((p) => p.duplicateOf);
+  const duplicateHtmlBytes = duplicates.reduce((sum, p) => sum + (p.htmlSize || 0), 0);
+  // Set by scripts/crawl-corpus/fingerprint.py: login/SSO/error/empty pages kept out of html/
+  const junkPages = {};
+  for (const p of successes) {
+    if (p.pageClass && p.pageClass !== 'content') junkPages[p.pageClass] = (junkPages[p.pageClass] || 0) + 1;
+  }
 
   const manifest = {
     runAt: new Date().toISOString(),
@@ -33,6 +42,10 @@ function safeReadJson(p, dflt) {
       pagesFailed: failures.length,
       binariesDownloaded: binaries,
       totalHtmlBytes,
+      uniqueBodies,
+      duplicatePages: duplicates.length,
+      duplicateHtmlBytes,
+      junkPages,
     },
     outputs: {
       urlsJson: path.relative(process.cwd(), URLS),
@@ -40,6 +53,7 @@ function safeReadJson(p, dflt) {
       manifest: path.relative(process.cwd(), MANIFEST),
       htmlDir: path.relative(process.cwd(), path.join(OUT_DIR, 'html')),
       mdDir: path.relative(process.cwd(), path.join(OUT_DIR, 'md')),
+      bodiesJson: path.relative(process.cwd(), path.join(OUT_DIR, 'bodies.json')),
       filesDir: path.relative(process.cwd(), path.join(OUT_DIR, 'files')),
     },
     sample: successes.slice(0, 5).map((p) => ({ url: p.url, title: p.title, status: p.status })),
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Confluence Attachment Harvester
+
+Enumerates the attachments of every crawled page through the Confluence REST
+API and downloads them in parallel, paced by the politeness controller.
+
+- Transfers are resumable: partial downloads are kept and continued with
+  HTTP Range requests.
+- Files are stored content-addressed by sha256 (`blobs/ab/abcdef....pdf`), so
+  a file attached to many pages is stored once. An attachment already seen
+  (same download URL and version) is never fetched again, and a new one whose
+  size and first 64 KiB match a stored blob is linked without a full download.
+- Newly stored documents are appended to `docling_queue.jsonl` for
+  scripts/doc-analysis/docling-bridge.py.
+- 429, 5xx and timeouts are retried a few times; each retry waits out the
+  host's cooldown in the politeness limiter (Retry-After when given).
+  `index.json` is checkpointed as pages finish, not only at the end.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode, urljoin
+
+import session_cookies
+from politeness import PolitenessController, is_backoff_status, parse_retry_after
+
+ATTACHMENTS_DIR = "attachments"
+PAGE_SIZE = 100
+CHUNK_SIZE = 256 * 1024
+PREFIX_PROBE_BYTES = 64 * 1024
+REQUEST_TIMEOUT = 60  # seconds
+MAX_PARALLEL_DOWNLOADS = int(os.getenv("ATTACHMENT_PARALLELISM", "4"))
+MAX_ATTEMPTS = 4             # per request, for 429/5xx and transport errors
+INDEX_SAVE_INTERVAL = 5.0    # seconds between index.json checkpoints during a run
+
+# Media types docling-bridge.py accepts (its allowed_formats); everything else, including
+# legacy .doc/.xls, is stored but not queued
+DOCLING_MEDIA_TYPES = {
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "text/html",
+    "text/markdown",
+}
+
+
+class HttpStatusError(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _open(url, cookies, headers=None, timeout=REQUEST_TIMEOUT):
+    """Blocking GET with the wiki session cookies; raises HttpStatusError for >= 400."""
+    request_headers = {"Cookie": session_cookies.cookie_header(session_cookies.cookies_for_url(cookies, url))}
+    request_headers.update(headers or {})
+    try:
+        return urllib.request.urlopen(urllib.request.Request(url, headers=request_headers), timeout=timeout)
+    except urllib.error.HTTPError as e:
+        raise HttpStatusError(e.code, e.headers.get("Retry-After")) from None
+
+
+def _get_json(url, cookies):
+    with _open(url, cookies, {"Accept": "application/json"}) as response:
+        return json.load(response)
+
+
+def _blob_path(root, sha256, extension):
+    return os.path.join(root, "blobs", sha256[:2], sha256 + extension)
+
+
+class AttachmentHarvester:
+    """Parallel, resumable, content-addressed attachment downloader for one crawl run."""
+
+    def __init__(self, cookies, output_dir=ATTACHMENTS_DIR, wiki_base_url=session_cookies.WIKI_BASE_URL,
+                 politeness=None, parallelism=MAX_PARALLEL_DOWNLOADS):
+        self.cookies = cookies
+        self.output_dir = output_dir
+        self.wiki_base_url = wiki_base_url.rstrip("/")
+        self.politeness = politeness or PolitenessController()
+        self.index_path = os.path.join(output_dir, "index.json")
+        self.queue_path = os.path.join(output_dir, "docling_queue.jsonl")
+        self.partial_dir = os.path.join(output_dir, ".partial")
+        self._slots = asyncio.Semaphore(parallelism)
+        self._index_lock = asyncio.Lock()
+        self._tasks = []
+        self.index = {"by_source": {}, "blobs": {}}
+        self.stats = {
+            "pages": 0,
+            "attachments_seen": 0,
+            "downloaded": 0,
+            "bytes_downloaded": 0,
+            "resumed": 0,
+            "skipped_known": 0,
+            "deduplicated": 0,
+            "bytes_saved": 0,
+            "queued_for_docling": 0,
+            "failed": 0,
+            "retries": 0,
+        }
+        self._index_saved = time.monotonic()
+        self._first_transfer = None
+        self._last_transfer = None
+        os.makedirs(self.partial_dir, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f:
+                self.index = json.load(f)
+
+    def schedule_page(self, page_id, page_url=""):
+        """Harvest a page's attachments in the background; `drain()` waits for all of them."""
+        self._tasks.append(asyncio.create_task(self.harvest_page(page_id, page_url)))
+
+    async def drain(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks.clear()
+        await self._save_index()
+        return self.report()
+
+    async def harvest_page(self, page_id, page_url=""):
+        """Enumerate one page's attachments and download them concurrently."""
+        self.stats["pages"] += 1
+        attachments = await self.list_attachments(page_id)
+        self.stats["attachments_seen"] += len(attachments)
+        await asyncio.gather(*(self._harvest_one(a, page_id, page_url) for a in attachments))
+        if time.monotonic() - self._index_saved >= INDEX_SAVE_INTERVAL:
+            # Checkpoint, so a crash mid-run does not orphan the blobs stored so far
+            await self._save_index()
+
+    async def list_attachments(self, page_id):
+        """All attachment records of a page, following REST pagination."""
+        attachments = []
+        start = 0
+        while True:
+            query = urlencode({"limit": PAGE_SIZE, "start": start, "expand": "version"})
+            url = f"{self.wiki_base_url}/rest/api/content/{page_id}/child/attachment?{query}"
+            try:
+                data = await self._fetch(url, lambda: _get_json(url, self.cookies))
+            except Exception:
+                self.stats["failed"] += 1
+                return attachments
+            results = data.get("results", [])
+            attachments.extend(results)
+            if len(results) < PAGE_SIZE or "next" not in data.get("_links", {}):
+                return attachments
+            start += PAGE_SIZE
+
+    async def _fetch(self, url, blocking_call):
+        """
+        Run a blocking request in a thread while holding a politeness slot.
+
+        429/5xx responses and transport errors are retried up to MAX_ATTEMPTS
+        times. The limiter records each failure and makes the next attempt
+        wait out the host's cooldown: Retry-After, or exponential back-off.
+        """
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                async with self.politeness.request(url) as outcome:
+                    try:
+                        result = await asyncio.to_thread(blocking_call)
+                        outcome.status = 200
+                        return result
+                    except HttpStatusError as e:
+                        outcome.status = e.status
+                        outcome.retry_after = parse_retry_after(e.retry_after)
+                        raise
+            except HttpStatusError as e:
+                if not is_backoff_status(e.status) or attempt == MAX_ATTEMPTS:
+                    raise
+            except OSError:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+            self.stats["retries"] += 1
+
+    async def _harvest_one(self, attachment, page_id, page_url):
+        extensions = attachment.get("extensions", {})
+        download = urljoin(self.wiki_base_url + "/", attachment.get("_links", {}).get("download", "").lstrip("/"))
+        version = attachment.get("version", {}).get("number", 1)
+        source_key = f"{attachment.get('id')}@{version}"
+        size = int(extensions.get("fileSize") or 0)
+        media_type = extensions.get("mediaType", "application/octet-stream")
+        title = attachment.get("title", "attachment")
+
+        known = self.index["by_source"].get(source_key)
+        if known and known in self.index["blobs"]:
+            self.stats["skipped_known"] += 1
+            self.stats["bytes_saved"] += size
+            await self._link(known, page_id, page_url, title)
+            return
+
+        async with self._slots:
+            try:
+                duplicate = await self._probe_duplicate(download, size, media_type)
+                if duplicate:
+                    self.stats["deduplicated"] += 1
+                    self.stats["bytes_saved"] += size
+                    sha256 = duplicate
+                else:
+                    sha256 = await self._download(download, source_key, title, media_type)
+            except Exception:
+                self.stats["failed"] += 1
+                return
+
+        async with self._index_lock:
+            self.index["by_source"][source_key] = sha256
+        await self._link(sha256, page_id, page_url, title)
+
+    async def _probe_duplicate(self, url, size, media_type):
+        """Return the sha256 of a stored blob with the same size and 64 KiB prefix, if any."""
+        candidates = [
+            sha for sha, blob in self.index["blobs"].items()
+            if blob["size"] == size and blob["media_type"] == media_type and blob.get("prefix_sha256")
+        ]
+        if not candidates or size <= PREFIX_PROBE_BYTES:
+            return None
+
+        def read_prefix():
+            with _open(url, self.cookies, {"Range": f"bytes=0-{PREFIX_PROBE_BYTES - 1}"}) as response:
+                return hashlib.sha256(response.read(PREFIX_PROBE_BYTES)).hexdigest()
+
+        prefix = await self._fetch(url, read_prefix)
+        for sha in candidates:
+            if self.index["blobs"][sha]["prefix_sha256"] == prefix:
+                return sha
+        return None
+
+    async def _download(self, url, source_key, title, media_type):
+        """Resumable download into .partial/, then move into the content-addressed store."""
+        partial = os.path.join(self.partial_dir, hashlib.sha1(source_key.encode()).hexdigest() + ".part")
+
+        def transfer():
+            offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            started = time.monotonic()
+            if self._first_transfer is None:
+                self._first_transfer = started
+            try:
+                response = _open(url, self.cookies, headers)
+            except HttpStatusError as e:
+                if e.status != 416:  # 416: the partial file is already complete
+                    raise
+                response = None
+            written = 0
+            if response is not None:
+                with response:
+                    resumed = offset and response.status == 206
+                    with open(partial, "ab" if resumed else "wb") as f:
+                        while True:
+                            chunk = response.read(CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            f.write(chunk)
+                            written += len(chunk)
+            else:
+                resumed = True
+            self._last_transfer = time.monotonic()
+            return bool(offset and resumed), written
+
+        resumed, written = await self._fetch(url, transfer)
+        self.stats["resumed"] += int(resumed)
+        self.stats["downloaded"] += 1
+        self.stats["bytes_downloaded"] += written
+
+        sha256, prefix_sha256, size = await asyncio.to_thread(self._hash_file, partial)
+        extension = os.path.splitext(title)[1].lower()
+        blob = _blob_path(self.output_dir, sha256, extension)
+        async with self._index_lock:
+            is_new = sha256 not in self.index["blobs"]
+            if is_new:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.replace(partial, blob)
+                self.index["blobs"][sha256] = {
+                    "path": os.path.relpath(blob, self.output_dir),
+                    "size": size,
+                    "media_type": media_type,
+                    "prefix_sha256": prefix_sha256,
+                    "titles": [],
+                    "pages": [],
+                }
+            else:
+                # Same bytes as an existing blob under a different attachment id
+                os.remove(partial)
+                self.stats["deduplicated"] += 1
+                self.stats["bytes_saved"] += size
+        if is_new and media_type in DOCLING_MEDIA_TYPES:
+            self._enqueue_for_docling(sha256, blob, media_type, title)
+        return sha256
+
+    @staticmethod
+    def _hash_file(path):
+        digest = hashlib.sha256()
+        size = 0
+        prefix_sha256 = None
+        with open(path, "rb") as f:
+            first = f.read(PREFIX_PROBE_BYTES)
+            prefix_sha256 = hashlib.sha256(first).hexdigest()
+            digest.update(first)
+            size += len(first)
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                size += len(chunk)
+        return digest.hexdigest(), prefix_sha256, size
+
+    async def _link(self, sha256, page_id, page_url, title):
+        async with self._index_lock:
+            blob = self.index["blobs"][sha256]
+            if title not in blob["titles"]:
+                blob["titles"].append(title)
+            reference = {"page_id": str(page_id), "url": page_url}
+            if reference not in blob["pages"]:
+                blob["pages"].append(reference)
+
+    def _enqueue_for_docling(self, sha256, blob_path, media_type, title):
+        with open(self.queue_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "file_path": os.path.abspath(blob_path),
+                "sha256": sha256,
+                "media_type": media_type,
+                "title": title,
+                "queued_at": time.time(),
+            }) + "\n")
+        self.stats["queued_for_docling"] += 1
+
+    async def _save_index(self):
+        async with self._index_lock:
+            self._index_saved = time.monotonic()
+            tmp = self.index_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.index, f)
+            os.replace(tmp, self.index_path)
+
+    def report(self):
+        """Throughput and dedup savings for the run so far."""
+        seconds = (self._last_transfer - self._first_transfer) if self._first_transfer and self._last_transfer else 0.0
+        report = dict(self.stats)
+        report["transfer_seconds"] = round(seconds, 2)
+        report["throughput_mb_s"] = round(self.stats["bytes_downloaded"] / seconds / 1e6, 2) if seconds else 0.0
+        report["unique_blobs"] = len(self.index["blobs"])
+        return report
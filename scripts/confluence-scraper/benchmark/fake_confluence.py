@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Local Confluence Stand-in
+
+Generates a synthetic Confluence site and serves it over HTTP with the same
+URL shapes the scraper sees on the real wiki:
+
+- /wiki/display/<SPACE> and /wiki/display/<SPACE>/<Title+With+Pluses>
+- /wiki/pages/viewpage.action?pageId=<id> (USM home keeps pageId 67863500)
+- /wiki/rest/api/user/current and /wiki/rest/api/content/<id>/child/attachment
+- /wiki/download/attachments/<id>/<file>?version=1 with Range support
+- the two-step login.action form (username, then password) setting JSESSIONID
+
+Pages carry the usual Confluence chrome (header, sidebar page tree, comments)
+and link to each other through both URL shapes, so canonicalization and
+pruning are exercised. Latency, 503s and 429 rate limiting can be injected.
+
+Run standalone:
+    python3 fake_confluence.py --pages 200 --port 8090
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote_plus, unquote_plus, urlparse
+
+USERNAME = "bench-user"
+PASSWORD = "bench-pass"
+
+# Mirrors SPACES_TO_SCRAPE in scrape_wiki.py: (space key, home page id, home title)
+SPACES = [
+    ("AOMA", None, "AOMA Home"),
+    ("USM", 67863500, "Unified Session Manager Home"),
+    ("GMP", None, "GMP Home"),
+]
+
+TITLE_TOPICS = [
+    "Overview", "Getting Started", "Architecture", "API Reference", "User Guide", "Configuration",
+    "Technical Specification", "Release Notes", "FAQ", "Troubleshooting", "Meeting Notes",
+    "Retrospective", "Team Calendar", "Onboarding", "Glossary", "Runbook",
+]
+CHROME_MARKER = "CHROME-MARKER"  # appears only in Confluence UI; must never reach the output
+
+
+class Page:
+    __slots__ = ("id", "space", "title", "parent", "children", "paragraphs", "attachments")
+
+    def __init__(self, page_id, space, title, parent):
+        self.id = page_id
+        self.space = space
+        self.title = title
+        self.parent = parent
+        self.children = []
+        self.paragraphs = []
+        self.attachments = []  # (attachment id, filename, content key)
+
+
+class SyntheticSite:
+    """Deterministic page tree per space plus attachment contents."""
+
+    def __init__(self, pages_per_space=100, depth=4, attachment_ratio=0.3, attachment_kb=128,
+                 shared_attachment_ratio=0.5, paragraphs=5, seed=42):
+        rng = random.Random(seed)
+        self.pages = {}
+        self.homes = {}
+        self.by_title = {}
+        self.attachment_blobs = {}
+        next_id = 1000
+        next_attachment = 1
+        shared_keys = [f"shared-{i}" for i in range(8)]
+
+        for space, home_id, home_title in SPACES:
+            home = Page(home_id or next_id, space, home_title, None)
+            next_id += 1
+            self._add(home)
+            self.homes[space] = home
+            level = [home]
+            created = 1
+            for d in range(1, depth + 1):
+                if created >= pages_per_space:
+                    break
+                remaining_levels = depth - d + 1
+                per_parent = max(1, round(((pages_per_space - created) / len(level)) ** (1 / remaining_levels)))
+                next_level = []
+                for parent in level:
+                    for _ in range(per_parent):
+                        if created >= pages_per_space:
+                            break
+                        title = f"{rng.choice(TITLE_TOPICS)} {space} {next_id}"
+                        page = Page(next_id, space, title, parent.id)
+                        next_id += 1
+                        parent.children.append(page.id)
+                        self._add(page)
+                        next_level.append(page)
+                        created += 1
+                level = next_level or level
+
+        for page in self.pages.values():
+            page.paragraphs = [
+                f"Fact {page.id}-{k}: " + " ".join(rng.choice(TITLE_TOPICS).lower() for _ in range(12))
+                for k in range(paragraphs)
+            ]
+            if rng.random() < attachment_ratio:
+                key = rng.choice(shared_keys) if rng.random() < shared_attachment_ratio else f"unique-{page.id}"
+                page.attachments.append((f"att{next_attachment}", f"{key}.pdf", key))
+                next_attachment += 1
+                if key not in self.attachment_blobs:
+                    self.attachment_blobs[key] = random.Random(key).randbytes(attachment_kb * 1024)
+
+    def _add(self, page):
+        self.pages[page.id] = page
+        self.by_title[(page.space, page.title.lower())] = page
+
+    def display_url(self, page):
+        if page.parent is None and page.space != "USM":
+            return f"/wiki/display/{page.space}"
+        return f"/wiki/display/{page.space}/{quote_plus(page.title)}"
+
+    def viewpage_url(self, page, src=None):
+        return f"/wiki/pages/viewpage.action?pageId={page.id}" + (f"&src={src}" if src else "")
+
+    def render(self, page):
+        sidebar = "".join(
+            f'<li><a href="{self.viewpage_url(self.pages[c], "contextnavpagetreemode")}">{self.pages[c].title}</a></li>'
+            for c in page.children
+        )
+        parent_link = ""
+        if page.parent is not None:
+            parent = self.pages[page.parent]
+            parent_link = f'<a href="{self.viewpage_url(parent, "breadcrumbs")}">{parent.title}</a>'
+        children = "".join(
+            f'<li><a href="{self.display_url(self.pages[c])}#content">{self.pages[c].title}</a></li>'
+            for c in page.children
+        )
+        body = "".join(f"<p>{p}</p>" for p in page.paragraphs)
+        return f"""<!DOCTYPE html>
+<html><head><title>{page.title} - {page.space} - Wiki</title>
+<meta name="ajs-page-id" content="{page.id}"><meta name="ajs-space-key" content="{page.space}">
+<script>window.{CHROME_MARKER.replace('-', '_')} = true;</script></head>
+<body>
+<div id="header"><a href="/wiki/dashboard.action">Dashboard {CHROME_MARKER}</a></div>
+<div class="ia-splitter-left"><div class="acs-side-bar">{CHROME_MARKER} Page tree<ul>{sidebar}</ul></div></div>
+<div id="breadcrumb-section">{parent_link} {CHROME_MARKER}</div>
+<div class="page-metadata">Created by someone {CHROME_MARKER}</div>
+<div id="main-content" class="wiki-content">
+<h1>{page.title}</h1>{body}
+<h2>Child pages</h2><ul>{children}</ul>
+</div>
+<div id="likes-and-labels-container">{CHROME_MARKER} Like</div>
+<div id="comments-section">{CHROME_MARKER} Great page!</div>
+<div id="footer">{CHROME_MARKER} Powered by Atlassian Confluence</div>
+</body></html>"""
+
+
+LOGIN_USERNAME_FORM = """<html><head><title>Log In - Wiki</title></head><body>
+<form id="loginform" method="post" action="/wiki/login.action">
+<input name="os_username"><input type="hidden" name="os_destination" value="{dest}">
+<button>Next</button></form></body></html>"""
+LOGIN_PASSWORD_FORM = """<html><head><title>Log In - Wiki</title></head><body>
+<form id="loginform" method="post" action="/wiki/login.action">
+<input type="hidden" name="os_username" value="{user}"><input type="password" name="os_password">
+<input type="hidden" name="os_destination" value="{dest}"><button>Log in</button></form></body></html>"""
+
+
+class FaultInjector:
+    def __init__(self, latency_ms=0, jitter_ms=0, failure_rate=0.0, rate_limit_rps=0, seed=7):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.rate_limit_rps = rate_limit_rps
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = float(rate_limit_rps)
+        self._refilled = time.monotonic()
+
+    def delay(self):
+        with self._lock:
+            jitter = self._rng.uniform(0, self.jitter_ms)
+        if self.latency_ms or jitter:
+            time.sleep((self.latency_ms + jitter) / 1000)
+
+    def fault(self):
+        """Return (status, retry_after) to inject, or None."""
+        with self._lock:
+            if self.rate_limit_rps:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit_rps, self._tokens + (now - self._refilled) * self.rate_limit_rps)
+                self._refilled = now
+                if self._tokens < 1:
+                    return 429, "1"
+                self._tokens -= 1
+            if self.failure_rate and self._rng.random() < self.failure_rate:
+                return 503, "1"
+        return None
+
+
+def make_handler(site, faults):
+    sessions = set()
+    stats = {"requests": 0, "page_hits": {}, "downloads": 0, "bytes_served": 0, "faults": 0}
+    stats_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+            with stats_lock:
+                stats["bytes_served"] += len(body)
+
+        def _authenticated(self):
+            for part in (self.headers.get("Cookie") or "").split(";"):
+                name, _, value = part.strip().partition("=")
+                if name == "JSESSIONID" and value in sessions:
+                    return True
+            return False
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+            path = parsed.path
+            if path == "/__stats":
+                with stats_lock:
+                    body = json.dumps(stats).encode()
+                return self._send(200, body, "application/json")
+            with stats_lock:
+                stats["requests"] += 1
+            faults.delay()
+            if path == "/wiki/login.action":
+                dest = query.get("os_destination", ["/wiki/display/AOMA"])[0]
+                return self._send(200, LOGIN_USERNAME_FORM.format(dest=dest).encode())
+            injected = faults.fault()
+            if injected:
+                with stats_lock:
+                    stats["faults"] += 1
+                return self._send(injected[0], b"busy", "text/plain", {"Retry-After": injected[1]})
+            if not self._authenticated():
+                if path.startswith("/wiki/rest/"):
+                    return self._send(401, b'{"message":"unauthorized"}', "application/json")
+                return self._send(302, headers={"Location": f"/wiki/login.action?os_destination={quote_plus(self.path)}"})
+
+            if path == "/wiki/rest/api/user/current":
+                return self._send(200, json.dumps({"type": "known", "username": USERNAME}).encode(), "application/json")
+            if path.startswith("/wiki/rest/api/content/") and path.endswith("/child/attachment"):
+                page = site.pages.get(int(path.split("/")[5]))
+                results = [{
+                    "id": att_id, "title": filename, "version": {"number": 1},
+                    "extensions": {"mediaType": "application/pdf", "fileSize": len(site.attachment_blobs[key])},
+                    "_links": {"download": f"/download/attachments/{page.id}/{filename}?version=1"},
+                } for att_id, filename, key in (page.attachments if page else [])]
+                return self._send(200, json.dumps({"results": results, "_links": {}}).encode(), "application/json")
+            if path.startswith("/wiki/download/attachments/"):
+                key = path.rsplit("/", 1)[1].rsplit(".", 1)[0]
+                blob = site.attachment_blobs.get(key)
+                if blob is None:
+                    return self._send(404, b"", "text/plain")
+                with stats_lock:
+                    stats["downloads"] += 1
+                range_header = self.headers.get("Range")
+                if range_header:
+                    start, _, end = range_header.split("=", 1)[1].partition("-")
+                    start = int(start)
+                    end = min(int(end), len(blob) - 1) if end else len(blob) - 1
+                    if start >= len(blob):
+                        return self._send(416, b"", "application/pdf")
+                    return self._send(206, blob[start:end + 1], "application/pdf",
+                                      {"Content-Range": f"bytes {start}-{end}/{len(blob)}"})
+                return self._send(200, blob, "application/pdf")
+
+            page = None
+            if path == "/wiki/pages/viewpage.action":
+                page = site.pages.get(int(query.get("pageId", ["0"])[0]))
+            elif path.startswith("/wiki/display/"):
+                parts = path[len("/wiki/display/"):].split("/", 1)
+                if len(parts) == 1 or not parts[1]:
+                    page = site.homes.get(parts[0].upper())
+                else:
+                    page = site.by_title.get((parts[0].upper(), unquote_plus(parts[1]).lower()))
+            if page is None:
+                return self._send(404, b"<html><title>Page Not Found</title></html>")
+            with stats_lock:
+                stats["page_hits"][str(page.id)] = stats["page_hits"].get(str(page.id), 0) + 1
+            return self._send(200, site.render(page).encode())
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+            if urlparse(self.path).path != "/wiki/login.action":
+                return self._send(404, b"")
+            dest = form.get("os_destination", "/wiki/display/AOMA")
+            if "os_password" not in form:
+                return self._send(200, LOGIN_PASSWORD_FORM.format(user=form.get("os_username", ""), dest=dest).encode())
+            if form.get("os_username") == USERNAME and form.get("os_password") == PASSWORD:
+                token = secrets.token_hex(16)
+                sessions.add(token)
+                return self._send(302, headers={"Location": dest, "Set-Cookie": f"JSESSIONID={token}; Path=/"})
+            return self._send(200, LOGIN_USERNAME_FORM.format(dest=dest).encode())
+
+    return Handler
+
+
+def serve(site, faults, port=0, ready=None):
+    """Serve forever; ``ready`` (a queue) receives the bound port."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(site, faults))
+    server.daemon_threads = True
+    if ready is not None:
+        ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def site_fingerprint(site):
+    """Hash of the generated content, recorded with benchmark results."""
+    digest = hashlib.sha256()
+    for page_id in sorted(site.pages):
+        digest.update("\n".join(site.pages[page_id].paragraphs).encode())
+    return digest.hexdigest()[:16]
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Serve a synthetic Confluence site")
+    parser.add_argument("--pages", type=int, default=100, help="pages per space")
+    parser.add_argument("--depth", type=int, default=4, help="page tree depth")
+    parser.add_argument("--attachment-ratio", type=float, default=0.3, help="share of pages with an attachment")
+    parser.add_argument("--attachment-kb", type=int, default=128)
+    parser.add_argument("--shared-attachment-ratio", type=float, default=0.5,
+                        help="share of attachments that are the same file attached to several pages")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--rate-limit-rps", type=float, default=0, help="answer 429 above this rate (0 = off)")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser
+
+
+def site_from_args(args):
+    site = SyntheticSite(args.pages, args.depth, args.attachment_ratio, args.attachment_kb,
+                         args.shared_attachment_ratio, seed=args.seed)
+    faults = FaultInjector(args.latency_ms, args.jitter_ms, args.failure_rate, args.rate_limit_rps)
+    return site, faults
+
+
+if __name__ == "__main__":
+    parser = build_arg_parser()
+    parser.add_argument("--port", type=int, default=8090)
+    args = parser.parse_args()
+    site, faults = site_from_args(args)
+    print(f"Serving {len(site.pages)} pages on http://127.0.0.1:{args.port}/wiki "
+          f"(login {USERNAME} / {PASSWORD})")
+    serve(site, faults, args.port)
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Offline Crawl Benchmark
+
+Starts the local Confluence stand-in (fake_confluence.py) in a subprocess,
+logs in through its two-step login form and checks the session with the same
+probe login.py uses. It then crawls every space with scrape_wiki.py's own
+loop (space_crawl.SpaceCrawl): frontier, politeness controller, HTTP
+pre-fetch + pruning, extraction cache, attachment harvester and telemetry.
+
+As in the scraper, each space has one sequential agent. A stub agent calls
+the same actions the browser agent does (next page, save, track, report a
+problem), and a stub page stands in for the browser tab, so the run needs no
+network, browser or LLM. --extract-ms adds a pause per page for the LLM turn.
+
+Reports pages/min, latency percentiles, peak memory and the correctness of
+the output tree (every page once, no Confluence chrome, attachments deduped),
+and writes the full result to benchmark/results/<timestamp>.json.
+
+    python3 benchmark/run_benchmark.py --pages 300 --latency-ms 30 --failure-rate 0.02
+"""
+
+import asyncio
+import glob
+import json
+import multiprocessing
+import os
+import pickle
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+import fake_confluence  # noqa: E402
+import session_cookies  # noqa: E402
+from attachments import AttachmentHarvester  # noqa: E402
+from frontier import Frontier  # noqa: E402
+from page_prep import CHROME_CLASSES, CHROME_IDS, LINKS_SCRIPT, PRUNE_SCRIPT, ExtractionCache, PreparedPage, fetch_page  # noqa: E402
+from politeness import PolitenessController  # noqa: E402
+from space_crawl import SpaceCrawl  # noqa: E402
+from telemetry import CrawlMetrics  # noqa: E402
+
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+# What the browser agent reports for a page that did not load (see "Report page problem")
+PROBLEMS = {429: "rate limited", 404: "not found"}
+
+
+def start_server(args):
+    ready = multiprocessing.Queue()
+    site, faults = fake_confluence.site_from_args(args)
+    process = multiprocessing.Process(target=fake_confluence.serve, args=(site, faults, 0, ready), daemon=True)
+    process.start()
+    return process, ready.get(timeout=30), site
+
+
+def login(base_url):
+    """Walk the username -> password form flow and return Playwright-style cookies."""
+
+    class KeepRedirect(urllib.request.HTTPRedirectHandler):
+        def redirect_request(self, req, fp, code, msg, headers, newurl):
+            return None
+
+    opener = urllib.request.build_opener(KeepRedirect)
+    form = {"os_username": fake_confluence.USERNAME, "os_destination": "/wiki/display/AOMA"}
+    opener.open(f"{base_url}/login.action", urllib.parse.urlencode(form).encode()).read()
+    form["os_password"] = fake_confluence.PASSWORD
+    try:
+        opener.open(f"{base_url}/login.action", urllib.parse.urlencode(form).encode())
+        raise RuntimeError("login did not redirect")
+    except urllib.error.HTTPError as e:
+        set_cookie = e.headers.get("Set-Cookie", "")
+    name, _, value = set_cookie.split(";", 1)[0].partition("=")
+    host = urllib.parse.urlparse(base_url).hostname
+    return [{"name": name, "value": value, "domain": host, "path": "/", "expires": -1, "secure": False}]
+
+
+def save_session(cookies, base_url, work_dir):
+    """Pickle the cookies as login.py does, then load and check them the way login.py and scrape_wiki.py do."""
+    cookies_file = os.path.join(work_dir, "wiki_cookies.pkl")
+    with open(cookies_file, "wb") as f:
+        pickle.dump(cookies, f)
+    cookies = session_cookies.load_cookies(cookies_file)
+    verdict, detail = session_cookies.probe(cookies, f"{base_url}/rest/api/user/current")
+    if verdict != session_cookies.VALID:
+        raise RuntimeError(f"login failed: {verdict} ({detail})")
+    return cookies
+
+
+def server_stats_now(base_url):
+    with urllib.request.urlopen(base_url.replace("/wiki", "") + "/__stats") as response:
+        return json.load(response)
+
+
+def extract_markdown(prepared):
+    """Stand-in for the browser agent: the pruned text as a Markdown page."""
+    return f"# {prepared.title.split(' - ')[0]}\n\n{prepared.text}\n"
+
+
+def slugify(title):
+    return re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-") + ".md"
+
+
+def chrome_elements(html):
+    """What PRUNE_SCRIPT removes: elements with a Confluence chrome id or class."""
+    return sum(1 for attr, value in re.findall(r'\b(id|class)="([^"]*)"', html)
+               if (value in CHROME_IDS if attr == "id" else set(value.split()) & CHROME_CLASSES))
+
+
+class StubPage:
+    """The parts of a Playwright page SpaceCrawl uses, loading pages with fetch_page."""
+
+    def __init__(self, cookies):
+        self.cookies = cookies
+        self.url = None
+        self.status = None
+        self.html = ""
+        self.prepared = None
+
+    async def goto(self, url, wait_until=None):
+        # Like the browser, this raises only on transport errors; a 503 is a page showing an error
+        self.status, self.html, _ = await asyncio.to_thread(fetch_page, url, self.cookies)
+        self.url, self.prepared = url, None
+
+    async def wait_for_load_state(self):
+        pass
+
+    async def evaluate(self, script):
+        if script == LINKS_SCRIPT:
+            return PreparedPage(self.url, self.html).links
+        if script == PRUNE_SCRIPT:
+            self.prepared = await asyncio.to_thread(PreparedPage, self.url, self.html)
+            return chrome_elements(self.html)
+        raise ValueError("unknown script")
+
+
+async def stub_agent(crawl, page, extract_delay):
+    """Work through a space with the scraper's actions, in the order the agent's prompt gives."""
+    while True:
+        if (await crawl.next_page(page)).startswith("DONE"):
+            return
+        if page.status != 200:
+            # A 3xx here went to SSO: the browser would be showing the login page
+            problem = "login page" if 300 <= page.status < 400 else PROBLEMS.get(page.status, "server error")
+            await crawl.report_problem(page.url, problem)
+            continue
+        if extract_delay:
+            await asyncio.sleep(extract_delay)
+        title = page.prepared.title.split(" - ")[0]
+        filename = slugify(title)
+        crawl.save_content(filename, extract_markdown(page.prepared))
+        await crawl.track(page.url, title, filename, page.prepared.page_id or "")
+
+
+async def crawl_space(space, start_url, base_host, cookies, work_dir, politeness, cache, harvester, metrics,
+                      extract_delay):
+    frontier = Frontier(space, os.path.join(work_dir, "crawl_state"), base_host=base_host)
+    frontier.add(start_url, title=f"{space} Home")
+    crawl = SpaceCrawl(space, os.path.join(work_dir, "scraped_content", space), frontier, politeness, metrics,
+                       log=lambda message: None, cookies=cookies, extraction_cache=cache, harvester=harvester,
+                       status_file=os.path.join(work_dir, "scraping_status.json"))
+    try:
+        await stub_agent(crawl, StubPage(cookies), extract_delay)
+    finally:
+        await crawl.finish_current_page()
+        frontier.save()
+    metrics.space(space).queue_depth = len(frontier)
+    return frontier.stats()
+
+
+def check_output(site, output_dir, server_stats, attachments):
+    """Compare the output tree and the stored attachments with the generated site."""
+    missing, chrome_leaks, wrong_content = [], [], []
+    files = {}
+    for space in os.listdir(output_dir):
+        for name in os.listdir(os.path.join(output_dir, space)):
+            with open(os.path.join(output_dir, space, name), encoding="utf-8") as f:
+                files[(space, name)] = f.read()
+    for page in site.pages.values():
+        text = files.get((page.space, slugify(page.title)))
+        if text is None:
+            missing.append(page.id)
+            continue
+        if fake_confluence.CHROME_MARKER in text:
+            chrome_leaks.append(page.id)
+        if not all(p in text for p in page.paragraphs):
+            wrong_content.append(page.id)
+    hits = server_stats["page_hits"]
+    # A page the agent extracts is fetched twice, by the HTTP pre-fetch and by the browser
+    duplicate_fetches = sum(n - 2 for n in hits.values() if n > 2)
+    return {
+        "expected_pages": len(site.pages),
+        "output_files": len(files),
+        "missing_pages": len(missing),
+        "chrome_leaks": len(chrome_leaks),
+        "wrong_content": len(wrong_content),
+        "duplicate_fetches": duplicate_fetches,
+        "unique_attachment_contents": len(site.attachment_blobs),
+        "unique_blobs": attachments["unique_blobs"],
+        "ok": not (missing or chrome_leaks or wrong_content)
+              and attachments["unique_blobs"] == len(site.attachment_blobs),
+    }
+
+
+async def run(args, base_url, site, work_dir):
+    output_dir = os.path.join(work_dir, "scraped_content")
+    state_dir = os.path.join(work_dir, "crawl_state")
+    cookies = save_session(login(base_url), base_url, work_dir)
+    politeness = PolitenessController(maximum=args.max_host_concurrency)
+    cache = ExtractionCache(os.path.join(state_dir, "extraction_cache"))
+    harvester = AttachmentHarvester(cookies, os.path.join(output_dir, "attachments"), base_url, politeness)
+    metrics = CrawlMetrics(os.path.join(work_dir, "crawl_metrics.json"))
+    base_host = urllib.parse.urlparse(base_url).hostname
+
+    before = server_stats_now(base_url)
+    started = time.monotonic()
+    frontiers = {}
+    for space, home_id, home_title in fake_confluence.SPACES:
+        home = site.homes[space]
+        start = f"{base_url}/pages/viewpage.action?pageId={home.id}" if home_id else f"{base_url}/display/{space}"
+        frontiers[space] = crawl_space(space, start, base_host, cookies, work_dir, politeness, cache, harvester,
+                                       metrics, args.extract_ms / 1000)
+    frontier_stats = dict(zip(frontiers, await asyncio.gather(*frontiers.values())))
+    attachments = await harvester.drain()
+    elapsed = time.monotonic() - started
+
+    server_stats = server_stats_now(base_url)
+    # The server lives across repeats; only count this run's page fetches
+    server_stats["page_hits"] = {page: n - before["page_hits"].get(page, 0)
+                                 for page, n in server_stats["page_hits"].items()}
+    shutil.rmtree(os.path.join(output_dir, "attachments"), ignore_errors=True)
+    snapshot = metrics.snapshot()
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "pages": snapshot["pages"],
+        "pages_per_min": round(snapshot["pages"] / elapsed * 60, 1),
+        "cache_hits": cache.hits,
+        "frontier": frontier_stats,
+        "spaces": snapshot["spaces"],
+        "politeness": politeness.snapshot(),
+        "attachments": attachments,
+        "server": {k: v for k, v in server_stats.items() if k != "page_hits"},
+        "correctness": check_output(site, output_dir, server_stats, attachments),
+    }
+
+
+def main():
+    parser = fake_confluence.build_arg_parser()
+    parser.description = "Benchmark the Confluence crawler against a local stand-in"
+    parser.add_argument("--extract-ms", type=float, default=0, help="pause per extracted page, for the LLM turn")
+    parser.add_argument("--max-host-concurrency", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="re-crawl with the same state to measure the extraction cache")
+    parser.add_argument("--keep", action="store_true", help="keep the working directory")
+    args = parser.parse_args()
+
+    server, port, site = start_server(args)
+    base_url = f"http://127.0.0.1:{port}/wiki"
+    work_dir = tempfile.mkdtemp(prefix="confluence-bench-")
+    runs = []
+    try:
+        for i in range(args.repeat):
+            # Each repeat starts from a fresh frontier and output tree but keeps the extraction cache
+            shutil.rmtree(os.path.join(work_dir, "scraped_content"), ignore_errors=True)
+            for path in glob.glob(os.path.join(work_dir, "crawl_state", "frontier_*")):
+                os.remove(path)
+            result = asyncio.run(run(args, base_url, site, work_dir))
+            runs.append(result)
+            c = result["correctness"]
+            print(f"run {i + 1}: {result['pages']} pages in {result['elapsed_s']}s "
+                  f"({result['pages_per_min']} pages/min), cache hits {result['cache_hits']}, "
+                  f"missing {c['missing_pages']}, chrome leaks {c['chrome_leaks']}, "
+                  f"duplicate fetches {c['duplicate_fetches']}, attachments "
+                  f"{result['attachments']['unique_blobs']}/{c['unique_attachment_contents']} unique")
+    finally:
+        server.terminate()
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "run_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "site": {"pages": len(site.pages), "fingerprint": fake_confluence.site_fingerprint(site)},
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "runs": runs,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"crawl-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"peak RSS {report['peak_rss_mb']} MB - results in {path}")
+    return 0 if all(r["correctness"]["ok"] for r in runs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Confluence Crawl Frontier
+
+Priority queue of pages still to scrape, with Confluence-aware URL
+canonicalization so `viewpage.action?pageId=`, `/display/SPACE/Title` and
+`/spaces/SPACE/pages/<id>/...` aliases of the same page are only visited once.
+
+The seen-set stores 64-bit hashes of canonical keys in a sorted array
+(8 bytes per URL), so it stays small for hundreds of thousands of URLs.
+Frontier state is persisted to disk so an interrupted crawl can resume. Each
+save rewrites the whole state, so the crawl loop calls `Frontier.checkpoint`,
+which saves at most every SAVE_INTERVAL seconds, and `save` once at exit.
+"""
+
+import array
+import bisect
+import hashlib
+import heapq
+import json
+import os
+import re
+import time
+from urllib.parse import parse_qs, unquote_plus, urlencode, urlparse, urlunparse
+
+# Page types the scraper prompt lists under PRIORITY AREAS, highest first
+PRIORITY_PATTERNS = [
+    (re.compile(r"getting[\s+_-]*started|overview|introduction|home\b", re.I), 100),
+    (re.compile(r"architecture|design", re.I), 90),
+    (re.compile(r"\bapi\b|rest|endpoint|integration", re.I), 85),
+    (re.compile(r"user[\s+_-]*guide|how[\s+_-]*to|tutorial|manual", re.I), 80),
+    (re.compile(r"config(uration)?|setup|install", re.I), 75),
+    (re.compile(r"spec(ification)?s?\b|technical", re.I), 70),
+    (re.compile(r"release[\s+_-]*notes?|changelog", re.I), 65),
+    (re.compile(r"faq|troubleshoot|known[\s+_-]*issues", re.I), 60),
+]
+DEFAULT_PRIORITY = 10
+DEPTH_PENALTY = 2
+
+# Confluence actions that are never knowledge content
+SKIPPED_ACTIONS = (
+    "editpage.action", "pageinfo.action", "diffpages.action", "viewpreviouspageversions.action",
+    "viewpagesrc.action", "copypage.action", "removepage.action", "exportword",
+    "login.action", "logout.action", "dashboard.action", "listpages-dirview.action",
+)
+# Query parameters that never change which page is shown
+DROPPED_PARAMS = {"src", "focusedcommentid", "showcomments", "showchildren", "preview", "atl_token"}
+
+STATE_VERSION = 1
+SAVE_INTERVAL = 10.0  # seconds between checkpoints; a crash re-visits at most this much work
+
+
+def canonicalize_url(url, base_host=None):
+    """
+    Normalise a Confluence URL into a stable form, or return None for non-page URLs.
+
+    Scheme and host are lower-cased, fragments and noise parameters are dropped
+    and `+`/`%20` in display titles are unified.
+    """
+    parsed = urlparse(url.strip())
+    if parsed.scheme not in ("http", "https"):
+        return None
+    host = (parsed.hostname or "").lower()
+    if base_host and host != base_host.lower():
+        return None
+    netloc = host if parsed.port in (None, 80, 443) else f"{host}:{parsed.port}"
+    path = re.sub(r"/{2,}", "/", parsed.path or "/")
+    if any(path.lower().endswith(action) for action in SKIPPED_ACTIONS) or "/download/" in path:
+        return None
+
+    params = {
+        k: v[0] for k, v in parse_qs(parsed.query).items()
+        if k.lower() not in DROPPED_PARAMS
+    }
+    if path.startswith("/wiki/display/") or path.startswith("/display/"):
+        prefix, _, rest = path.partition("/display/")
+        parts = [unquote_plus(p) for p in rest.split("/") if p]
+        path = prefix + "/display/" + "/".join(p.replace(" ", "+") for p in parts)
+    else:
+        path = path.rstrip("/") or "/"
+    query = urlencode(sorted(params.items()))
+    return urlunparse((parsed.scheme, netloc, path, "", query, ""))
+
+
+def page_key(url):
+    """
+    Identity of the page behind a canonical URL.
+
+    pageId-based URLs map to ``page:<id>``; display URLs map to
+    ``title:<SPACE>:<title>`` until `Frontier.mark_visited` links the two.
+    """
+    parsed = urlparse(url)
+    page_id = parse_qs(parsed.query).get("pageId")
+    if page_id:
+        return f"page:{page_id[0]}"
+    match = re.search(r"/spaces/([^/]+)/pages/(\d+)", parsed.path)
+    if match:
+        return f"page:{match.group(2)}"
+    match = re.search(r"/display/([^/]+)(?:/(.+))?$", parsed.path)
+    if match:
+        space, title = match.group(1), match.group(2)
+        if not title:
+            return f"space:{space.upper()}"
+        return f"title:{space.upper()}:{unquote_plus(title).lower()}"
+    return f"url:{url}"
+
+
+def priority_for(url, title="", depth=0):
+    """Score a link by the PRIORITY AREAS page types; shallower pages win ties."""
+    text = f"{title} {unquote_plus(urlparse(url).path)}"
+    score = DEFAULT_PRIORITY
+    for pattern, weight in PRIORITY_PATTERNS:
+        if pattern.search(text):
+            score = max(score, weight)
+    return score - depth * DEPTH_PENALTY
+
+
+def _hash64(key):
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class SeenSet:
+    """Compact set of 64-bit key hashes: a sorted array plus a small unsorted buffer."""
+
+    MERGE_THRESHOLD = 4096
+
+    def __init__(self):
+        self._sorted = array.array("Q")
+        self._buffer = set()
+
+    def __len__(self):
+        return len(self._sorted) + len(self._buffer)
+
+    def __contains__(self, key):
+        h = _hash64(key)
+        if h in self._buffer:
+            return True
+        i = bisect.bisect_left(self._sorted, h)
+        return i < len(self._sorted) and self._sorted[i] == h
+
+    def add(self, key):
+        if key in self:
+            return False
+        self._buffer.add(_hash64(key))
+        if len(self._buffer) >= max(self.MERGE_THRESHOLD, len(self._sorted) // 8):
+            self._merge()
+        return True
+
+    def _merge(self):
+        if self._buffer:
+            # Two sorted runs: timsort merges them in linear time
+            self._sorted = array.array("Q", sorted(self._sorted + array.array("Q", sorted(self._buffer))))
+            self._buffer.clear()
+
+    def to_bytes(self):
+        self._merge()
+        return self._sorted.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        seen = cls()
+        seen._sorted.frombytes(data)
+        return seen
+
+
+class Frontier:
+    """Priority-ordered, de-duplicated queue of Confluence pages for one space."""
+
+    def __init__(self, space_name, state_dir, base_host=None):
+        self.space_name = space_name
+        self.base_host = base_host
+        self.state_path = os.path.join(state_dir, f"frontier_{space_name}.json")
+        self.seen_path = os.path.join(state_dir, f"frontier_{space_name}.seen")
+        self._heap = []
+        self._queued = set()  # canonical URLs currently in the heap
+        self._in_flight = {}  # canonical URL -> (title, depth, keys) of popped, unfinished pages
+        self._claimed = set()  # keys of in-flight pages, so a concurrent alias isn't fetched twice
+        self._seq = 0
+        self.seen = SeenSet()
+        self.duplicates_skipped = 0
+        self._dirty = False
+        self._saved_at = 0.0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add(self, url, title="", depth=0):
+        """Queue a link if it is a Confluence page not yet seen. Returns True if queued."""
+        canonical = canonicalize_url(url, self.base_host)
+        if canonical is None:
+            return False
+        key = page_key(canonical)
+        if key in self.seen or canonical in self._queued:
+            self.duplicates_skipped += 1
+            return False
+        self._seq += 1
+        heapq.heappush(self._heap, (-priority_for(canonical, title, depth), self._seq, canonical, title, depth))
+        self._queued.add(canonical)
+        self._dirty = True
+        return True
+
+    def _keys(self, url, title):
+        keys = {page_key(url)}
+        if title and next(iter(keys)).startswith("page:"):
+            # Link text of a pageId link is the page title, i.e. its /display/ alias
+            keys.add(f"title:{self.space_name.upper()}:{title.lower()}")
+        return keys
+
+    def pop(self):
+        """
+        Return ``(url, title, depth)`` of the best unvisited page, or None when done.
+
+        The page stays in flight until `mark_visited` or `release` is called.
+        """
+        while self._heap:
+            _, _, url, title, depth = heapq.heappop(self._heap)
+            self._queued.discard(url)
+            self._dirty = True
+            keys = self._keys(url, title)
+            if any(key in self.seen or key in self._claimed for key in keys):
+                self.duplicates_skipped += 1
+                continue
+            self._in_flight[url] = (title, depth, keys)
+            self._claimed.update(keys)
+            return url, title, depth
+        return None
+
+    def release(self, url):
+        """
+        Give up on an in-flight page (e.g. a failed fetch) so it or an alias can be queued again.
+
+        Returns the page's ``(title, depth)``, or None if it was not in flight.
+        """
+        entry = self._in_flight.pop(canonicalize_url(url, self.base_host) or url, None)
+        if entry:
+            self._claimed.difference_update(entry[2])
+            self._dirty = True
+            return entry[0], entry[1]
+        return None
+
+    @property
+    def in_flight(self):
+        return len(self._in_flight)
+
+    def mark_visited(self, url, page_id=None, title=None):
+        """
+        Record a scraped page under every key it is known by.
+
+        Passing the page id (and display title) resolved from the loaded page
+        links `/display/SPACE/Title` and `viewpage.action?pageId=` aliases.
+        """
+        canonical = canonicalize_url(url) or url
+        self.release(canonical)
+        self._dirty = True
+        self.seen.add(page_key(canonical))
+        if page_id:
+            self.seen.add(f"page:{page_id}")
+        if title:
+            self.seen.add(f"title:{self.space_name.upper()}:{title.lower()}")
+
+    def checkpoint(self):
+        """Save if anything changed and the last save is more than SAVE_INTERVAL seconds old."""
+        if self._dirty and time.monotonic() - self._saved_at >= SAVE_INTERVAL:
+            self.save()
+
+    def save(self):
+        """Atomically persist queue and seen-set."""
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        state = {
+            "version": STATE_VERSION,
+            "space": self.space_name,
+            "seq": self._seq,
+            "duplicates_skipped": self.duplicates_skipped,
+            "queue": [list(entry) for entry in self._heap],
+            # Pages popped but not finished are re-queued on resume
+            "in_flight": [[url, title, depth] for url, (title, depth, _) in self._in_flight.items()],
+        }
+        for path, data, mode in (
+            (self.seen_path, self.seen.to_bytes(), "wb"),
+            (self.state_path, json.dumps(state), "w"),
+        ):
+            tmp = path + ".tmp"
+            with open(tmp, mode) as f:
+                f.write(data)
+            os.replace(tmp, path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def load(self):
+        """Restore persisted state if present. Returns True if state was loaded."""
+        if not os.path.exists(self.state_path):
+            return False
+        with open(self.state_path, "r") as f:
+            state = json.load(f)
+        if state.get("version") != STATE_VERSION:
+            return False
+        self._seq = state.get("seq", 0)
+        self.duplicates_skipped = state.get("duplicates_skipped", 0)
+        self._heap = [tuple(entry) for entry in state.get("queue", [])]
+        heapq.heapify(self._heap)
+        self._queued = {entry[2] for entry in self._heap}
+        if os.path.exists(self.seen_path):
+            with open(self.seen_path, "rb") as f:
+                self.seen = SeenSet.from_bytes(f.read())
+        for url, title, depth in state.get("in_flight", []):
+            self.add(url, title, depth)
+        return True
+
+    def stats(self):
+        return {
+            "queued": len(self._heap),
+            "in_flight": len(self._in_flight),
+            "seen": len(self.seen),
+            "duplicates_skipped": self.duplicates_skipped,
+        }
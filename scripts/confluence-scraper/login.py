@@ -15,11 +15,13 @@ import pickle
 import datetime
 import time
 
+import session_cookies
+
 # Load environment variables
 load_dotenv()
 
 # Configuration
-WIKI_URL = "https://wiki.smedigitalapps.com/wiki/display/USM/Unified+Session+Manager+Home"
+WIKI_URL = f"{session_cookies.WIKI_BASE_URL}/display/USM/Unified+Session+Manager+Home"
 COOKIES_FILE = "wiki_cookies.pkl"
 SCREENSHOTS_DIR = "screenshots"
 
@@ -39,48 +41,25 @@ async def check_existing_cookies():
         return False
         
     try:
-        # Create a temporary browser to test cookies
-        tmp_browser = Browser(
-            config=BrowserConfig(
-                headless=True  # Use headless mode for faster checking
-            )
-        )
-        
         log_with_timestamp("Testing existing cookies for validity...")
         
-        # Load cookies
-        with open(COOKIES_FILE, 'rb') as f:
-            cookies = pickle.load(f)
-        
-        # Apply cookies to browser
-        context = await tmp_browser.context
-        await context.add_cookies(cookies)
-        
-        # Create a simple agent to check login status
-        check_agent = Agent(
-            task=f"""
-            Navigate to {WIKI_URL} and tell me if you're logged in by checking 
-            for login forms vs. confluence content elements.
-            - If you see a login form, say "Not logged in"
-            - If you see wiki content, say "Logged in"
-            - If you're unsure, say "Status unclear"
-            """,
-            llm=ChatOpenAI(model="gpt-4o", temperature=0),
-            browser=tmp_browser
+        # One plain HTTP request with the saved cookies; the verdict is cached
+        # until the cookies expire so repeat runs skip the request entirely
+        started = time.monotonic()
+        verdict, detail, from_cache = await asyncio.to_thread(
+            session_cookies.check_cookies, COOKIES_FILE
         )
+        elapsed_ms = (time.monotonic() - started) * 1000
+        source = "cached verdict" if from_cache else f"probe {elapsed_ms:.0f}ms"
         
-        # Run the check
-        check_result = await check_agent.run()
-        check_result = str(check_result)
-        
-        # Close the temporary browser
-        await tmp_browser.close()
-        
-        if "Logged in" in check_result:
-            log_with_timestamp("Existing cookies are valid - already logged in")
+        if verdict == session_cookies.VALID:
+            log_with_timestamp(f"Existing cookies are valid - already logged in ({detail}, {source})")
             return True
+        elif verdict == session_cookies.EXPIRED:
+            log_with_timestamp(f"Existing cookies are invalid or expired ({detail}, {source})")
+            return False
         else:
-            log_with_timestamp("Existing cookies are invalid or expired")
+            log_with_timestamp(f"Could not determine cookie validity ({detail}) - logging in again")
             return False
             
     except Exception as e:
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Confluence Page Pre-processing and Extraction Cache
+
+Strips Confluence chrome (header, sidebar, breadcrumbs, toolbars, comments,
+likes/labels, footer) before the LLM sees a page, and caches the agent's
+Markdown keyed by the sha256 of the page id and its pruned content.
+
+Pages are first fetched over plain HTTP with the login cookies. When the
+page's key is already in the cache the Markdown is written straight
+from the cache, so unchanged pages cost no LLM calls at all. Only cache
+misses are handed to the browser agent. The scraper opens each of those pages
+itself and runs `PRUNE_SCRIPT` on the live DOM before the agent's first look.
+"""
+
+import hashlib
+import json
+import os
+import re
+import urllib.error
+import urllib.request
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import session_cookies
+
+FETCH_TIMEOUT = 30  # seconds
+MAX_REDIRECTS = 5  # ordinary (non-SSO) redirects followed per page
+CHARS_PER_TOKEN = 4  # rough estimate for English prose with the gpt-4o tokenizer
+
+# Element ids / classes that are Confluence UI rather than page knowledge
+CHROME_IDS = {
+    "header", "navigation", "breadcrumb-section", "breadcrumbs", "page-metadata-banner",
+    "likes-and-labels-container", "comments-section", "footer", "sidebar", "splitter-sidebar",
+    "action-menu-link", "page-metadata-links", "navigation-next", "children-section",
+    "com-atlassian-confluence", "quick-search", "app-switcher", "editor-precursor",
+}
+CHROME_CLASSES = {
+    "ia-splitter-left", "aui-header", "aui-toolbar2", "page-metadata", "comment-threads",
+    "acs-side-bar", "space-tools-section", "ajs-menu-bar", "aui-nav", "footer-body",
+    "page-restrictions", "labels-section-content", "like-button-container", "aui-buttons",
+}
+SKIPPED_TAGS = {"script", "style", "noscript", "svg", "template", "button", "form", "input"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+MAIN_CONTENT_ID = "main-content"
+
+# Same pruning for the live page, run as soon as the scraper has opened it for the agent
+PRUNE_SCRIPT = """
+(() => {
+  const ids = %s;
+  const classes = %s;
+  let removed = 0;
+  for (const id of ids) {
+    const el = document.getElementById(id);
+    if (el) { el.remove(); removed++; }
+  }
+  for (const cls of classes) {
+    document.querySelectorAll('.' + cls).forEach(el => { el.remove(); removed++; });
+  }
+  document.querySelectorAll('script, style, noscript, svg, template').forEach(el => el.remove());
+  return removed;
+})()
+""" % (json.dumps(sorted(CHROME_IDS)), json.dumps(sorted(CHROME_CLASSES)))
+
+# (absolute url, link text) pairs of the live page, read before PRUNE_SCRIPT removes the sidebar
+LINKS_SCRIPT = """
+Array.from(document.querySelectorAll('a[href]'), a => [a.href, a.textContent.replace(/\\s+/g, ' ').trim()])
+"""
+
+
+class _ConfluencePruner(HTMLParser):
+    """Single pass over the page: collects links, page id/title and the de-chromed text."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self.page_id = None
+        self.title = ""
+        self.raw_chars = 0
+        self._stack = []        # (tag, skipping, in_main) per open element
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._in_title = False
+        self._anchor = None     # [href, text parts] of the <a> being read
+        self._parts = []
+        self._main_parts = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "a" and attrs.get("href"):
+            self._anchor = [attrs["href"], []]
+        if tag == "meta" and attrs.get("name") == "ajs-page-id":
+            self.page_id = attrs.get("content") or None
+        if tag == "title":
+            self._in_title = True
+        if tag in VOID_TAGS:
+            return
+        classes = set((attrs.get("class") or "").split())
+        skipping = tag in SKIPPED_TAGS or attrs.get("id") in CHROME_IDS or bool(classes & CHROME_CLASSES)
+        in_main = attrs.get("id") == MAIN_CONTENT_ID
+        self._stack.append((tag, skipping, in_main))
+        self._skip_depth += skipping
+        self._main_depth += in_main
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        if tag == "a" and self._anchor:
+            self.links.append((self._anchor[0], " ".join("".join(self._anchor[1]).split())))
+            self._anchor = None
+        # Tolerate unclosed tags: pop until the matching element
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                for _, skipping, in_main in self._stack[i:]:
+                    self._skip_depth -= skipping
+                    self._main_depth -= in_main
+                del self._stack[i:]
+                break
+
+    def handle_data(self, data):
+        self.raw_chars += len(data)
+        if self._in_title:
+            self.title += data
+        if self._anchor:
+            self._anchor[1].append(data)
+        if self._skip_depth:
+            return
+        text = data.strip()
+        if text:
+            self._parts.append(text)
+            if self._main_depth:
+                self._main_parts.append(text)
+
+    def pruned_text(self):
+        # Prefer Confluence's content container; fall back to everything that isn't chrome
+        return re.sub(r"\s+", " ", " ".join(self._main_parts or self._parts)).strip()
+
+
+class PreparedPage:
+    """A page fetched over HTTP, with its pruned text and content hash."""
+
+    def __init__(self, url, html):
+        pruner = _ConfluencePruner()
+        pruner.feed(html)
+        pruner.close()
+        self.url = url
+        self.title = re.sub(r"\s+", " ", pruner.title).strip()
+        self.page_id = pruner.page_id
+        # (absolute url, link text) pairs, sidebar and breadcrumbs included
+        self.links = [(urljoin(url, href), text) for href, text in pruner.links]
+        self.text = pruner.pruned_text()
+        self.content_sha256 = hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+        # Extraction cache key: the same body on two pages (templates, stubs, "page moved")
+        # must not share an entry, or the second page would get the first one's file
+        identity = self.page_id or url
+        self.cache_key = hashlib.sha256(f"{identity}\n{self.text}".encode("utf-8")).hexdigest()
+        self.raw_tokens = estimate_tokens(html)
+        self.pruned_tokens = estimate_tokens(self.text)
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN
+
+
+def fetch_page(url, cookies, timeout=FETCH_TIMEOUT, max_redirects=MAX_REDIRECTS):
+    """
+    Blocking GET of a wiki page with the login cookies.
+
+    Returns ``(status, html, headers)``; the headers carry Retry-After on a
+    429/503. Ordinary redirects (space start pages under /display/, renamed
+    pages, trailing slashes) are followed; only a redirect to SSO/login comes
+    back, as its 3xx status, so any 3xx returned here is an SSO challenge.
+    Raises URLError (an OSError) on a redirect loop.
+    """
+    opener = urllib.request.build_opener(session_cookies.NoRedirectHandler)
+    for _ in range(max_redirects + 1):
+        request = urllib.request.Request(url, headers={
+            "Cookie": session_cookies.cookie_header(session_cookies.cookies_for_url(cookies, url)),
+            "Accept": "text/html",
+        })
+        try:
+            with opener.open(request, timeout=timeout) as response:
+                return response.status, response.read().decode("utf-8", errors="replace"), response.headers
+        except urllib.error.HTTPError as e:
+            location = e.headers.get("Location") if 300 <= e.code < 400 else None
+            if not location:
+                return e.code, "", e.headers
+            location = urljoin(url, location)
+            if session_cookies.classify_response(e.code, location) == session_cookies.EXPIRED:
+                return e.code, "", e.headers
+            url = location
+    raise urllib.error.URLError(f"more than {max_redirects} redirects")
+
+
+class ExtractionCache:
+    """Markdown produced by the agent, stored by sha256 of the page id and its pruned content."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.index = {}
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f:
+                self.index = json.load(f)
+
+    def _path(self, cache_key):
+        return os.path.join(self.cache_dir, cache_key[:2], cache_key + ".md")
+
+    def get(self, cache_key):
+        """Return ``(filename, markdown)`` for a page's cached content, or None."""
+        entry = self.index.get(cache_key)
+        if entry and os.path.exists(self._path(cache_key)):
+            with open(self._path(cache_key), "r", encoding="utf-8") as f:
+                self.hits += 1
+                return entry["filename"], f.read()
+        self.misses += 1
+        return None
+
+    def put(self, cache_key, filename, markdown, url=""):
+        path = self._path(cache_key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(markdown)
+        self.index[cache_key] = {"filename": filename, "url": url, "chars": len(markdown)}
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_path)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Adaptive Politeness Controller
+
+AIMD (additive-increase / multiplicative-decrease) concurrency control per
+wiki host, replacing fixed sleeps between requests.
+
+- Every healthy window of completions raises the host's concurrency limit by one.
+- 429 / 5xx responses, SSO challenges or latency rising well above the
+  observed baseline halve the limit and start a cooldown.
+- Retry-After is honoured, both as seconds and as an HTTP date.
+
+`snapshot()` exposes the current limit, request rate and queue depth per host.
+"""
+
+import asyncio
+import collections
+import email.utils
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+DEFAULT_INITIAL_LIMIT = 1
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 8
+DECREASE_FACTOR = 0.5
+LATENCY_RISE_FACTOR = 2.0     # latency EWMA this far above baseline counts as congestion
+LATENCY_EWMA_ALPHA = 0.2
+ERROR_WINDOW = 20             # outcomes considered for the error rate
+MAX_ERROR_RATE = 0.2
+BASE_COOLDOWN = 5.0           # seconds, doubled on consecutive back-offs
+MAX_COOLDOWN = 300.0
+SSO_COOLDOWN = 60.0           # an SSO challenge usually means we are one step from a CAPTCHA
+RATE_WINDOW = 60.0            # seconds used for the completions-per-minute figure
+
+
+def parse_retry_after(value, now=None):
+    """Return the Retry-After delay in seconds (numeric or HTTP-date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, when.timestamp() - now)
+
+
+def is_backoff_status(status):
+    return status == 429 or (status is not None and 500 <= status < 600)
+
+
+class Outcome:
+    """Result of one request, filled in by the caller inside `PolitenessController.request`."""
+
+    __slots__ = ("status", "sso_challenge", "retry_after", "ok")
+
+    def __init__(self):
+        self.status = None
+        self.sso_challenge = False
+        self.retry_after = None
+        self.ok = True
+
+
+class HostLimiter:
+    """AIMD concurrency limit and cooldown state for a single host."""
+
+    def __init__(self, host, initial=DEFAULT_INITIAL_LIMIT, minimum=DEFAULT_MIN_LIMIT, maximum=DEFAULT_MAX_LIMIT):
+        self.host = host
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self.waiting = 0
+        self.cooldown_until = 0.0
+        self.backoffs = 0
+        self.consecutive_backoffs = 0
+        self.successes_since_increase = 0
+        self.latency_ewma = None
+        self.latency_baseline = None
+        self.outcomes = collections.deque(maxlen=ERROR_WINDOW)
+        self.completions = collections.deque()
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            self.waiting += 1
+            try:
+                while True:
+                    delay = self.cooldown_until - time.monotonic()
+                    if delay > 0:
+                        # Wake early if a release changes the picture, then re-check
+                        try:
+                            await asyncio.wait_for(self._cond.wait(), timeout=delay)
+                        except asyncio.TimeoutError:
+                            pass
+                        continue
+                    if self.in_flight < int(self.limit):
+                        break
+                    await self._cond.wait()
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+
+    async def release(self, latency, outcome):
+        async with self._cond:
+            self.in_flight -= 1
+            self._record(latency, outcome)
+            self._cond.notify_all()
+
+    def _record(self, latency, outcome):
+        now = time.monotonic()
+        self.completions.append(now)
+        while self.completions and now - self.completions[0] > RATE_WINDOW:
+            self.completions.popleft()
+
+        error = not outcome.ok or outcome.sso_challenge or is_backoff_status(outcome.status)
+        self.outcomes.append(error)
+
+        congested = False
+        if latency is not None and not error:
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma += LATENCY_EWMA_ALPHA * (latency - self.latency_ewma)
+            if self.latency_baseline is None or self.latency_ewma < self.latency_baseline:
+                self.latency_baseline = self.latency_ewma
+            else:
+                # Let the baseline drift up slowly so one lucky request doesn't pin it forever
+                self.latency_baseline += 0.01 * (self.latency_ewma - self.latency_baseline)
+            congested = self.latency_ewma > self.latency_baseline * LATENCY_RISE_FACTOR
+
+        error_rate = sum(self.outcomes) / len(self.outcomes)
+        if outcome.sso_challenge:
+            self._decrease(now, max(outcome.retry_after or 0.0, SSO_COOLDOWN), floor=True)
+        elif is_backoff_status(outcome.status) or not outcome.ok:
+            self._decrease(now, outcome.retry_after)
+        elif congested or error_rate > MAX_ERROR_RATE:
+            self._decrease(now, 0.0)
+        else:
+            self.consecutive_backoffs = 0
+            self.successes_since_increase += 1
+            # Additive increase: +1 after a full window's worth of healthy completions
+            if self.successes_since_increase >= int(self.limit) and self.limit < self.maximum:
+                self.limit = min(self.maximum, self.limit + 1)
+                self.successes_since_increase = 0
+
+    def _decrease(self, now, retry_after=None, floor=False):
+        self.backoffs += 1
+        self.consecutive_backoffs += 1
+        self.successes_since_increase = 0
+        self.limit = self.minimum if floor else max(self.minimum, self.limit * DECREASE_FACTOR)
+        if retry_after is None:
+            retry_after = min(MAX_COOLDOWN, BASE_COOLDOWN * 2 ** (self.consecutive_backoffs - 1))
+        if retry_after > 0:
+            self.cooldown_until = max(self.cooldown_until, now + retry_after)
+
+    def snapshot(self):
+        now = time.monotonic()
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "requests_per_min": len([t for t in self.completions if now - t <= RATE_WINDOW]) * 60.0 / RATE_WINDOW,
+            "latency_ewma_ms": round(self.latency_ewma * 1000) if self.latency_ewma is not None else None,
+            "latency_baseline_ms": round(self.latency_baseline * 1000) if self.latency_baseline is not None else None,
+            "error_rate": round(sum(self.outcomes) / len(self.outcomes), 3) if self.outcomes else 0.0,
+            "cooldown_s": round(max(0.0, self.cooldown_until - now), 1),
+            "backoffs": self.backoffs,
+        }
+
+
+class PolitenessController:
+    """Per-host AIMD limiters shared by every crawler task in the process."""
+
+    def __init__(self, initial=DEFAULT_INITIAL_LIMIT, minimum=DEFAULT_MIN_LIMIT, maximum=DEFAULT_MAX_LIMIT):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self._hosts = {}
+
+    def limiter(self, url_or_host):
+        host = urlparse(url_or_host).hostname if "://" in url_or_host else url_or_host
+        host = (host or "").lower()
+        if host not in self._hosts:
+            self._hosts[host] = HostLimiter(host, self.initial, self.minimum, self.maximum)
+        return self._hosts[host]
+
+    @asynccontextmanager
+    async def request(self, url):
+        """
+        Hold a concurrency slot for ``url``'s host for the duration of one request.
+
+        The caller fills in the yielded `Outcome` (status, Retry-After, SSO
+        challenge); exceptions without a recorded status count as failures.
+        """
+        limiter = self.limiter(url)
+        await limiter.acquire()
+        outcome = Outcome()
+        started = time.monotonic()
+        try:
+            yield outcome
+        except BaseException:
+            # An HTTP status the caller already recorded (e.g. a 404) is not a transport failure
+            if outcome.status is None:
+                outcome.ok = False
+            raise
+        finally:
+            await limiter.release(time.monotonic() - started, outcome)
+
+    def snapshot(self):
+        return {host: limiter.snapshot() for host, limiter in self._hosts.items()}
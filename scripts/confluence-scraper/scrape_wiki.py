@@ -7,35 +7,45 @@ Saves text content as Markdown files (no screenshots, no DOM).
 """
 
 from browser_use import Agent, Browser, BrowserConfig, Controller, ActionResult
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
 from langchain_openai import ChatOpenAI
 import asyncio
 import os
-import datetime
-import time
 import json
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+import session_cookies
+from attachments import AttachmentHarvester
+from frontier import Frontier
+from page_prep import ExtractionCache
+from politeness import PolitenessController
+from space_crawl import SpaceCrawl
+from telemetry import CrawlMetrics, setup_logging
+
 # Load environment variables
 load_dotenv()
 
 # Configuration
+# CONFLUENCE_BASE_URL can point the scraper at the local stand-in in benchmark/
+WIKI_BASE_URL = session_cookies.WIKI_BASE_URL
 SPACES_TO_SCRAPE = [
     {
         "name": "AOMA",
-        "url": "https://wiki.smedigitalapps.com/wiki/display/AOMA",
-        "start_page": "https://wiki.smedigitalapps.com/wiki/display/AOMA",
+        "url": f"{WIKI_BASE_URL}/display/AOMA",
+        "start_page": f"{WIKI_BASE_URL}/display/AOMA",
         "description": "Asset and Offering Management Application documentation"
     },
     {
         "name": "USM",
-        "url": "https://wiki.smedigitalapps.com/wiki/display/USM/Unified+Session+Manager+Home",
-        "start_page": "https://wiki.smedigitalapps.com/wiki/pages/viewpage.action?pageId=67863500",
+        "url": f"{WIKI_BASE_URL}/display/USM/Unified+Session+Manager+Home",
+        "start_page": f"{WIKI_BASE_URL}/pages/viewpage.action?pageId=67863500",
         "description": "Unified Session Manager documentation"
     },
     {
         "name": "GMP",
-        "url": "https://wiki.smedigitalapps.com/wiki/display/GMP",
-        "start_page": "https://wiki.smedigitalapps.com/wiki/display/GMP",
+        "url": f"{WIKI_BASE_URL}/display/GMP",
+        "start_page": f"{WIKI_BASE_URL}/display/GMP",
         "description": "Global Media Production documentation"
     }
 ]
@@ -43,7 +53,21 @@ SPACES_TO_SCRAPE = [
 OUTPUT_DIR = "scraped_content"
 SCREENSHOTS_DIR = "screenshots"
 LOG_FILE = "scraping.log"
+METRICS_FILE = "crawl_metrics.json"
 STATUS_FILE = "scraping_status.json"
+COOKIES_FILE = "wiki_cookies.pkl"
+ATTACHMENTS_DIR = os.path.join(OUTPUT_DIR, "attachments")
+CRAWL_STATE_DIR = "crawl_state"
+EXTRACTION_CACHE_DIR = os.path.join(CRAWL_STATE_DIR, "extraction_cache")
+# login.py's session as JSON, loaded into every space's browser context
+BROWSER_COOKIES_FILE = os.path.join(CRAWL_STATE_DIR, "browser_cookies.json")
+# Spaces crawled at the same time when they share a valid login.py session; without one every
+# agent types the login itself, so spaces run one at a time. Per-host page concurrency is
+# adapted by the politeness controller
+SPACE_CONCURRENCY = int(os.getenv("SCRAPE_SPACE_CONCURRENCY", "3"))
+MAX_HOST_CONCURRENCY = int(os.getenv("SCRAPE_MAX_HOST_CONCURRENCY", "4"))
+
+politeness = PolitenessController(maximum=MAX_HOST_CONCURRENCY)
 
 # Create directories if they don't exist
 for directory in [OUTPUT_DIR, SCREENSHOTS_DIR]:
@@ -56,16 +80,21 @@ for space in SPACES_TO_SCRAPE:
     if not os.path.exists(space_dir):
         os.makedirs(space_dir)
 
+logger = setup_logging(LOG_FILE)
+metrics = CrawlMetrics(METRICS_FILE)
+
 def log_message(message):
-    """Log message with timestamp to console and file"""
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    formatted = f"[{timestamp}] {message}"
-    print(formatted)
-    
-    with open(LOG_FILE, "a") as log_file:
-        log_file.write(formatted + "\n")
+    """Log message with timestamp to console and file (written by a background thread)"""
+    logger.info(message)
+
+def write_browser_cookies(cookies, path):
+    """Save login.py's cookies as the JSON list browser_use loads into each new context"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(cookies, f)
 
-async def scrape_space(space_name, space_url, space_description, username, password):
+async def scrape_space(space_name, space_url, space_description, username, password, start_page=None, harvester=None,
+                       cookies=None, extraction_cache=None, browser_cookies_file=None):
     """Scrape a single Confluence space"""
     log_message(f"\n{'='*70}")
     log_message(f"Starting to scrape {space_name} space")
@@ -74,64 +103,49 @@ async def scrape_space(space_name, space_url, space_description, username, passw
     
     space_output_dir = os.path.join(OUTPUT_DIR, space_name)
     
-    # Create custom controller with actions for file saving
+    # Frontier of pages still to visit, resumed from disk if a previous run was interrupted
+    frontier = Frontier(space_name, CRAWL_STATE_DIR, base_host=urlparse(space_url).hostname)
+    if frontier.load():
+        log_message(f"📂 Resumed frontier for {space_name}: {frontier.stats()}")
+    else:
+        frontier.add(start_page or space_url, title=f"{space_name} Home")
+        frontier.save()
+    
+    # The agent works through the space with the crawl loop's actions
+    crawl = SpaceCrawl(space_name, space_output_dir, frontier, politeness, metrics, log_message, cookies=cookies,
+                       extraction_cache=extraction_cache, harvester=harvester, status_file=STATUS_FILE)
     controller = Controller()
     
     # Custom action to save content to a file
     @controller.action("Save content to file")
     def save_content_to_file(filename: str, content: str):
-        try:
-            # Ensure filename is safe and ends with .md
-            safe_filename = filename.replace('/', '-').replace('\\', '-')
-            if not safe_filename.endswith('.md'):
-                safe_filename += '.md'
-            
-            filepath = os.path.join(space_output_dir, safe_filename)
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(content)
-            log_message(f"✅ Saved: {safe_filename} ({len(content)} chars)")
-            return ActionResult(extracted_content=f"Successfully saved content to {safe_filename}")
-        except Exception as e:
-            log_message(f"❌ Error saving content: {e}")
-            return ActionResult(extracted_content=f"Failed to save content: {e}")
+        return ActionResult(extracted_content=crawl.save_content(filename, content))
+    
+    # Custom actions so the frontier, not the LLM, decides what to visit next
+    @controller.action("Queue links to scrape")
+    def queue_links(urls: list[str], depth: int = 0):
+        return ActionResult(extracted_content=crawl.queue_links(urls, depth))
+    
+    @controller.action("Get next page to scrape")
+    async def next_page(browser: BrowserContext):
+        page = await browser.get_current_page()
+        return ActionResult(extracted_content=await crawl.next_page(page))
+    
+    @controller.action("Report page problem")
+    async def report_page_problem(url: str, problem: str):
+        # problem: "login page", "rate limited", "server error" or "not found"
+        return ActionResult(extracted_content=await crawl.report_problem(url, problem))
     
     # Custom action to track scraped URLs
     @controller.action("Track scraped URL")
-    def track_scraped_url(url: str, title: str, filename: str):
-        try:
-            # Load existing status
-            status = {}
-            if os.path.exists(STATUS_FILE):
-                with open(STATUS_FILE, "r") as f:
-                    status = json.load(f)
-            
-            # Initialize if needed
-            if "scraped_urls" not in status:
-                status["scraped_urls"] = {}
-            if space_name not in status["scraped_urls"]:
-                status["scraped_urls"][space_name] = []
-            
-            # Add to scraped URLs
-            status["scraped_urls"][space_name].append({
-                "url": url,
-                "title": title,
-                "filename": filename,
-                "timestamp": datetime.datetime.now().isoformat()
-            })
-            
-            # Save updated status
-            with open(STATUS_FILE, "w") as f:
-                json.dump(status, f, indent=2)
-            
-            return ActionResult(extracted_content=f"Successfully tracked URL: {url}")
-        except Exception as e:
-            log_message(f"⚠️  Error tracking URL: {e}")
-            return ActionResult(extracted_content=f"Failed to track URL: {e}")
+    async def track_scraped_url(url: str, title: str, filename: str, page_id: str = ""):
+        return ActionResult(extracted_content=await crawl.track(url, title, filename, page_id))
     
-    # Create browser instance
+    # Create browser instance; with a shared session it starts logged in
     browser = Browser(
         config=BrowserConfig(
-            headless=False  # Keep browser visible
+            headless=False,  # Keep browser visible
+            new_context_config=BrowserContextConfig(cookies_file=browser_cookies_file)
         )
     )
     
@@ -144,6 +158,7 @@ async def scrape_space(space_name, space_url, space_description, username, passw
             
             1. LOGIN PHASE (if not already logged in)
             --------------
+            The browser normally starts with the session saved by login.py.
             a. Navigate to {space_url}
             b. If you see a login page:
                i. Enter username "{username}" and click Next
@@ -196,18 +211,23 @@ async def scrape_space(space_name, space_url, space_description, username, passw
                - Current page URL
                - Page title
                - Saved filename
+               - Page ID (from the "ajs-page-id" meta tag, if present)
             
-            f. Find ALL links to other pages in the {space_name} space:
-               - Left sidebar navigation
-               - Page content links
-               - "Child pages" sections
-               - "Related pages" sections
-               - Table of contents
+            f. Links on the page (sidebar, content, child and related pages) are queued
+               when the page is opened. Only pass links you uncover yourself (e.g. by
+               expanding a section) to the "Queue links to scrape" action, with the
+               current depth + 1
             
-            g. For each link found:
-               - Navigate to that page
+            g. Call "Get next page to scrape"; it opens the next page in the browser
+               with the Confluence UI already removed:
                - Extract its content (repeat this process)
-               - Continue until all pages are scraped
+               - Never pick or navigate to pages yourself; the queue skips
+                 duplicates and orders pages by priority
+               - Stop when it answers "DONE"
+            
+            h. If a page shows a login/SSO screen, a "too many requests" message,
+               a server error or "page not found", call "Report page problem"
+               with the URL and what you saw, then ask for the next page
             
             3. PRIORITY AREAS
             ---------------
@@ -230,7 +250,7 @@ async def scrape_space(space_name, space_url, space_description, username, passw
             - Keep code blocks intact
             - Don't miss any sections
             
-            START by navigating to {space_url} and begin extraction.
+            START by calling "Get next page to scrape" and begin extraction.
             Report progress regularly by saying which pages you've completed.
             """,
             llm=ChatOpenAI(model="gpt-4o", temperature=0),
@@ -242,6 +262,14 @@ async def scrape_space(space_name, space_url, space_description, username, passw
         log_message(f"🤖 Starting extraction agent for {space_name}...")
         result = await agent.run()
         log_message(f"Agent completed: {result}")
+        log_message(f"Frontier: {frontier.stats()}")
+        log_message(f"Politeness: {politeness.snapshot()}")
+        if extraction_cache:
+            log_message(f"Extraction cache: {extraction_cache.hits} hits, {extraction_cache.misses} misses")
+        if hasattr(result, "total_input_tokens"):
+            metrics.space(space_name).llm_input_tokens += result.total_input_tokens()
+            log_message(f"LLM input tokens: {result.total_input_tokens()}")
+        metrics.space(space_name).queue_depth = len(frontier)
         
         # Check results
         md_files = [f for f in os.listdir(space_output_dir) if f.endswith('.md')]
@@ -260,6 +288,8 @@ async def scrape_space(space_name, space_url, space_description, username, passw
         return False
     
     finally:
+        await crawl.finish_current_page()
+        frontier.save()
         log_message(f"Closing browser for {space_name}...")
         await browser.close()
 
@@ -276,23 +306,47 @@ async def main():
     log_message(f"   User: {username}")
     log_message(f"   Spaces: {', '.join([s['name'] for s in SPACES_TO_SCRAPE])}")
     
-    results = {}
+    results = {space["name"]: False for space in SPACES_TO_SCRAPE}
+    metrics.start()
     
-    # Scrape each space
-    for space in SPACES_TO_SCRAPE:
-        success = await scrape_space(
-            space["name"],
-            space["url"],
-            space["description"],
-            username,
-            password
-        )
-        results[space["name"]] = success
-        
-        # Brief pause between spaces
-        if space != SPACES_TO_SCRAPE[-1]:
-            log_message("\n⏸️  Pausing 5 seconds before next space...\n")
-            await asyncio.sleep(5)
+    # Attachments are fetched over plain HTTP with the cookies saved by login.py
+    harvester = None
+    cookies = None
+    browser_cookies_file = None
+    if os.path.exists(COOKIES_FILE):
+        cookies = session_cookies.load_cookies(COOKIES_FILE)
+        harvester = AttachmentHarvester(cookies, ATTACHMENTS_DIR, politeness=politeness)
+        verdict, detail, _ = await asyncio.to_thread(session_cookies.check_cookies, COOKIES_FILE)
+        if verdict == session_cookies.VALID:
+            # One login for every space: parallel logins are what trips SSO and the CAPTCHA
+            write_browser_cookies(cookies, BROWSER_COOKIES_FILE)
+            browser_cookies_file = BROWSER_COOKIES_FILE
+        else:
+            log_message(f"⚠️  Saved session is {verdict} ({detail}) - spaces will log in one at a time")
+    else:
+        log_message(f"⚠️  {COOKIES_FILE} not found - skipping attachments and page cache (run login.py first)")
+    extraction_cache = ExtractionCache(EXTRACTION_CACHE_DIR)
+    
+    # Scrape spaces concurrently; the politeness controller paces page visits
+    # per wiki host instead of fixed pauses between spaces
+    space_slots = asyncio.Semaphore(SPACE_CONCURRENCY if browser_cookies_file else 1)
+    
+    async def run_space(space):
+        async with space_slots:
+            results[space["name"]] = await scrape_space(
+                space["name"],
+                space["url"],
+                space["description"],
+                username,
+                password,
+                start_page=space["start_page"],
+                harvester=harvester,
+                cookies=cookies,
+                extraction_cache=extraction_cache,
+                browser_cookies_file=browser_cookies_file
+            )
+    
+    await asyncio.gather(*(run_space(space) for space in SPACES_TO_SCRAPE))
     
     # Final summary
     log_message("\n" + "="*70)
@@ -309,9 +363,26 @@ async def main():
         log_message(f"  Files: {len(md_files)}")
         log_message(f"  Size: {total_size/1024:.1f} KB")
     
+    metrics.extra["politeness"] = politeness.snapshot()
+    if harvester:
+        report = await harvester.drain()
+        metrics.extra["attachments"] = report
+        log_message("📎 Attachments:")
+        log_message(f"  Downloaded: {report['downloaded']} ({report['bytes_downloaded']/1024/1024:.1f} MB, "
+                    f"{report['throughput_mb_s']} MB/s, {report['resumed']} resumed)")
+        log_message(f"  Deduplicated: {report['deduplicated'] + report['skipped_known']} "
+                    f"({report['bytes_saved']/1024/1024:.1f} MB not re-downloaded)")
+        log_message(f"  Unique files: {report['unique_blobs']}, queued for Docling: {report['queued_for_docling']}, "
+                    f"failed: {report['failed']}")
+    
     log_message("="*70)
     log_message(f"\n📁 Content saved to: {OUTPUT_DIR}/")
     
+    snapshot = metrics.snapshot()
+    log_message(f"📈 {snapshot['pages']} pages in {snapshot['elapsed_s']:.0f}s "
+                f"({snapshot['pages_per_min']} pages/min) - metrics in {METRICS_FILE}")
+    metrics.stop()
+    
     return all(results.values())
 
 if __name__ == "__main__":
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Confluence Session Cookie Helpers
+
+Loads the Playwright cookies pickled by login.py and checks whether they still
+authenticate against the wiki with a single plain HTTP request, instead of
+launching a browser and asking an LLM to look at the page.
+
+The verdict is cached next to the cookie file together with the cookie expiry
+times, so repeat runs skip the network check entirely.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urljoin, urlparse
+
+WIKI_BASE_URL = os.getenv("CONFLUENCE_BASE_URL", "https://wiki.smedigitalapps.com/wiki").rstrip("/")
+# Returns the logged-in user as JSON; anonymous sessions are redirected to SSO
+# or get a 401 / "anonymous" user back.
+PROBE_URL = f"{WIKI_BASE_URL}/rest/api/user/current"
+PROBE_TIMEOUT = 5  # seconds
+
+# Even if the cookies claim to live for weeks, the server-side session may not.
+VERDICT_MAX_AGE = int(os.getenv("CONFLUENCE_COOKIE_VERDICT_TTL", "1800"))  # seconds
+
+SSO_MARKERS = ("login.action", "/login", "sso", "saml", "adfs", "okta", "oauth", "signin")
+LOGIN_FORM_MARKERS = ('name="os_username"', 'id="loginform"', 'type="password"')
+
+VALID = "valid"
+EXPIRED = "expired"
+UNKNOWN = "unknown"
+
+
+def verdict_file_for(cookies_file):
+    """Path of the verdict cache that belongs to a cookie pickle."""
+    return os.path.splitext(cookies_file)[0] + ".verdict.json"
+
+
+def load_cookies(cookies_file):
+    """Load the list of Playwright cookie dicts pickled by login.py."""
+    with open(cookies_file, "rb") as f:
+        return pickle.load(f)
+
+
+def cookies_fingerprint(cookies_file):
+    """sha256 of the cookie pickle, so a fresh login invalidates the cached verdict."""
+    with open(cookies_file, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _domain_matches(host, cookie_domain):
+    cookie_domain = (cookie_domain or "").lstrip(".").lower()
+    return bool(cookie_domain) and (host == cookie_domain or host.endswith("." + cookie_domain))
+
+
+def cookies_for_url(cookies, url, now=None):
+    """Return the unexpired cookies a browser would send to ``url``."""
+    now = time.time() if now is None else now
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    path = parsed.path or "/"
+    selected = []
+    for cookie in cookies:
+        expires = cookie.get("expires", -1)
+        if expires not in (None, -1) and expires <= now:
+            continue
+        if not _domain_matches(host, cookie.get("domain")):
+            continue
+        if not path.startswith(cookie.get("path") or "/"):
+            continue
+        if cookie.get("secure") and parsed.scheme != "https":
+            continue
+        selected.append(cookie)
+    return selected
+
+
+def cookie_header(cookies):
+    """Format cookies as a single ``Cookie`` request header value."""
+    return "; ".join(f"{c['name']}={c['value']}" for c in cookies)
+
+
+def earliest_expiry(cookies):
+    """Earliest absolute expiry among persistent cookies, or None if all are session cookies."""
+    expiries = [c["expires"] for c in cookies if c.get("expires") not in (None, -1)]
+    return min(expiries) if expiries else None
+
+
+def classify_response(status, location="", body="", content_type=""):
+    """
+    Deterministically classify a probe response.
+
+    - Redirects to an SSO/login page, 401 and 403 mean the session is gone.
+    - 200 with a known user means the cookies work; a 200 login form does not.
+    - Anything else (5xx, odd redirects) is inconclusive.
+    """
+    location = (location or "").lower()
+    if 300 <= status < 400:
+        if any(marker in location for marker in SSO_MARKERS):
+            return EXPIRED
+        return UNKNOWN
+    if status in (401, 403):
+        return EXPIRED
+    if status == 200:
+        if "json" in content_type:
+            try:
+                user = json.loads(body)
+            except ValueError:
+                return UNKNOWN
+            if user.get("type") == "anonymous" or not (user.get("username") or user.get("userKey")):
+                return EXPIRED
+            return VALID
+        lowered = body.lower()
+        if any(marker in lowered for marker in LOGIN_FORM_MARKERS):
+            return EXPIRED
+        return UNKNOWN
+    return UNKNOWN
+
+
+class NoRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Surface redirects as HTTPError so the SSO hop itself can be inspected."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+def probe(cookies, url=PROBE_URL, timeout=PROBE_TIMEOUT):
+    """Replay the cookies against ``url`` and return ``(verdict, detail)``."""
+    sent = cookies_for_url(cookies, url)
+    if not sent:
+        return EXPIRED, "no unexpired cookies for the wiki host"
+
+    request = urllib.request.Request(url, headers={
+        "Cookie": cookie_header(sent),
+        "Accept": "application/json",
+        "X-Atlassian-Token": "no-check",
+    })
+    opener = urllib.request.build_opener(NoRedirectHandler)
+    try:
+        with opener.open(request, timeout=timeout) as response:
+            status = response.status
+            headers = response.headers
+            body = response.read(65536).decode("utf-8", errors="replace")
+    except urllib.error.HTTPError as e:
+        status = e.code
+        headers = e.headers
+        body = e.read(65536).decode("utf-8", errors="replace") if e.fp else ""
+    except (urllib.error.URLError, OSError) as e:
+        return UNKNOWN, f"probe failed: {e}"
+
+    location = urljoin(url, headers.get("Location", "")) if headers.get("Location") else ""
+    verdict = classify_response(status, location, body, headers.get("Content-Type", ""))
+    detail = f"HTTP {status}" + (f" -> {location}" if location else "")
+    return verdict, detail
+
+
+def read_cached_verdict(cookies_file, now=None):
+    """Return the cached verdict dict if it still applies to this cookie file, else None."""
+    now = time.time() if now is None else now
+    try:
+        with open(verdict_file_for(cookies_file), "r") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("cookies_sha256") != cookies_fingerprint(cookies_file):
+        return None
+    if now >= cached.get("valid_until", 0):
+        return None
+    return cached
+
+
+def write_cached_verdict(cookies_file, verdict, detail, cookies, now=None):
+    """Persist a conclusive verdict, valid until the earliest cookie expiry (capped)."""
+    now = time.time() if now is None else now
+    expiry = earliest_expiry(cookies)
+    valid_until = now + VERDICT_MAX_AGE
+    if verdict == VALID and expiry is not None:
+        valid_until = min(valid_until, expiry)
+    cached = {
+        "verdict": verdict,
+        "detail": detail,
+        "checked_at": now,
+        "valid_until": valid_until,
+        "cookie_expiry": expiry,
+        "cookies_sha256": cookies_fingerprint(cookies_file),
+    }
+    with open(verdict_file_for(cookies_file), "w") as f:
+        json.dump(cached, f, indent=2)
+    return cached
+
+
+def check_cookies(cookies_file, use_cache=True):
+    """
+    Decide whether the pickled cookies are still logged in.
+
+    Returns ``(verdict, detail, from_cache)``. Inconclusive probes are never
+    cached so the next run tries again.
+    """
+    if use_cache:
+        cached = read_cached_verdict(cookies_file)
+        if cached:
+            return cached["verdict"], cached["detail"], True
+
+    cookies = load_cookies(cookies_file)
+    verdict, detail = probe(cookies)
+    if verdict != UNKNOWN:
+        write_cached_verdict(cookies_file, verdict, detail, cookies)
+    return verdict, detail, False
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Per-space Crawl Loop
+
+Everything the browser agent does to a space through scrape_wiki.py's
+controller actions: take the next page from the frontier, pre-fetch and prune
+it, reuse the extraction cache, open the page in the agent's tab, save and
+track the Markdown, and report problems back to the politeness controller.
+
+`SpaceCrawl` does not import browser_use. scrape_wiki.py wraps each method in a
+controller action; benchmark/run_benchmark.py drives the same methods with a
+stub agent and page, so the benchmark measures the loop the scraper ships.
+"""
+
+import asyncio
+import datetime
+import json
+import os
+import time
+
+from page_prep import LINKS_SCRIPT, PRUNE_SCRIPT, PreparedPage, fetch_page
+from politeness import Outcome, parse_retry_after
+
+MAX_PAGE_ATTEMPTS = 3  # opens of one page before a rate limit or server error drops it
+
+
+class SpaceCrawl:
+    """
+    Crawl state of one space while its agent works through the frontier.
+
+    The page being extracted holds a slot of its host's politeness limiter
+    from `next_page` until it is tracked or reported.
+    """
+
+    def __init__(self, space_name, output_dir, frontier, politeness, metrics, log=print, cookies=None,
+                 extraction_cache=None, harvester=None, status_file=None):
+        self.space_name = space_name
+        self.output_dir = output_dir
+        self.frontier = frontier
+        self.politeness = politeness
+        self.metrics = metrics
+        self.log = log
+        self.cookies = cookies
+        self.extraction_cache = extraction_cache
+        self.harvester = harvester
+        self.status_file = status_file
+        self.in_progress = {}
+        self.attempts = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def write_markdown(self, filename, content):
+        # Ensure filename is safe and ends with .md
+        safe_filename = filename.replace('/', '-').replace('\\', '-')
+        if not safe_filename.endswith('.md'):
+            safe_filename += '.md'
+
+        filepath = os.path.join(self.output_dir, safe_filename)
+        with open(filepath, "w", encoding="utf-8") as f:
+            f.write(content)
+        return safe_filename
+
+    def save_content(self, filename, content):
+        try:
+            safe_filename = self.write_markdown(filename, content)
+            self.log(f"✅ Saved: {safe_filename} ({len(content)} chars)")
+            prepared = self.in_progress.get("prepared")
+            if prepared:
+                if self.extraction_cache:
+                    self.extraction_cache.put(prepared.cache_key, safe_filename, content, prepared.url)
+                elapsed = time.monotonic() - self.in_progress["started"]
+                self.metrics.record_page(self.space_name, elapsed, tokens_raw=prepared.raw_tokens,
+                                         tokens_pruned=prepared.pruned_tokens)
+                self.log(f"   ⏱️  {elapsed:.1f}s extract, ~{prepared.pruned_tokens} tokens after pruning "
+                         f"(~{prepared.raw_tokens} raw)")
+            elif "started" in self.in_progress:
+                # Pre-fetch failed or no cookies: the page still counts, without token estimates
+                self.metrics.record_page(self.space_name, time.monotonic() - self.in_progress["started"])
+            return f"Successfully saved content to {safe_filename}"
+        except Exception as e:
+            self.log(f"❌ Error saving content: {e}")
+            return f"Failed to save content: {e}"
+
+    def queue_links(self, urls, depth=0):
+        queued = sum(1 for url in urls if self.frontier.add(url, depth=depth))
+        self.frontier.checkpoint()
+        return f"Queued {queued} new pages ({len(urls) - queued} already seen or not pages); {len(self.frontier)} waiting"
+
+    async def finish_current_page(self, outcome=None):
+        if self.in_progress:
+            limiter, latency = self.in_progress.pop("limiter"), self.in_progress.pop("latency", None)
+            self.in_progress.clear()
+            # The slot was held through the LLM extraction, which says nothing about wiki load:
+            # the latency sample is the browser navigation only
+            await limiter.release(latency, outcome or Outcome())
+
+    async def prefetch_page(self, url):
+        """Fetch a page over plain HTTP and prune it; None if it needs the browser."""
+        started = time.monotonic()
+        async with self.politeness.request(url) as outcome:
+            try:
+                status, html, headers = await asyncio.to_thread(fetch_page, url, self.cookies)
+            except OSError:
+                outcome.ok = False
+                self.metrics.space(self.space_name).retries += 1
+                return None
+            outcome.status = status
+            outcome.retry_after = parse_retry_after(headers.get("Retry-After"))
+            # fetch_page follows ordinary redirects; a 3xx that reaches us went to SSO
+            if 300 <= status < 400:
+                outcome.sso_challenge = True
+            if status != 200:
+                return None
+        prepared = await asyncio.to_thread(PreparedPage, url, html)
+        self.metrics.record_fetch(self.space_name, time.monotonic() - started, len(html) - len(prepared.text))
+        return prepared
+
+    async def open_page(self, page, url, depth):
+        """Open ``url`` in the agent's tab, queue its links and strip the chrome before the agent looks."""
+        started = time.monotonic()
+        await page.goto(url, wait_until="domcontentloaded")
+        self.in_progress["latency"] = time.monotonic() - started
+        await page.wait_for_load_state()
+        # Links come from the full page, before the sidebar is stripped
+        for link, text in await page.evaluate(LINKS_SCRIPT):
+            self.frontier.add(link, title=text, depth=depth + 1)
+        return await page.evaluate(PRUNE_SCRIPT)
+
+    def _release(self, url, transient):
+        """Give up on a page that could not be extracted; transient failures are queued again."""
+        entry = self.frontier.release(url)
+        self.metrics.space(self.space_name).retries += 1
+        self.attempts[url] = self.attempts.get(url, 0) + 1
+        if transient and entry and self.attempts[url] < MAX_PAGE_ATTEMPTS:
+            self.frontier.add(url, *entry)
+
+    async def next_page(self, page):
+        """Hand the agent its next page, opened in ``page``; a message starting "DONE" when there is none."""
+        await self.finish_current_page()
+        while True:
+            entry = self.frontier.pop()
+            self.frontier.checkpoint()
+            if entry is None:
+                return "DONE - no pages left to scrape"
+            url, title, depth = entry
+
+            prepared = await self.prefetch_page(url) if self.cookies else None
+            if prepared:
+                # Links come from the full page, before the chrome is stripped
+                for link, text in prepared.links:
+                    self.frontier.add(link, title=text, depth=depth + 1)
+                cached = self.extraction_cache.get(prepared.cache_key) if self.extraction_cache else None
+                if cached:
+                    # Unchanged content: reuse the earlier extraction, no LLM call
+                    filename, markdown = cached
+                    page_title = prepared.title.split(" - ")[0] or title
+                    saved = self.write_markdown(filename, markdown)
+                    self.record_scraped_url(url, page_title, saved, prepared.page_id)
+                    self.log(f"♻️  Cached: {saved} (content unchanged)")
+                    self.metrics.record_page(self.space_name, cached=True, tokens_raw=prepared.raw_tokens)
+                    continue
+
+            # Waits here while the wiki is backing us off (429/5xx, slow responses, SSO)
+            limiter = self.politeness.limiter(url)
+            await limiter.acquire()
+            self.in_progress.update(limiter=limiter, prepared=prepared)
+            self.metrics.space(self.space_name).queue_depth = len(self.frontier)
+            try:
+                removed = await self.open_page(page, url, depth)
+            except Exception as e:
+                failed = Outcome()
+                failed.ok = False
+                await self.finish_current_page(failed)
+                self._release(url, transient=True)
+                self.log(f"⚠️  {self.space_name}: could not open {url}: {e}")
+                continue
+            self.in_progress["started"] = time.monotonic()
+            self.frontier.checkpoint()
+            return (f"Opened page (depth {depth}): {url} - {removed} Confluence UI elements "
+                    f"removed, its links queued; extract its content")
+
+    async def report_problem(self, url, problem):
+        # problem: "login page", "rate limited", "server error" or "not found"
+        outcome = Outcome()
+        lowered = problem.lower()
+        if "login" in lowered or "captcha" in lowered or "sso" in lowered:
+            outcome.sso_challenge = True
+        elif "rate" in lowered or "429" in lowered:
+            outcome.status = 429
+        elif "server" in lowered or "50" in lowered:
+            outcome.status = 503
+        elif "not found" in lowered or "404" in lowered:
+            outcome.status = 404
+        else:
+            outcome.ok = False
+        await self.finish_current_page(outcome)
+        # Rate limits and server errors pass; the limiter's cooldown runs before the page is opened again
+        self._release(url, transient=outcome.status in (429, 503))
+        self.log(f"⚠️  {self.space_name}: {problem} at {url} -> {self.politeness.limiter(url).snapshot()}")
+        return f"Problem recorded for {url}"
+
+    def record_scraped_url(self, url, title, filename, page_id=None):
+        self.frontier.mark_visited(url, page_id=page_id, title=title)
+        self.frontier.checkpoint()
+        if self.harvester and page_id:
+            self.harvester.schedule_page(page_id, url)
+        if not self.status_file:
+            return
+
+        # Load existing status
+        status = {}
+        if os.path.exists(self.status_file):
+            with open(self.status_file, "r") as f:
+                status = json.load(f)
+
+        # Initialize if needed
+        if "scraped_urls" not in status:
+            status["scraped_urls"] = {}
+        if self.space_name not in status["scraped_urls"]:
+            status["scraped_urls"][self.space_name] = []
+
+        # Add to scraped URLs
+        status["scraped_urls"][self.space_name].append({
+            "url": url,
+            "title": title,
+            "filename": filename,
+            "timestamp": datetime.datetime.now().isoformat()
+        })
+
+        # Save updated status
+        with open(self.status_file, "w") as f:
+            json.dump(status, f, indent=2)
+
+    async def track(self, url, title, filename, page_id=""):
+        try:
+            prepared = self.in_progress.get("prepared")
+            await self.finish_current_page()
+            self.record_scraped_url(url, title, filename, page_id or (prepared and prepared.page_id) or None)
+            return f"Successfully tracked URL: {url}"
+        except Exception as e:
+            self.log(f"⚠️  Error tracking URL: {e}")
+            return f"Failed to track URL: {e}"
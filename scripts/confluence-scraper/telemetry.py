@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Crawl Telemetry
+
+Structured metrics for a scraper run: pages/min, fetch and extract latency
+histograms, bytes saved, LLM tokens and retries per space, and queue depth.
+A machine-readable snapshot is written periodically and at exit so crawl runs
+can be compared.
+
+Also sets up non-blocking logging: log records go through a QueueHandler and
+a background QueueListener writes them to the console and the log file,
+instead of reopening the log file for every line.
+"""
+
+import atexit
+import bisect
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+# Upper bounds in milliseconds; the last bucket catches everything slower
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000]
+SNAPSHOT_INTERVAL = 30  # seconds
+
+
+def setup_logging(log_file, name="scraper"):
+    """Return a logger whose records are written by a background thread."""
+    logger = logging.getLogger(name)
+    if logger.handlers:
+        return logger
+    formatter = logging.Formatter("[%(asctime)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(formatter)
+    file_handler = logging.FileHandler(log_file, encoding="utf-8")
+    file_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, console, file_handler, respect_handler_level=False)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with approximate percentiles."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value_ms):
+        self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.min = value_ms if self.min is None else min(self.min, value_ms)
+        self.max = value_ms if self.max is None else max(self.max, value_ms)
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile (max for the overflow bucket)."""
+        if not self.count:
+            return None
+        rank = p / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 1) if self.count else None,
+            "min_ms": self.min,
+            "max_ms": self.max,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets_ms": self.buckets,
+            "bucket_counts": self.counts,
+        }
+
+
+class SpaceMetrics:
+    def __init__(self):
+        self.pages = 0
+        self.cached_pages = 0
+        self.retries = 0
+        self.llm_input_tokens = 0
+        self.estimated_tokens_raw = 0
+        self.estimated_tokens_pruned = 0
+        self.bytes_pruned = 0
+        self.queue_depth = 0
+        self.fetch_latency = Histogram()
+        self.extract_latency = Histogram()
+
+    def to_dict(self):
+        return {
+            "pages": self.pages,
+            "cached_pages": self.cached_pages,
+            "retries": self.retries,
+            "llm_input_tokens": self.llm_input_tokens,
+            "estimated_tokens_raw": self.estimated_tokens_raw,
+            "estimated_tokens_pruned": self.estimated_tokens_pruned,
+            "bytes_pruned": self.bytes_pruned,
+            "queue_depth": self.queue_depth,
+            "fetch_latency": self.fetch_latency.to_dict(),
+            "extract_latency": self.extract_latency.to_dict(),
+        }
+
+
+class CrawlMetrics:
+    """Metrics for one scraper run, written to ``snapshot_path`` as JSON."""
+
+    def __init__(self, snapshot_path, interval=SNAPSHOT_INTERVAL):
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self.started_at = time.time()
+        self._started = time.monotonic()
+        self.spaces = {}
+        self.extra = {}  # free-form sections, e.g. politeness or attachment reports
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def space(self, name):
+        with self._lock:
+            if name not in self.spaces:
+                self.spaces[name] = SpaceMetrics()
+            return self.spaces[name]
+
+    def record_fetch(self, space, seconds, bytes_pruned=0):
+        metrics = self.space(space)
+        metrics.fetch_latency.observe(seconds * 1000)
+        metrics.bytes_pruned += bytes_pruned
+
+    def record_page(self, space, extract_seconds=None, cached=False, tokens_raw=0, tokens_pruned=0):
+        metrics = self.space(space)
+        metrics.pages += 1
+        metrics.cached_pages += int(cached)
+        metrics.estimated_tokens_raw += tokens_raw
+        metrics.estimated_tokens_pruned += tokens_pruned
+        if extract_seconds is not None:
+            metrics.extract_latency.observe(extract_seconds * 1000)
+
+    def snapshot(self):
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            spaces = {name: m.to_dict() for name, m in self.spaces.items()}
+        pages = sum(s["pages"] for s in spaces.values())
+        return {
+            "started_at": self.started_at,
+            "written_at": time.time(),
+            "elapsed_s": round(elapsed, 1),
+            "pages": pages,
+            "pages_per_min": round(pages / elapsed * 60, 2) if elapsed else 0.0,
+            "queue_depth": sum(s["queue_depth"] for s in spaces.values()),
+            "spaces": spaces,
+            **self.extra,
+        }
+
+    def write_snapshot(self):
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp, self.snapshot_path)
+
+    def start(self):
+        """Write snapshots every ``interval`` seconds and once more at exit."""
+        def run():
+            while not self._stop.wait(self.interval):
+                self.write_snapshot()
+
+        self._thread = threading.Thread(target=run, name="crawl-metrics", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        if not self._stop.is_set():
+            self._stop.set()
+            self.write_snapshot()
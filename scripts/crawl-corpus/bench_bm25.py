@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+BM25 Index Benchmark
+
+Builds a throwaway index over the default sources (aoma_crawl/md, scraper
+output, docs/), then:
+
+- checks that MaxScore top-k matches exhaustive scoring for every query
+- times the queries from the performance baseline plus a few exact-term
+  lookups, and prints p50/p95 next to the baseline's vector search latency
+- touches files over several rounds to force incremental segments and a
+  merge, then checks the pruned results again
+
+    python3 bench_bm25.py
+    python3 bench_bm25.py --repeat 200 -k 10
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from bm25_index import DEFAULT_SOURCES, MAX_SEGMENTS, REPO_ROOT, BM25Index
+
+BASELINE_FILE = os.path.join(REPO_ROOT, "baseline-performance-2026-01-03.json")
+EXACT_QUERIES = [
+    "AOMA-1234",
+    "product metadata viewer",
+    "supabase pgvector",
+    "SIAM login",
+]
+
+
+def baseline():
+    """Queries and average vector search/embedding latency from the baseline file."""
+    with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    queries = [q["query"] for q in data.get("queries", []) if q.get("query")]
+    return queries, data.get("averages", {})
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def exhaustive(index, query, k):
+    """Score every matching document (no pruning) for the correctness check."""
+    results = index.search(query, k=index.doc_count)
+    return results[:k]
+
+
+def same_results(a, b):
+    return [path for _, path in a] == [path for _, path in b] and all(
+        abs(x[0] - y[0]) < 1e-9 for x, y in zip(a, b))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and correctness benchmark for bm25_index.py")
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    queries, averages = baseline()
+    queries += EXACT_QUERIES
+    index_dir = tempfile.mkdtemp(prefix="bm25-bench-")
+    try:
+        with BM25Index(index_dir) as index:
+            started = time.perf_counter()
+            stats = index.update(DEFAULT_SOURCES)
+            print(f"indexed {stats['documents']} documents in {time.perf_counter() - started:.2f} s "
+                  f"({sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(index_dir) for f in fs) / 1e6:.1f} MB)")
+
+            before = {}
+            for query in queries:
+                top = index.search(query, args.k)
+                if not same_results(top, exhaustive(index, query, args.k)):
+                    print(f"MISMATCH: pruned top-{args.k} differs from exhaustive for {query!r}")
+                    return 1
+                before[query] = top
+
+            print(f"{'query':45} {'p50 ms':>8} {'p95 ms':>8}  top hit")
+            all_times = []
+            for query in queries:
+                times = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    index.search(query, args.k)
+                    times.append((time.perf_counter() - started) * 1000)
+                all_times += times
+                top = before[query][0][1] if before[query] else "-"
+                print(f"{query[:45]:45} {statistics.median(times):8.2f} {percentile(times, 95):8.2f}  "
+                      f"{os.path.relpath(top, REPO_ROOT) if top != '-' else top}")
+            print(f"overall p50 {statistics.median(all_times):.2f} ms, p95 {percentile(all_times, 95):.2f} ms "
+                  f"(baseline vector search {averages.get('search_ms', '?')} ms "
+                  f"+ embedding {averages.get('embedding_ms', '?')} ms)")
+
+            # Incremental updates: touch a few files per round until segments merge
+            paths = sorted(index.manifest["documents"])[:MAX_SEGMENTS + 2]
+            merged = 0
+            started = time.perf_counter()
+            for path in paths:
+                st = os.stat(path)
+                os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+                try:
+                    merged += index.update(DEFAULT_SOURCES)["merged"]
+                finally:
+                    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+            print(f"{len(paths)} incremental updates in {time.perf_counter() - started:.2f} s, "
+                  f"{len(index.manifest['segments'])} segments, {merged} merged")
+            overlap = []
+            for query in queries:
+                top = index.search(query, args.k)
+                if not same_results(top, exhaustive(index, query, args.k)):
+                    print(f"MISMATCH after incremental updates for {query!r}")
+                    return 1
+                old = {path for _, path in before[query]}
+                overlap.append(len(old & {path for _, path in top}) / max(1, len(old)))
+            # Document frequencies count deleted copies until their segment is merged, so scores can drift a little
+            print(f"pruned top-{args.k} still matches exhaustive; "
+                  f"{statistics.mean(overlap):.0%} overlap with the results before the updates")
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Corpus Format Benchmark
+
+Compares the loose aoma_crawl layout (one file per HTML/Markdown body) with
+the packed corpus on:
+
+- disk footprint (allocated blocks, not just byte counts) and file count
+- full-corpus scan time, reading every body once
+- random reads by page id
+- pack and export time
+
+Pages are synthesised from a real crawl directory: each copy of a source
+page gets a fresh id, fresh OAuth state/nonce values and some page-specific
+text, so the corpus is as repetitive as a real AOMA crawl but not identical.
+
+    python3 bench_corpus.py --source ../../aoma_crawl --pages 20000
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+import uuid
+
+from corpus import Corpus, pack
+
+UUID_RE = re.compile(rb"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+WORDS = (b"asset offering product release territory metadata upload registration "
+         b"label artist track isrc upc deal rights catalogue delivery partner").split()
+
+
+def synthesize(source_dir, out_dir, pages, seed=1):
+    """Write ``pages`` loose pages to ``out_dir`` modelled on the source crawl."""
+    rng = random.Random(seed)
+    templates = []
+    for name in sorted(os.listdir(os.path.join(source_dir, "html"))):
+        page_id = name[:-len(".html")]
+        with open(os.path.join(source_dir, "html", name), "rb") as f:
+            html = f.read()
+        md_path = os.path.join(source_dir, "md", page_id + ".md")
+        md = open(md_path, "rb").read() if os.path.exists(md_path) else b""
+        templates.append((html, md))
+    if not templates:
+        raise SystemExit(f"no html pages in {source_dir}")
+
+    os.makedirs(os.path.join(out_dir, "html"))
+    os.makedirs(os.path.join(out_dir, "md"))
+    with open(os.path.join(out_dir, "pages.jsonl"), "w") as rows:
+        for i in range(pages):
+            html, md = templates[i % len(templates)]
+            page_id = hashlib.sha1(f"page-{i}".encode()).hexdigest()
+            text = b" ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 400)))
+            html = UUID_RE.sub(lambda _: str(uuid.UUID(int=rng.getrandbits(128))).encode(), html)
+            html = html.replace(b"</body>", b"<div class=\"content\"><p>" + text + b"</p></div></body>", 1)
+            md = md + b"\n\n" + text
+            with open(os.path.join(out_dir, "html", page_id + ".html"), "wb") as f:
+                f.write(html)
+            with open(os.path.join(out_dir, "md", page_id + ".md"), "wb") as f:
+                f.write(md)
+            rows.write(json.dumps({
+                "url": f"https://aoma-stage.smcdp-de.net/aoma-ui/page-{i}", "id": page_id,
+                "htmlPath": f"aoma_crawl/html/{page_id}.html", "htmlSize": len(html),
+                "htmlSha256": hashlib.sha256(html).hexdigest(),
+            }) + "\n")
+    return pages
+
+
+def footprint(path):
+    """(files, bytes, allocated bytes) under ``path``."""
+    files = size = allocated = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            st = os.stat(os.path.join(root, name))
+            files += 1
+            size += st.st_size
+            allocated += st.st_blocks * 512
+    return files, size, allocated
+
+
+def scan_loose(crawl_dir):
+    total = 0
+    for kind in ("html", "md"):
+        for entry in os.scandir(os.path.join(crawl_dir, kind)):
+            with open(entry.path, "rb") as f:
+                total += len(f.read())
+    return total
+
+
+def scan_packed(corpus_dir):
+    with Corpus(corpus_dir) as corpus:
+        return sum(len(data) for _, _, data in corpus.scan())
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the packed corpus against the loose layout")
+    parser.add_argument("--source", default=os.path.join(os.path.dirname(__file__), "..", "..", "aoma_crawl"))
+    parser.add_argument("--pages", type=int, default=20000)
+    parser.add_argument("--random-reads", type=int, default=2000)
+    parser.add_argument("--keep", action="store_true", help="keep the generated directories")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="corpus-bench-")
+    loose, packed, exported = (os.path.join(work, d) for d in ("loose", "packed", "exported"))
+    try:
+        _, synth_s = timed(synthesize, args.source, loose, args.pages)
+        pack_stats, pack_s = timed(pack, loose, packed)
+        loose_bytes, loose_scan_s = timed(scan_loose, loose)
+        packed_bytes, packed_scan_s = timed(scan_packed, packed)
+        assert loose_bytes == packed_bytes, (loose_bytes, packed_bytes)
+
+        with Corpus(packed) as corpus:
+            ids = random.Random(2).choices(corpus.ids(), k=args.random_reads)
+            _, random_s = timed(lambda: [corpus.read(page_id) for page_id in ids])
+        _, export_s = timed(lambda: Corpus(packed).export(exported))
+
+        loose_fp, packed_fp = footprint(loose), footprint(packed)
+        result = {
+            "pages": args.pages,
+            "synthesize_s": round(synth_s, 2),
+            "loose": {"files": loose_fp[0], "bytes": loose_fp[1], "allocated_bytes": loose_fp[2],
+                      "scan_s": round(loose_scan_s, 3)},
+            "packed": {"files": packed_fp[0], "bytes": packed_fp[1], "allocated_bytes": packed_fp[2],
+                       "scan_s": round(packed_scan_s, 3), "shards": pack_stats["shards"],
+                       "compression_ratio": round(pack_stats["raw_bytes"] / pack_stats["packed_bytes"], 2)},
+            "pack_s": round(pack_s, 2),
+            "export_s": round(export_s, 2),
+            "random_read_us": round(random_s / args.random_reads * 1e6, 1),
+            "disk_saving": round(1 - packed_fp[2] / loose_fp[2], 3),
+        }
+        print(json.dumps(result, indent=2))
+        print(f"\n{args.pages} pages: {loose_fp[0]} files / {loose_fp[2] / 1e6:.1f} MB on disk -> "
+              f"{packed_fp[0]} files / {packed_fp[2] / 1e6:.1f} MB; scan {loose_scan_s:.2f}s -> "
+              f"{packed_scan_s:.2f}s; random read {result['random_read_us']} us")
+        print("(page cache is warm for both scans; drop caches between runs for cold numbers)")
+    finally:
+        if args.keep:
+            print(f"kept {work}")
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+"""
+Local BM25 Index
+
+Offline keyword retrieval over the Markdown we already have on disk:
+aoma_crawl/md, the Confluence scraper output and docs/. Useful for debugging
+retrieval, and for exact-term lookups (ticket keys such as AOMA-1234, AOMA
+screen names) that vector search handles badly.
+
+Index layout (``tmp/bm25_index`` by default):
+
+    manifest.json          segments, documents per path (segment, local id, mtime, size), deletions
+    seg-000001/
+        lexicon.json       term -> [offset, length, df, max tf, min doc length]
+        postings.bin       per term: skip table, then blocks of varint doc-id gaps and term frequencies
+        docs.json          local id -> [path, length]
+
+- Postings are delta + LEB128 varint coded in blocks of BLOCK_SIZE and
+  memory-mapped on load. Each term starts with a skip table holding every
+  block's last doc id, byte length, max tf and shortest document. A query
+  reads the skip tables of its own terms and decodes a block only when a
+  cursor lands in it.
+- `update()` indexes new or changed files into a fresh segment and marks
+  older copies deleted. When there are more than MAX_SEGMENTS segments, the
+  smallest ones are merged and deleted documents are dropped. Until then,
+  document frequencies still count deleted copies.
+- `search()` is document-at-a-time BM25 with MaxScore pruning. Terms whose
+  combined upper bound can't reach the current k-th score are only checked
+  on candidates from the other lists, by seeking their cursors, and a
+  candidate is abandoned as soon as its remaining upper bound can't reach
+  the threshold. The block-max of the block a seek would land in tightens
+  that bound, so blocks that can't lift a candidate are never decoded. Equal scores are
+  ranked by path, so pruned and exhaustive searches return the same list.
+
+    python3 bm25_index.py update
+    python3 bm25_index.py search "AOMA-1234 product metadata viewer" -k 5
+    python3 bench_bm25.py
+"""
+
+import argparse
+import bisect
+import heapq
+import itertools
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+DEFAULT_SOURCES = [
+    os.path.join(REPO_ROOT, "aoma_crawl", "md"),
+    os.path.join(REPO_ROOT, "scripts", "confluence-scraper", "scraped_content"),
+    os.path.join(REPO_ROOT, "docs"),
+]
+DEFAULT_INDEX_DIR = os.path.join(REPO_ROOT, "tmp", "bm25_index")
+EXTENSIONS = (".md", ".markdown", ".txt")
+MANIFEST_FILE = "manifest.json"
+MAX_SEGMENTS = 8
+BLOCK_SIZE = 128  # postings per block; each block has a skip entry with its last doc, max tf and min length
+POSTINGS_FORMAT = 2  # manifests without it hold unblocked postings and are rebuilt
+K1 = 1.2
+B = 0.75
+# Slack for float rounding in the pruning bounds, so a document tying the k-th score is still scored
+EPSILON = 1e-9
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how i if in into is it its of on or that the their then there "
+    "these this to was were what when where which who why will with do does can you your".split())
+
+
+def tokenize(text):
+    """
+    Lowercased word tokens. Compound tokens such as ``aoma-1234`` or
+    ``product_metadata`` are kept whole and also split into their parts.
+    """
+    tokens = []
+    for match in TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if any(c in token for c in "-_."):
+            tokens.extend(part for part in re.split(r"[-_.]", token) if part and part not in STOPWORDS)
+    return tokens
+
+
+def encode_varints(values, out):
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+
+
+def _decode_varints(buf, pos, count):
+    """``count`` varints starting at ``pos``; returns (values, end position)."""
+    values = []
+    for _ in range(count):
+        value = shift = 0
+        while True:
+            byte = buf[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        values.append(value)
+    return values, pos
+
+
+def decode_block(buf, offset, length, base):
+    """Decode one postings block into ``(docs, tfs)``; gaps start from ``base``, the previous block's last doc."""
+    values = []
+    end = offset + length
+    value = shift = 0
+    for pos in range(offset, end):
+        byte = buf[pos]
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            values.append(value)
+            value = shift = 0
+        else:
+            shift += 7
+    docs = list(itertools.accumulate(values[0::2], initial=base))[1:]
+    return docs, values[1::2]
+
+
+class PostingCursor:
+    """
+    Forward cursor over one term's postings in a segment.
+
+    Only the skip table is read when the cursor is created; a block is
+    decoded when the cursor first lands in it. `seek` jumps over whole blocks
+    by their last doc id, and `block_bound` reads a block's max tf and
+    shortest document without decoding it.
+    """
+
+    __slots__ = ("buf", "last_docs", "starts", "lengths", "max_tfs", "min_lengths",
+                 "block", "docs", "tfs", "pos", "doc", "tf")
+
+    def __init__(self, buf, offset):
+        (nblocks,), pos = _decode_varints(buf, offset, 1)
+        table, data = _decode_varints(buf, pos, 4 * nblocks)
+        self.buf = buf
+        self.last_docs, self.starts, self.lengths, self.max_tfs, self.min_lengths = [], [], [], [], []
+        last = 0
+        for i in range(0, len(table), 4):
+            gap, length, max_tf, min_length = table[i:i + 4]
+            last += gap
+            self.last_docs.append(last)
+            self.starts.append(data)
+            self.lengths.append(length)
+            self.max_tfs.append(max_tf)
+            self.min_lengths.append(min_length)
+            data += length
+        self._load(0)
+
+    def _load(self, block):
+        self.block = block
+        if block >= len(self.last_docs):
+            self.doc = self.tf = None
+            return
+        base = self.last_docs[block - 1] if block else 0
+        self.docs, self.tfs = decode_block(self.buf, self.starts[block], self.lengths[block], base)
+        self.pos = 0
+        self.doc, self.tf = self.docs[0], self.tfs[0]
+
+    def _block_of(self, target):
+        """Index of the first block that can hold ``target`` (at or after the current one)."""
+        if target <= self.last_docs[self.block]:
+            return self.block
+        return bisect.bisect_left(self.last_docs, target, self.block + 1)
+
+    def next(self):
+        self.pos += 1
+        if self.pos < len(self.docs):
+            self.doc, self.tf = self.docs[self.pos], self.tfs[self.pos]
+        else:
+            self._load(self.block + 1)
+
+    def seek(self, target):
+        """Move to the first posting with doc >= ``target``; never moves backwards."""
+        if self.doc is None or self.doc >= target:
+            return
+        block = self._block_of(target)
+        if block != self.block:
+            self._load(block)
+            if self.doc is None or self.doc >= target:
+                return
+        self.pos = bisect.bisect_left(self.docs, target, self.pos)
+        self.doc, self.tf = self.docs[self.pos], self.tfs[self.pos]
+
+    def block_bound(self, target):
+        """(max tf, min doc length) of the block that would hold ``target``; None past the end."""
+        if self.doc is None:
+            return None
+        block = self._block_of(target)
+        if block == len(self.last_docs):
+            return None
+        return self.max_tfs[block], self.min_lengths[block]
+
+
+def write_segment(seg_dir, documents):
+    """Write ``documents`` (list of (path, tokens)) as one segment; returns its doc table."""
+    inverted = {}
+    docs = []
+    for local_id, (path, tokens) in enumerate(documents):
+        docs.append([path, len(tokens)])
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for term, tf in counts.items():
+            inverted.setdefault(term, []).append((local_id, tf))
+    return _write_postings(seg_dir, inverted, docs)
+
+
+def _write_postings(seg_dir, inverted, docs):
+    os.makedirs(seg_dir, exist_ok=True)
+    postings = bytearray()
+    lexicon = {}
+    for term in sorted(inverted):
+        entries = inverted[term]
+        start = len(postings)
+        table, data = [], bytearray()
+        previous = last = 0
+        for i in range(0, len(entries), BLOCK_SIZE):
+            block = entries[i:i + BLOCK_SIZE]
+            block_start = len(data)
+            values = []
+            for doc, tf in block:
+                values.extend((doc - previous, tf))
+                previous = doc
+            encode_varints(values, data)
+            table.extend((previous - last, len(data) - block_start,
+                          max(tf for _, tf in block), min(docs[doc][1] for doc, _ in block)))
+            last = previous
+        encode_varints([len(table) // 4] + table, postings)
+        postings += data
+        lexicon[term] = [start, len(postings) - start, len(entries),
+                         max(tf for _, tf in entries), min(docs[doc][1] for doc, _ in entries)]
+    with open(os.path.join(seg_dir, "postings.bin"), "wb") as f:
+        f.write(postings)
+    with open(os.path.join(seg_dir, "lexicon.json"), "w") as f:
+        json.dump(lexicon, f, separators=(",", ":"))
+    with open(os.path.join(seg_dir, "docs.json"), "w") as f:
+        json.dump(docs, f, separators=(",", ":"))
+    return docs
+
+
+class Segment:
+    def __init__(self, seg_dir):
+        self.name = os.path.basename(seg_dir)
+        self.seg_dir = seg_dir
+        with open(os.path.join(seg_dir, "lexicon.json")) as f:
+            self.lexicon = json.load(f)
+        with open(os.path.join(seg_dir, "docs.json")) as f:
+            self.docs = json.load(f)
+        self._file = open(os.path.join(seg_dir, "postings.bin"), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self.postings = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def cursor(self, term):
+        entry = self.lexicon.get(term)
+        return PostingCursor(self.postings, entry[0]) if entry else None
+
+    def postings_for(self, term):
+        """All ``[(doc, tf), ...]`` of ``term``; for merges, queries use `cursor`."""
+        postings = []
+        cursor = self.cursor(term)
+        while cursor and cursor.doc is not None:
+            postings.append((cursor.doc, cursor.tf))
+            cursor.next()
+        return postings
+
+    def close(self):
+        if isinstance(self.postings, mmap.mmap):
+            self.postings.close()
+        self._file.close()
+
+
+class _Worst:
+    """Heap key for a path: among equal scores, the path that sorts last ranks lowest."""
+
+    __slots__ = ("path",)
+
+    def __init__(self, path):
+        self.path = path
+
+    def __eq__(self, other):
+        return self.path == other.path
+
+    def __lt__(self, other):
+        return self.path > other.path
+
+    def __gt__(self, other):
+        return self.path < other.path
+
+
+class BM25Index:
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR, k1=K1, b=B):
+        self.index_dir = index_dir
+        self.k1 = k1
+        self.b = b
+        self.manifest = {"format": POSTINGS_FORMAT, "next_segment": 1, "segments": [], "documents": {},
+                         "deleted": {}}
+        path = os.path.join(index_dir, MANIFEST_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                manifest = json.load(f)
+            if manifest.get("format") == POSTINGS_FORMAT:
+                self.manifest = manifest
+            else:
+                # Older postings layout: drop its segments, the next update re-indexes everything
+                for name in manifest.get("segments", []):
+                    shutil.rmtree(os.path.join(index_dir, name), ignore_errors=True)
+                self.manifest["next_segment"] = manifest.get("next_segment", 1)
+        self.segments = {}
+        self._open_segments()
+
+    # --- maintenance -----------------------------------------------------------
+
+    def _open_segments(self):
+        for segment in self.segments.values():
+            segment.close()
+        self.segments = {name: Segment(os.path.join(self.index_dir, name)) for name in self.manifest["segments"]}
+        deleted = self.manifest["deleted"]
+        self._deleted = {name: set(deleted.get(name, [])) for name in self.segments}
+        live = [(name, doc) for name, seg in self.segments.items() for doc in range(len(seg.docs))
+                if doc not in self._deleted[name]]
+        self.doc_count = len(live)
+        self.avgdl = (sum(self.segments[name].docs[doc][1] for name, doc in live) / len(live)) if live else 0.0
+
+    def _save_manifest(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        path = os.path.join(self.index_dir, MANIFEST_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(path + ".tmp", path)
+
+    def _delete(self, path):
+        entry = self.manifest["documents"].pop(path, None)
+        if entry:
+            self.manifest["deleted"].setdefault(entry["segment"], []).append(entry["doc"])
+
+    def update(self, sources=DEFAULT_SOURCES):
+        """Index new and changed files under ``sources``; returns counts."""
+        seen, changed = set(), []
+        for root in sources:
+            if not os.path.isdir(root):
+                continue
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if not d.startswith(".") and d != "node_modules"]
+                for name in filenames:
+                    if not name.lower().endswith(EXTENSIONS):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    st = os.stat(path)
+                    seen.add(path)
+                    entry = self.manifest["documents"].get(path)
+                    if entry and entry["mtime"] == st.st_mtime and entry["size"] == st.st_size:
+                        continue
+                    changed.append((path, st))
+        removed = [path for path in self.manifest["documents"] if path not in seen]
+        for path in removed:
+            self._delete(path)
+
+        if changed:
+            documents = []
+            for path, st in changed:
+                self._delete(path)
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    documents.append((path, tokenize(f.read())))
+            name = f"seg-{self.manifest['next_segment']:06d}"
+            self.manifest["next_segment"] += 1
+            write_segment(os.path.join(self.index_dir, name), documents)
+            self.manifest["segments"].append(name)
+            for local_id, (path, st) in enumerate(changed):
+                self.manifest["documents"][path] = {"segment": name, "doc": local_id,
+                                                    "mtime": st.st_mtime, "size": st.st_size}
+            self._open_segments()
+        merged = self._maybe_merge()
+        self._save_manifest()
+        self._open_segments()
+        return {"indexed": len(changed), "removed": len(removed), "merged": merged,
+                "segments": len(self.manifest["segments"]), "documents": len(self.manifest["documents"])}
+
+    def _maybe_merge(self):
+        """Merge the smallest segments when there are too many; drops deleted docs."""
+        names = self.manifest["segments"]
+        if len(names) <= MAX_SEGMENTS:
+            return 0
+        victims = sorted(names, key=lambda n: len(self.segments[n].docs))[:len(names) - MAX_SEGMENTS + 1]
+
+        merged_docs, inverted, remap = [], {}, {}
+        for name in victims:
+            segment = self.segments[name]
+            deleted = set(self.manifest["deleted"].get(name, []))
+            for doc, (path, length) in enumerate(segment.docs):
+                if doc not in deleted:
+                    remap[(name, doc)] = len(merged_docs)
+                    merged_docs.append([path, length])
+            for term in segment.lexicon:
+                for doc, tf in segment.postings_for(term):
+                    if (name, doc) in remap:
+                        inverted.setdefault(term, []).append((remap[(name, doc)], tf))
+
+        target = f"seg-{self.manifest['next_segment']:06d}"
+        self.manifest["next_segment"] += 1
+        _write_postings(os.path.join(self.index_dir, target), inverted, merged_docs)
+        for entry in self.manifest["documents"].values():
+            key = (entry["segment"], entry["doc"])
+            if key in remap:
+                entry["segment"], entry["doc"] = target, remap[key]
+        for name in victims:
+            self.segments.pop(name).close()
+            self.manifest["deleted"].pop(name, None)
+            shutil.rmtree(os.path.join(self.index_dir, name), ignore_errors=True)
+        self.manifest["segments"] = [n for n in names if n not in victims] + [target]
+        return len(victims)
+
+    # --- search ----------------------------------------------------------------
+
+    def _idf(self, df):
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def _tf_score(self, tf, length):
+        norm = self.k1 * (1 - self.b + self.b * length / self.avgdl) if self.avgdl else self.k1
+        return tf * (self.k1 + 1) / (tf + norm)
+
+    def search(self, query, k=10):
+        """Top-k ``(score, path)`` for ``query``, best first."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.doc_count:
+            return []
+        df = {t: sum(seg.lexicon[t][2] for seg in self.segments.values() if t in seg.lexicon) for t in terms}
+        terms = [t for t in terms if df[t]]
+        idf = {t: self._idf(df[t]) for t in terms}
+
+        heap = []  # (score, _Worst(path)) min-heap of the current top k, worst result on top
+        for name, segment in self.segments.items():
+            deleted = self._deleted[name]
+            lists = []
+            for term in terms:
+                entry = segment.lexicon.get(term)
+                if not entry:
+                    continue
+                # Upper bound: highest tf in the shortest document containing the term
+                bound = idf[term] * self._tf_score(entry[3], entry[4])
+                lists.append((bound, term, segment.cursor(term)))
+            if not lists:
+                continue
+            lists.sort(key=lambda item: item[0])
+            bounds = [item[0] for item in lists]
+            weights = [idf[item[1]] for item in lists]
+            cursors = [item[2] for item in lists]
+            # Final scores are summed in query order, so equal documents get bit-identical scores
+            in_query_order = sorted(range(len(lists)), key=lambda i: terms.index(lists[i][1]))
+            prefix = [0.0]
+            for bound in bounds:
+                prefix.append(prefix[-1] + bound)
+
+            while True:
+                threshold = heap[0][0] - EPSILON if len(heap) == k else 0.0
+                # Lists whose combined bounds can't reach the threshold are non-essential
+                essential = 0
+                while essential < len(lists) and prefix[essential + 1] < threshold:
+                    essential += 1
+                if essential == len(lists):
+                    break
+                doc = min((cursors[i].doc for i in range(essential, len(lists)) if cursors[i].doc is not None),
+                          default=None)
+                if doc is None:
+                    break
+                length = segment.docs[doc][1]
+                score = 0.0
+                found = {}  # list index -> tf of doc
+                for i in range(essential, len(lists)):
+                    cursor = cursors[i]
+                    if cursor.doc == doc:
+                        found[i] = cursor.tf
+                        score += weights[i] * self._tf_score(cursor.tf, length)
+                        cursor.next()
+                for i in range(essential - 1, -1, -1):
+                    if score + prefix[i + 1] < threshold:
+                        break  # even a hit in every remaining list can't make the top k
+                    cursor = cursors[i]
+                    block = cursor.block_bound(doc)
+                    if block is None:
+                        continue
+                    # The block that would hold doc caps this list tighter than its global bound
+                    if score + weights[i] * self._tf_score(*block) + prefix[i] < threshold:
+                        break
+                    cursor.seek(doc)
+                    if cursor.doc == doc:
+                        found[i] = cursor.tf
+                        score += weights[i] * self._tf_score(cursor.tf, length)
+                if doc in deleted or score < threshold:
+                    continue
+                score = sum(weights[i] * self._tf_score(found[i], length) for i in in_query_order if i in found)
+                item = (score, _Worst(segment.docs[doc][0]))
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        # Best score first, ties in path order
+        return [(score, worst.path) for score, worst in sorted(heap, reverse=True)]
+
+    def close(self):
+        for segment in self.segments.values():
+            segment.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def snippet(path, query, width=160):
+    """The line of ``path`` that shares the most terms with ``query``."""
+    terms = set(tokenize(query))
+    best, best_hits = "", 0
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                hits = len(terms & set(tokenize(line)))
+                if hits > best_hits:
+                    best, best_hits = line.strip(), hits
+    except OSError:
+        return ""
+    return best[:width]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local BM25 index over crawl output and docs")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("update", help="index new/changed files")
+    p.add_argument("sources", nargs="*", default=DEFAULT_SOURCES)
+    p = sub.add_parser("search", help="BM25 top-k")
+    p.add_argument("query")
+    p.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    with BM25Index(args.index_dir) as index:
+        if args.command == "update":
+            started = time.perf_counter()
+            stats = index.update(args.sources)
+            stats["seconds"] = round(time.perf_counter() - started, 2)
+            print(json.dumps(stats))
+        else:
+            started = time.perf_counter()
+            results = index.search(args.query, args.k)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            for score, path in results:
+                print(f"{score:7.3f}  {os.path.relpath(path, REPO_ROOT)}")
+                line = snippet(path, args.query)
+                if line:
+                    print(f"         {line}")
+            print(f"{len(results)} results in {elapsed_ms:.1f} ms over {index.doc_count} documents")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
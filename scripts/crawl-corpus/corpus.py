@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Packed Crawl Corpus
+
+Packs an aoma_crawl directory (html/<id>.html, md/<id>.md, pages.jsonl,
+urls.json, manifest.json) into a few compressed shard files plus an
+id -> (shard, offset, length) index, and exports it back to the same layout.
+
+Each HTML/Markdown body is compressed on its own with zlib and a shared
+preset dictionary built from the first pages. AOMA pages are mostly the same
+template, so they compress almost as well as a solid archive. Any single page
+can still be read with one seek and one small decompress. Identical bodies
+(e.g. the same Markdown for every collapsed login page) are stored once and
+shared by their index entries.
+
+    python3 corpus.py pack ../../aoma_crawl ../../aoma_corpus
+    python3 corpus.py cat ../../aoma_corpus 2b6348e2a04c9894835e136bea59fe631c05386f --md
+    python3 corpus.py export ../../aoma_corpus /tmp/aoma_crawl
+    python3 corpus.py stats ../../aoma_corpus
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import zlib
+
+FORMAT_VERSION = 1
+INDEX_FILE = "index.json"
+DICTIONARY_FILE = "dictionary.bin"
+SHARDS_DIR = "shards"
+FILES_DIR = "files"               # pages.jsonl, urls.json, manifest.json, bodies.json, stored verbatim
+SHARD_SIZE = 64 * 1024 * 1024     # compressed bytes per shard before starting the next one
+DICTIONARY_SIZE = 32 * 1024       # zlib only looks back 32 KiB, a bigger preset is wasted
+COMPRESSION_LEVEL = 6
+KINDS = ("html", "md")
+CRAWL_FILES = ("pages.jsonl", "urls.json", "manifest.json", "bodies.json")
+
+
+def shard_name(number):
+    return f"{number:05d}.zpack"
+
+
+def build_dictionary(samples, size=DICTIONARY_SIZE):
+    """
+    Preset dictionary from sample bodies.
+
+    zlib prefers matches near the end of the dictionary, so the samples are
+    taken in reverse and the most common template ends up last.
+    """
+    dictionary = b""
+    for sample in samples:
+        dictionary = sample[:size] + dictionary
+        if len(dictionary) >= size:
+            break
+    return dictionary[-size:]
+
+
+def _compress(data, dictionary):
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS, zdict=dictionary) \
+        if dictionary else zlib.compressobj(COMPRESSION_LEVEL)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _decompress(data, dictionary):
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS, zdict=dictionary) if dictionary else zlib.decompressobj()
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+class CorpusWriter:
+    """Append page bodies to shard files and write the index on `close()`."""
+
+    def __init__(self, corpus_dir, dictionary=b"", shard_size=SHARD_SIZE):
+        self.corpus_dir = corpus_dir
+        self.dictionary = dictionary
+        self.shard_size = shard_size
+        self.records = {}
+        self.raw_bytes = 0
+        self.packed_bytes = 0
+        self.shared_bodies = 0
+        self._stored = {}  # sha256 of a raw body -> its record
+        self._shard = -1
+        self._file = None
+        self._offset = 0
+        os.makedirs(os.path.join(corpus_dir, SHARDS_DIR), exist_ok=True)
+        os.makedirs(os.path.join(corpus_dir, FILES_DIR), exist_ok=True)
+        with open(os.path.join(corpus_dir, DICTIONARY_FILE), "wb") as f:
+            f.write(dictionary)
+
+    def _next_shard(self):
+        if self._file:
+            self._file.close()
+        self._shard += 1
+        self._offset = 0
+        self._file = open(os.path.join(self.corpus_dir, SHARDS_DIR, shard_name(self._shard)), "wb")
+
+    @property
+    def shards(self):
+        return self._shard + 1
+
+    def add(self, page_id, kind, data):
+        """Store one body; ``kind`` is "html" or "md"."""
+        if kind not in KINDS:
+            raise ValueError(f"unknown kind {kind!r}")
+        digest = hashlib.sha256(data).digest()
+        if digest in self._stored:
+            self.records.setdefault(page_id, {})[kind] = self._stored[digest]
+            self.shared_bodies += 1
+            return
+        packed = _compress(data, self.dictionary)
+        if self._file is None or (self._offset and self._offset + len(packed) > self.shard_size):
+            self._next_shard()
+        self._file.write(packed)
+        # [shard, offset, packed length, raw length, crc32 of the raw body]
+        record = [self._shard, self._offset, len(packed), len(data), zlib.crc32(data)]
+        self.records.setdefault(page_id, {})[kind] = record
+        self._stored[digest] = record
+        self._offset += len(packed)
+        self.raw_bytes += len(data)
+        self.packed_bytes += len(packed)
+
+    def add_file(self, name, data):
+        """Store a crawl side file (pages.jsonl, urls.json, ...) as-is."""
+        with open(os.path.join(self.corpus_dir, FILES_DIR, name), "wb") as f:
+            f.write(data)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        index = {
+            "version": FORMAT_VERSION,
+            "shards": self.shards,
+            "raw_bytes": self.raw_bytes,
+            "packed_bytes": self.packed_bytes,
+            "shared_bodies": self.shared_bodies,
+            "records": self.records,
+        }
+        tmp = os.path.join(self.corpus_dir, INDEX_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp, os.path.join(self.corpus_dir, INDEX_FILE))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Corpus:
+    """Read-only view of a packed corpus: random reads by page id and streaming scans."""
+
+    def __init__(self, corpus_dir):
+        self.corpus_dir = corpus_dir
+        with open(os.path.join(corpus_dir, INDEX_FILE), "r") as f:
+            index = json.load(f)
+        if index.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported corpus version {index.get('version')} in {corpus_dir}")
+        self.records = index["records"]
+        self.shards = index["shards"]
+        self.raw_bytes = index["raw_bytes"]
+        self.packed_bytes = index["packed_bytes"]
+        self.shared_bodies = index.get("shared_bodies", 0)
+        with open(os.path.join(corpus_dir, DICTIONARY_FILE), "rb") as f:
+            self.dictionary = f.read()
+        self._handles = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, page_id):
+        return page_id in self.records
+
+    def ids(self):
+        return list(self.records)
+
+    def _handle(self, shard):
+        if shard not in self._handles:
+            self._handles[shard] = open(os.path.join(self.corpus_dir, SHARDS_DIR, shard_name(shard)), "rb")
+        return self._handles[shard]
+
+    def _unpack(self, record, packed):
+        data = _decompress(packed, self.dictionary)
+        if zlib.crc32(data) != record[4]:
+            raise IOError(f"corrupt record at shard {record[0]} offset {record[1]}")
+        return data
+
+    def read(self, page_id, kind="html"):
+        """Raw bytes of one body, or None if the page has no such body."""
+        record = self.records.get(page_id, {}).get(kind)
+        if record is None:
+            return None
+        f = self._handle(record[0])
+        f.seek(record[1])
+        return self._unpack(record, f.read(record[2]))
+
+    def html(self, page_id):
+        data = self.read(page_id, "html")
+        return data.decode("utf-8", errors="replace") if data is not None else None
+
+    def markdown(self, page_id):
+        data = self.read(page_id, "md")
+        return data.decode("utf-8", errors="replace") if data is not None else None
+
+    def read_file(self, name):
+        """A crawl side file stored at pack time, or None."""
+        path = os.path.join(self.corpus_dir, FILES_DIR, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def pages(self):
+        """pages.jsonl rows, in crawl order."""
+        data = self.read_file("pages.jsonl") or b""
+        return [json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip()]
+
+    def scan(self, kinds=KINDS):
+        """
+        Yield ``(page_id, kind, bytes)`` for every body in storage order.
+
+        Shards are read front to back, so a full scan is sequential I/O with
+        one open file at a time.
+        """
+        entries = sorted(
+            (record[0], record[1], page_id, kind, record)
+            for page_id, bodies in self.records.items()
+            for kind, record in bodies.items() if kind in kinds
+        )
+        current, f = None, None
+        try:
+            for shard, offset, page_id, kind, record in entries:
+                if shard != current:
+                    if f:
+                        f.close()
+                    f = open(os.path.join(self.corpus_dir, SHARDS_DIR, shard_name(shard)), "rb")
+                    current = shard
+                if f.tell() != offset:
+                    f.seek(offset)
+                yield page_id, kind, self._unpack(record, f.read(record[2]))
+        finally:
+            if f:
+                f.close()
+
+    def __iter__(self):
+        """
+        Yield ``(page_id, html, markdown)`` once per page, as text.
+
+        Pages come in order of their first stored body, so reads still move
+        mostly forward; a page whose body is shared with an earlier page
+        reads that page's record.
+        """
+        order = sorted(self.records, key=lambda page_id: min(r[:2] for r in self.records[page_id].values()))
+        for page_id in order:
+            yield page_id, self.html(page_id), self.markdown(page_id)
+
+    def export(self, out_dir):
+        """Write the loose aoma_crawl layout (html/, md/, side files) to ``out_dir``."""
+        for kind in KINDS:
+            os.makedirs(os.path.join(out_dir, kind), exist_ok=True)
+        count = 0
+        for page_id, kind, data in self.scan():
+            with open(os.path.join(out_dir, kind, f"{page_id}.{kind}"), "wb") as f:
+                f.write(data)
+            count += 1
+        files_dir = os.path.join(self.corpus_dir, FILES_DIR)
+        for name in os.listdir(files_dir):
+            shutil.copyfile(os.path.join(files_dir, name), os.path.join(out_dir, name))
+        return count
+
+    def close(self):
+        for f in self._handles.values():
+            f.close()
+        self._handles.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _loose_bodies(crawl_dir):
+    """``(page_id, kind, path)`` for every body in a loose crawl directory, sorted by id."""
+    bodies = []
+    for kind in KINDS:
+        directory = os.path.join(crawl_dir, kind)
+        if not os.path.isdir(directory):
+            continue
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.endswith("." + kind):
+                bodies.append((entry.name[:-len(kind) - 1], kind, entry.path))
+    bodies.sort()
+    return bodies
+
+
+def pack(crawl_dir, corpus_dir, shard_size=SHARD_SIZE):
+    """Pack a loose crawl directory into ``corpus_dir``; returns size stats."""
+    bodies = _loose_bodies(crawl_dir)
+    samples = []
+    for _, kind, path in bodies[:64]:
+        if kind == "html":
+            with open(path, "rb") as f:
+                samples.append(f.read())
+    with CorpusWriter(corpus_dir, build_dictionary(samples), shard_size) as writer:
+        for page_id, kind, path in bodies:
+            with open(path, "rb") as f:
+                writer.add(page_id, kind, f.read())
+        for name in CRAWL_FILES:
+            path = os.path.join(crawl_dir, name)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    writer.add_file(name, f.read())
+    return {
+        "pages": len(writer.records),
+        "bodies": len(bodies),
+        "shards": writer.shards,
+        "raw_bytes": writer.raw_bytes,
+        "packed_bytes": writer.packed_bytes,
+        "shared_bodies": writer.shared_bodies,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack, read and export aoma_crawl corpora")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("pack", help="pack a loose crawl directory")
+    p.add_argument("crawl_dir")
+    p.add_argument("corpus_dir")
+    p.add_argument("--shard-mb", type=int, default=SHARD_SIZE // (1024 * 1024))
+    p = sub.add_parser("export", help="write the loose layout back out")
+    p.add_argument("corpus_dir")
+    p.add_argument("out_dir")
+    p = sub.add_parser("cat", help="print one page")
+    p.add_argument("corpus_dir")
+    p.add_argument("page_id")
+    p.add_argument("--md", action="store_true", help="print the Markdown instead of the HTML")
+    p = sub.add_parser("stats", help="print corpus size figures")
+    p.add_argument("corpus_dir")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        stats = pack(args.crawl_dir, args.corpus_dir, args.shard_mb * 1024 * 1024)
+        print(json.dumps(stats))
+    elif args.command == "export":
+        with Corpus(args.corpus_dir) as corpus:
+            print(json.dumps({"bodies": corpus.export(args.out_dir), "out_dir": args.out_dir}))
+    elif args.command == "cat":
+        with Corpus(args.corpus_dir) as corpus:
+            data = corpus.read(args.page_id, "md" if args.md else "html")
+        if data is None:
+            print(f"{args.page_id}: not in corpus", file=sys.stderr)
+            return 1
+        sys.stdout.buffer.write(data)
+    elif args.command == "stats":
+        with Corpus(args.corpus_dir) as corpus:
+            print(json.dumps({
+                "pages": len(corpus),
+                "shards": corpus.shards,
+                "raw_bytes": corpus.raw_bytes,
+                "packed_bytes": corpus.packed_bytes,
+                "shared_bodies": corpus.shared_bodies,
+                "ratio": round(corpus.raw_bytes / corpus.packed_bytes, 2) if corpus.packed_bytes else None,
+            }))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
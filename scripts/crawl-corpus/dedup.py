@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Page Dedup for aoma_crawl
+
+Many crawled "pages" are the same body: every URL the session can't reach
+comes back as the 7720-byte "AOMA Login" page. The raw htmlSha256 values
+still differ, because each login page embeds a fresh OAuth state/nonce.
+
+This hashes each page after masking such per-request values, keeps one HTML
+file per distinct body and turns the rest into references:
+
+- bodies.json maps body hash -> canonical page id, size, title and every
+  page/URL that returned it
+- each pages.jsonl row gets ``bodySha256``, and duplicates get
+  ``duplicateOf`` (the canonical page id)
+- duplicate html/<id>.html and md/<id>.md files are removed, so
+  html_to_md.mjs and the embedding upload only see each body once
+- manifest.json totals report unique bodies, duplicate pages and bytes saved
+
+Run it between crawl_stage.mjs and html_to_md.mjs:
+
+    node scripts/aoma/crawl_stage.mjs
+    python3 scripts/crawl-corpus/dedup.py aoma_crawl
+    node scripts/aoma/html_to_md.mjs
+    node scripts/aoma/report.mjs
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+
+BODIES_FILE = "bodies.json"
+
+# Values that change on every request but say nothing about the page
+VOLATILE_PATTERNS = [
+    # OAuth state/nonce query values. Only these: other GUIDs in a page (content,
+    # attachment and macro ids) are real content and must keep pages apart.
+    re.compile(rb"(?<=[?&;])((?:state|nonce)=)[^&\"'\s<>]+"),
+    # CSRF / session tokens in hidden inputs and meta tags
+    re.compile(rb'((?:name|id)="(?:atl_token|_csrf|csrf[_-]?token|__VIEWSTATE|__EVENTVALIDATION|ajs-atl-token)"'
+               rb'[^>]*?(?:value|content)=")[^"]*', re.IGNORECASE),
+    # jsessionid path parameters
+    re.compile(rb"(;jsessionid=)[0-9A-Za-z._-]+", re.IGNORECASE),
+]
+
+
+def normalize_html(html):
+    """Mask per-request tokens so two renders of the same page hash alike."""
+    for pattern in VOLATILE_PATTERNS:
+        html = pattern.sub(lambda m: (m.group(1) if m.groups() else b"") + b"~", html)
+    return html
+
+
+def body_sha256(html):
+    return hashlib.sha256(normalize_html(html)).hexdigest()
+
+
+def read_pages(crawl_dir):
+    """pages.jsonl rows; a page crawled twice keeps only its latest row."""
+    rows = {}
+    with open(os.path.join(crawl_dir, "pages.jsonl"), "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            rows[row.get("id") or row["url"]] = row
+    return list(rows.values())
+
+
+def _write_json(path, data, **kwargs):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp, path)
+
+
+def dedup_crawl(crawl_dir, dry_run=False):
+    """Collapse duplicate page bodies in ``crawl_dir``; returns the savings summary."""
+    rows = read_pages(crawl_dir)
+    bodies_path = os.path.join(crawl_dir, BODIES_FILE)
+    bodies = {}
+    if os.path.exists(bodies_path):
+        with open(bodies_path, "r", encoding="utf-8") as f:
+            bodies = json.load(f)
+
+    duplicates = []
+    verified = {}  # canonical page id -> whether its html is still there with the same body hash
+    for row in rows:
+        page_id = row.get("id")
+        html_path = os.path.join(crawl_dir, "html", f"{page_id}.html")
+        if row.get("duplicateOf") or not page_id or not os.path.exists(html_path):
+            continue  # failed capture, or already collapsed by an earlier run
+        with open(html_path, "rb") as f:
+            key = body_sha256(f.read())
+        row["bodySha256"] = key
+        body = bodies.setdefault(key, {
+            "id": page_id,
+            "htmlPath": row.get("htmlPath"),
+            "size": row.get("htmlSize"),
+            "title": row.get("title"),
+            "pages": [],
+            "urls": [],
+        })
+        if page_id not in body["pages"]:
+            body["pages"].append(page_id)
+            body["urls"].append(row["url"])
+        if body["id"] != page_id:
+            canonical = body["id"]
+            if canonical not in verified:
+                verified[canonical] = canonical_intact(crawl_dir, canonical, key)
+            if not verified[canonical]:
+                # The stored copy is gone or changed: this page becomes the canonical one
+                body["id"], body["htmlPath"], body["size"] = page_id, row.get("htmlPath"), row.get("htmlSize")
+                verified[page_id] = True
+                continue
+            row["duplicateOf"] = canonical
+            duplicates.append(page_id)
+
+    summary = totals(rows)
+    rows_by_id = {row.get("id"): row for row in rows}
+    if dry_run:
+        return summary
+
+    # Re-check right before deleting: never remove the last copy of a body
+    canonicals = {(rows_by_id[page_id]["duplicateOf"], rows_by_id[page_id]["bodySha256"]) for page_id in duplicates}
+    for canonical, key in canonicals:
+        if not canonical_intact(crawl_dir, canonical, key):
+            raise RuntimeError(f"html for canonical page {canonical} changed during dedup; nothing removed")
+    for page_id in duplicates:
+        for kind in ("html", "md"):
+            path = os.path.join(crawl_dir, kind, f"{page_id}.{kind}")
+            if os.path.exists(path):
+                os.remove(path)
+    _write_json(bodies_path, bodies, indent=2)
+    tmp = os.path.join(crawl_dir, "pages.jsonl.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, separators=(",", ":")) + "\n")
+    os.replace(tmp, os.path.join(crawl_dir, "pages.jsonl"))
+
+    manifest_path = os.path.join(crawl_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        manifest.setdefault("totals", {}).update(summary)
+        manifest.setdefault("outputs", {})["bodiesJson"] = os.path.join(os.path.basename(crawl_dir), BODIES_FILE)
+        _write_json(manifest_path, manifest, indent=2)
+    return summary
+
+
+def canonical_intact(crawl_dir, page_id, key):
+    """True if ``page_id``'s html file still exists and still hashes to ``key``."""
+    path = os.path.join(crawl_dir, "html", f"{page_id}.html")
+    try:
+        with open(path, "rb") as f:
+            return body_sha256(f.read()) == key
+    except OSError:
+        return False
+
+
+def totals(rows):
+    """Manifest totals for the dedup; report.mjs computes the same figures."""
+    captured = [row for row in rows if row.get("htmlPath")]
+    keys = {row["bodySha256"] for row in captured if row.get("bodySha256")}
+    duplicates = [row for row in captured if row.get("duplicateOf")]
+    return {
+        "uniqueBodies": len(keys),
+        "duplicatePages": len(duplicates),
+        "duplicateHtmlBytes": sum(row.get("htmlSize") or 0 for row in duplicates),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store each distinct aoma_crawl page body once")
+    parser.add_argument("crawl_dir", nargs="?", default="aoma_crawl")
+    parser.add_argument("--dry-run", action="store_true", help="report the savings without changing anything")
+    args = parser.parse_args()
+    if not os.path.exists(os.path.join(args.crawl_dir, "pages.jsonl")):
+        print(f"No pages.jsonl in {args.crawl_dir}", file=sys.stderr)
+        return 2
+    print(json.dumps(dedup_crawl(args.crawl_dir, args.dry_run)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
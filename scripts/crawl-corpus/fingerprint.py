@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Auth-Wall and Template Page Fingerprinting
+
+Flags crawled pages that are not content: the AOMA login screen returned at
+HTTP 200, SSO redirects, error pages and empty single-page-app shells. They
+are caught before html_to_md.mjs and the embedding upload run, instead of
+someone noticing "AOMA Login" titles in the manifest.
+
+Each page is reduced to a bottom-k sketch of two kinds of shingles:
+
+- DOM shape: 4-grams of ``parent>tag.class`` tokens, which survive text and
+  token changes
+- visible text: 3-grams of words
+
+Each sketch is compared against the exemplar pages in templates/. A file
+there is named ``<label>--<name>.html``; drop a new one in to teach the
+classifier a new template. A few structural rules (password field with
+little text, SAML auto-post form, no text at all) catch variants that no
+exemplar covers.
+
+    python3 fingerprint.py ../../aoma_crawl                 # annotate + move junk out of html/
+    python3 fingerprint.py ../../aoma_crawl --requeue       # also write requeue.json for a re-crawl
+    python3 fingerprint.py ../../aoma_crawl --dry-run
+    python3 fingerprint.py --explain page.html
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import re
+import sys
+from html.parser import HTMLParser
+
+from dedup import normalize_html
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+SKETCH_SIZE = 128
+SHAPE_GRAM = 4
+TEXT_GRAM = 3
+MATCH_THRESHOLD = 0.5      # estimated Jaccard similarity to call a template match
+CONTENT = "content"
+# Auth walls and shells may be fine after logging in again; errors are not worth a retry
+REQUEUE_LABELS = {"login", "sso_redirect", "empty_shell"}
+JUNK_DIR = "junk"
+REQUEUE_FILE = "requeue.json"
+
+SSO_HOSTS = ("login.microsoftonline.com", "okta", "adfs", "saml", "sso", "ping")
+SKIPPED_TEXT_TAGS = {"script", "style", "noscript", "template"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class _ShapeParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tokens = []
+        self.words = []
+        self.title = ""
+        self.password_inputs = 0
+        self.forms = 0
+        self.scripts = 0
+        self.saml_form = False
+        self.sso_refresh = False
+        self._stack = []
+        self._in_title = False
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        token = tag + (f"#{attrs['id']}" if attrs.get("id") and not any(c.isdigit() for c in attrs["id"]) else "")
+        token += f".{classes[0]}" if classes else ""
+        if tag == "input":
+            input_type = (attrs.get("type") or "text").lower()
+            token += f"[{input_type}]"
+            self.password_inputs += input_type == "password"
+            if (attrs.get("name") or "").lower() in ("samlrequest", "samlresponse"):
+                self.saml_form = True
+        elif tag == "form":
+            self.forms += 1
+        elif tag == "script":
+            self.scripts += 1
+        elif tag == "meta" and (attrs.get("http-equiv") or "").lower() == "refresh":
+            target = (attrs.get("content") or "").lower()
+            self.sso_refresh = any(host in target for host in SSO_HOSTS)
+        elif tag == "title":
+            self._in_title = True
+        parent = self._stack[-1] if self._stack else ""
+        self.tokens.append(f"{parent}>{token}")
+        if tag in VOID_TAGS:
+            return
+        self._stack.append(tag)
+        self._skip += tag in SKIPPED_TEXT_TAGS
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i] == tag:
+                self._skip -= sum(t in SKIPPED_TEXT_TAGS for t in self._stack[i:])
+                del self._stack[i:]
+                break
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip:
+            self.words.extend(re.findall(r"\w+", data.lower()))
+
+
+class PageFingerprint:
+    """Shape/text sketch plus the structural features the rules look at."""
+
+    def __init__(self, html):
+        if isinstance(html, str):
+            html = html.encode("utf-8")
+        html = normalize_html(html).decode("utf-8", errors="replace")
+        parser = _ShapeParser()
+        parser.feed(html)
+        parser.close()
+        self.title = " ".join(parser.title.split())
+        self.words = len(parser.words)
+        self.password_inputs = parser.password_inputs
+        self.forms = parser.forms
+        self.scripts = parser.scripts
+        self.saml_form = parser.saml_form
+        self.sso_refresh = parser.sso_refresh
+        shingles = {"s:" + " ".join(parser.tokens[i:i + SHAPE_GRAM])
+                    for i in range(max(1, len(parser.tokens) - SHAPE_GRAM + 1))}
+        shingles |= {"t:" + " ".join(parser.words[i:i + TEXT_GRAM])
+                     for i in range(max(0, len(parser.words) - TEXT_GRAM + 1))}
+        # Bottom-k sketch: the k smallest shingle hashes stand in for the whole set
+        self.sketch = sorted(heapq.nsmallest(SKETCH_SIZE, {_hash64(s) for s in shingles}))
+
+    def similarity(self, other):
+        """Estimated Jaccard similarity of the two shingle sets."""
+        if not self.sketch or not other.sketch:
+            return 0.0
+        mine, theirs = set(self.sketch), set(other.sketch)
+        union = heapq.nsmallest(SKETCH_SIZE, mine | theirs)
+        return sum(1 for h in union if h in mine and h in theirs) / len(union)
+
+
+class Verdict:
+    __slots__ = ("label", "template", "score", "reason")
+
+    def __init__(self, label, template=None, score=0.0, reason=""):
+        self.label = label
+        self.template = template
+        self.score = score
+        self.reason = reason
+
+    @property
+    def junk(self):
+        return self.label != CONTENT
+
+    def to_dict(self):
+        return {"label": self.label, "template": self.template, "score": round(self.score, 3), "reason": self.reason}
+
+
+class TemplateLibrary:
+    """Known non-content pages, loaded from ``<label>--<name>.html`` exemplars."""
+
+    def __init__(self, templates_dir=TEMPLATES_DIR, threshold=MATCH_THRESHOLD):
+        self.threshold = threshold
+        self.templates = []
+        for name in sorted(os.listdir(templates_dir)):
+            if not name.endswith(".html") or "--" not in name:
+                continue
+            label, template = name[:-len(".html")].split("--", 1)
+            with open(os.path.join(templates_dir, name), "rb") as f:
+                self.templates.append((label, template, PageFingerprint(f.read())))
+
+    def classify(self, html, status=None):
+        page = html if isinstance(html, PageFingerprint) else PageFingerprint(html)
+        best = max(((page.similarity(fp), label, name) for label, name, fp in self.templates), default=(0.0, None, None))
+        if best[0] >= self.threshold:
+            return Verdict(best[1], best[2], best[0], "template match")
+        if status and status >= 400:
+            return Verdict("error", score=best[0], reason=f"HTTP {status}")
+        if page.saml_form or page.sso_refresh:
+            return Verdict("sso_redirect", score=best[0], reason="SAML form or SSO refresh")
+        if page.password_inputs and page.words < 150:
+            return Verdict("login", score=best[0], reason="password field and little text")
+        if page.words < 20:
+            return Verdict("empty_shell", score=best[0], reason=f"{page.words} visible words")
+        return Verdict(CONTENT, score=best[0])
+
+
+def classify_crawl(crawl_dir, library=None, requeue=False, dry_run=False):
+    """
+    Stream pages.jsonl, classify every captured page and flag the junk.
+
+    Rows get ``pageClass`` (and ``pageTemplate`` for template matches). Junk
+    HTML/Markdown is moved to junk/ so conversion and embedding skip it.
+    Pages sharing a ``bodySha256`` (see dedup.py) are classified once.
+    """
+    library = library or TemplateLibrary()
+    pages_path = os.path.join(crawl_dir, "pages.jsonl")
+    tmp = pages_path + ".tmp"
+    verdicts = {}
+    counts = {}
+    totals = {}  # every row's class, including junk moved aside by an earlier run
+    requeue_urls = []
+    junk_ids = []
+    with open(pages_path, "r", encoding="utf-8") as src, open(tmp, "w", encoding="utf-8") as out:
+        for line in src:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            page_id = row.get("id")
+            html_path = os.path.join(crawl_dir, "html", f"{page_id}.html")
+            key = row.get("bodySha256") or row.get("htmlSha256") or page_id
+            verdict = verdicts.get(key)
+            if verdict is None and page_id and os.path.exists(html_path):
+                with open(html_path, "rb") as f:
+                    verdict = verdicts[key] = library.classify(f.read(), row.get("status"))
+            if verdict is not None:
+                row["pageClass"] = verdict.label
+                if verdict.template and verdict.junk:
+                    row["pageTemplate"] = verdict.template
+                counts[verdict.label] = counts.get(verdict.label, 0) + 1
+                if verdict.junk:
+                    junk_ids.append(page_id)
+                    if requeue and verdict.label in REQUEUE_LABELS:
+                        requeue_urls.append(row["url"])
+            if row.get("pageClass"):
+                totals[row["pageClass"]] = totals.get(row["pageClass"], 0) + 1
+            out.write(json.dumps(row, separators=(",", ":")) + "\n")
+
+    summary = {"classified": sum(counts.values()), "classes": counts, "requeued": len(requeue_urls)}
+    if dry_run:
+        os.remove(tmp)
+        return summary
+    os.replace(tmp, pages_path)
+
+    for page_id in junk_ids:
+        for kind in ("html", "md"):
+            path = os.path.join(crawl_dir, kind, f"{page_id}.{kind}")
+            if os.path.exists(path):
+                os.makedirs(os.path.join(crawl_dir, JUNK_DIR, kind), exist_ok=True)
+                os.replace(path, os.path.join(crawl_dir, JUNK_DIR, kind, f"{page_id}.{kind}"))
+    if requeue:
+        # Same shape as urls.json: AOMA_URLS_FILE=aoma_crawl/requeue.json node scripts/aoma/crawl_stage.mjs
+        with open(os.path.join(crawl_dir, REQUEUE_FILE), "w", encoding="utf-8") as f:
+            json.dump({"count": len(requeue_urls), "urls": sorted(set(requeue_urls))}, f, indent=2)
+
+    manifest_path = os.path.join(crawl_dir, "manifest.json")
+    # A re-run finds no HTML for pages already in junk/; their rows keep the earlier pageClass
+    if totals and os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        manifest.setdefault("totals", {})["junkPages"] = {k: v for k, v in totals.items() if k != CONTENT}
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(manifest_path + ".tmp", manifest_path)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag login/SSO/error/empty pages in an aoma_crawl directory")
+    parser.add_argument("crawl_dir", nargs="?", default="aoma_crawl")
+    parser.add_argument("--requeue", action="store_true", help="write auth-walled and empty pages to requeue.json")
+    parser.add_argument("--dry-run", action="store_true", help="classify and report without changing anything")
+    parser.add_argument("--threshold", type=float, default=MATCH_THRESHOLD)
+    parser.add_argument("--explain", metavar="HTML_FILE", help="show the similarity of one file to every template")
+    args = parser.parse_args()
+
+    library = TemplateLibrary(threshold=args.threshold)
+    if args.explain:
+        with open(args.explain, "rb") as f:
+            page = PageFingerprint(f.read())
+        for label, name, fp in library.templates:
+            print(f"{page.similarity(fp):.3f}  {label}--{name}")
+        print(json.dumps(library.classify(page).to_dict()))
+        return 0
+    if not os.path.exists(os.path.join(args.crawl_dir, "pages.jsonl")):
+        print(f"No pages.jsonl in {args.crawl_dir}", file=sys.stderr)
+        return 2
+    print(json.dumps(classify_crawl(args.crawl_dir, library, args.requeue, args.dry_run)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
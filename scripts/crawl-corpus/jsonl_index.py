@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Indexed JSONL Crawl Logs
+
+aoma_crawl/pages.jsonl and the scraper's JSONL outputs
+(attachments/docling_queue.jsonl) are append-only logs. Finding one record
+used to mean parsing the whole file. `JsonlLog` keeps a sidecar SQLite index
+(``<log>.idx``) of byte offsets by id, url and sha256. A lookup is one
+indexed query plus one seek.
+
+- The index covers the log up to a recorded byte size. When the log grows,
+  `refresh()` indexes only the new lines. If the log was rewritten or
+  truncated (e.g. by dedup.py), it is rebuilt. Rewrites are noticed by
+  hashes of the first and the last indexed bytes, and a lookup that lands
+  mid-line rebuilds the index and retries.
+- `append()` takes an exclusive lock on the log and writes each record as a
+  single O_APPEND write, so concurrent writers never interleave lines.
+- `iter()` streams records with optional field filters. Each filter is first
+  checked as a raw substring, so most lines are never JSON-decoded.
+
+    python3 jsonl_index.py get ../../aoma_crawl/pages.jsonl --url https://aoma-stage.smcdp-de.net/
+    python3 jsonl_index.py grep ../../aoma_crawl/pages.jsonl --where title="AOMA Login" --count
+    python3 jsonl_index.py index ../../aoma_crawl/pages.jsonl
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are still single writes, just unlocked
+    fcntl = None
+
+INDEX_SUFFIX = ".idx"
+KEY_FIELDS = ("id", "url", "htmlSha256", "sha256", "bodySha256")
+HEAD_BYTES = 4096            # fingerprint of the log start, to notice rewrites
+TAIL_BYTES = 4096            # ... and of the bytes up to the indexed size, ending with the last indexed line
+BATCH_SIZE = 5000
+
+
+def _hash64(value):
+    """Signed 64-bit key hash, so SQLite stores it as a plain INTEGER."""
+    return int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+class JsonlLog:
+    """An append-only JSONL file with a sidecar offset index."""
+
+    def __init__(self, path, key_fields=KEY_FIELDS, index_path=None):
+        self.path = path
+        self.key_fields = tuple(key_fields)
+        self.index_path = index_path or path + INDEX_SUFFIX
+        # Autocommit mode: refresh() manages its own transaction
+        self._db = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS keys (field INTEGER, hash INTEGER, offset INTEGER);
+        """)
+        self._file = None
+        self.refresh()
+
+    # --- index maintenance -------------------------------------------------
+
+    def _meta(self, name, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def _head_sha(self, size):
+        if not os.path.exists(self.path):
+            return ""
+        with open(self.path, "rb") as f:
+            return hashlib.sha256(f.read(min(size, HEAD_BYTES))).hexdigest()
+
+    def _tail_sha(self, size):
+        if not os.path.exists(self.path):
+            return ""
+        with open(self.path, "rb") as f:
+            f.seek(max(0, size - TAIL_BYTES))
+            return hashlib.sha256(f.read(size - f.tell())).hexdigest()
+
+    def refresh(self):
+        """Bring the index up to date with the log; returns the number of new records indexed."""
+        if self._file:
+            self._file.close()  # a rewritten log is a new file; reopen it on the next read
+            self._file = None
+        # One writer at a time: a second process waits here, then sees the updated size
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            count = self._refresh_locked()
+            self._db.execute("CREATE INDEX IF NOT EXISTS keys_lookup ON keys (field, hash)")
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return count
+
+    def _refresh_locked(self):
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        indexed = int(self._meta("indexed_size", 0))
+        fields = json.dumps(self.key_fields)
+        if (size < indexed or self._meta("fields", fields) != fields
+                or self._meta("head_sha256", "") != self._head_sha(indexed)
+                or self._meta("tail_sha256", "") != self._tail_sha(indexed)):
+            indexed = 0  # truncated, rewritten or indexed with other fields: start over
+        if size == indexed:
+            return 0
+        if indexed == 0:
+            # Bulk load without the lookup index, then build it once
+            self._db.execute("DROP INDEX IF EXISTS keys_lookup")
+            self._db.execute("DELETE FROM keys")
+
+        total = int(self._meta("records", 0)) if indexed else 0
+        rows, count, position = [], 0, indexed
+        with open(self.path, "rb") as f:
+            f.seek(indexed)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # a writer is mid-append; index it next time
+                offset, position = position, position + len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(record, dict):
+                    continue
+                count += 1
+                for code, field in enumerate(self.key_fields):
+                    if record.get(field) is not None:
+                        rows.append((code, _hash64(record[field]), offset))
+                if len(rows) >= BATCH_SIZE:
+                    self._db.executemany("INSERT INTO keys VALUES (?, ?, ?)", rows)
+                    rows = []
+        self._db.executemany("INSERT INTO keys VALUES (?, ?, ?)", rows)
+        self._db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+            ("indexed_size", str(position)),
+            ("head_sha256", self._head_sha(position)),
+            ("tail_sha256", self._tail_sha(position)),
+            ("fields", fields),
+            ("records", str(total + count)),
+            ("updated_at", str(time.time())),
+        ])
+        return count
+
+    # --- reads ---------------------------------------------------------------
+
+    def rebuild(self):
+        """Re-index the whole log."""
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('indexed_size', '0')")
+        return self.refresh()
+
+    def _read_at(self, offset):
+        """The record starting at ``offset``; ValueError if no record starts there."""
+        if self._file is None:
+            self._file = open(self.path, "rb")
+        self._file.seek(offset)
+        record = json.loads(self._file.readline())
+        if not isinstance(record, dict):
+            raise ValueError(f"no record at offset {offset}")
+        return record
+
+    def _matching(self, field, value, latest_first=False):
+        offsets = self.offsets(field, value)
+        for offset in reversed(offsets) if latest_first else offsets:
+            record = self._read_at(offset)
+            if record.get(field) == value:  # guard against 64-bit hash collisions
+                yield record
+
+    def _with_rebuild(self, lookup):
+        try:
+            return lookup()
+        except ValueError:
+            # The log changed under the index in a way the head/tail hashes did not catch
+            self.rebuild()
+            return lookup()
+
+    def offsets(self, field, value):
+        """Byte offsets of every record whose ``field`` equals ``value``, oldest first."""
+        if field not in self.key_fields:
+            raise KeyError(f"{field!r} is not indexed (indexed: {', '.join(self.key_fields)})")
+        rows = self._db.execute("SELECT offset FROM keys WHERE field = ? AND hash = ? ORDER BY offset",
+                                (self.key_fields.index(field), _hash64(value))).fetchall()
+        return [offset for (offset,) in rows]
+
+    def find_all(self, field, value):
+        """Every record with ``field == value``, oldest first (a page crawled twice has two)."""
+        return self._with_rebuild(lambda: list(self._matching(field, value)))
+
+    def find(self, field, value):
+        """The latest record with ``field == value``, or None."""
+        return self._with_rebuild(lambda: next(self._matching(field, value, latest_first=True), None))
+
+    def get(self, page_id):
+        return self.find("id", page_id)
+
+    def by_url(self, url):
+        return self.find("url", url)
+
+    def iter(self, where=None, predicate=None):
+        """
+        Stream records, optionally keeping only those whose fields equal ``where``.
+
+        ``predicate`` is an extra callable run on records that pass ``where``.
+        """
+        where = where or {}
+        # Byte prefilter. Writers differ on ensure_ascii ("Página" vs "P\u00e1gina"),
+        # so a value may appear in either form; json.loads below makes the exact check.
+        needles = [{json.dumps(v, ensure_ascii=False).encode("utf-8"), json.dumps(v).encode("utf-8")}
+                   for v in where.values()]
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n") or not all(any(n in line for n in forms) for forms in needles):
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if all(record.get(k) == v for k, v in where.items()) and (predicate is None or predicate(record)):
+                    yield record
+
+    def __iter__(self):
+        return self.iter()
+
+    def __len__(self):
+        return int(self._meta("records", 0))
+
+    # --- writes --------------------------------------------------------------
+
+    def append(self, record):
+        """Append one record under an exclusive lock; the index picks it up on the next refresh."""
+        line = (json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            # A log left without a trailing newline by a crashed writer would swallow this record
+            size = os.fstat(fd).st_size
+            if size:
+                with open(self.path, "rb") as f:
+                    f.seek(size - 1)
+                    if f.read(1) != b"\n":
+                        line = b"\n" + line
+            os.write(fd, line)
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _parse_where(pairs):
+    where = {}
+    for pair in pairs or []:
+        field, _, value = pair.partition("=")
+        try:
+            where[field] = json.loads(value)
+        except ValueError:
+            where[field] = value
+    return where
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexed lookups over JSONL crawl logs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("index", help="build or update the sidecar index")
+    p.add_argument("log")
+    p = sub.add_parser("get", help="latest record by id, url or sha256")
+    p.add_argument("log")
+    p.add_argument("--id")
+    p.add_argument("--url")
+    p.add_argument("--sha256", help="matches htmlSha256, sha256 or bodySha256")
+    p.add_argument("--all", action="store_true", help="every version, oldest first")
+    p = sub.add_parser("grep", help="stream records matching field=value filters")
+    p.add_argument("log")
+    p.add_argument("--where", action="append", metavar="FIELD=VALUE")
+    p.add_argument("--count", action="store_true")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.log):
+        print(f"No such log: {args.log}", file=sys.stderr)
+        return 2
+    with JsonlLog(args.log) as log:
+        if args.command == "index":
+            print(json.dumps({"records": len(log), "index": log.index_path}))
+        elif args.command == "get":
+            if args.id or args.url:
+                lookups = [("id", args.id)] if args.id else [("url", args.url)]
+            else:
+                lookups = [(field, args.sha256) for field in ("htmlSha256", "sha256", "bodySha256")]
+            records = [r for field, value in lookups if value for r in log.find_all(field, value)]
+            if not records:
+                return 1
+            for record in records if args.all else records[-1:]:
+                print(json.dumps(record))
+        elif args.command == "grep":
+            matches = log.iter(_parse_where(args.where))
+            if args.count:
+                print(sum(1 for _ in matches))
+            else:
+                for record in matches:
+                    print(json.dumps(record))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
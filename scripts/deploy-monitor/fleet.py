@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Fleet mode: many Render services in one process
+
+monitor-deployment.py follows one hardcoded service in a blocking loop, so a
+coordinated release needs one terminal per service. `run_fleet` follows
+every service in a JSON config inside one event loop:
+
+- each service is a `ServiceMonitor` coroutine. It finds the latest deploy,
+  polls it to a terminal status, records its phases in the deploy timeline,
+  and then runs the concurrent verification checks against the service URL
+- every Render CLI call from every service goes through one `RenderLimiter`.
+  That is a token bucket (RENDER_RATE calls/s, bursts of RENDER_BURST) plus
+  a cap on in-flight CLI processes. Ten services polling every 5 s stay
+  inside the API rate limit, and a 429 from the CLI pauses all callers
+- one status table shows every service's deploy, phase and time in phase.
+  On a terminal it is redrawn in place; otherwise a line is printed per
+  change
+
+Exit status is 1 if any service's deploy or required checks failed.
+
+    python3 fleet.py fleet.json
+    python3 fleet.py fleet.json --verify-only --plain
+
+Config:
+
+    {
+      "poll_interval": 5, "max_wait": 600, "deadline": 300,
+      "render": {"rate": 2, "burst": 4, "concurrency": 4},
+      "services": [
+        {"name": "siam-app", "service_id": "srv-...", "url": "https://iamsiam.ai",
+         "health_path": "/api/health", "routes": ["/api/health", "/"], "max_p95_ms": 1500},
+        {"name": "knowledge-api", "service_id": "srv-...", "url": "https://...",
+         "health_path": "/health", "perf_gate": true}
+      ]
+    }
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from typing import Any, Optional, TextIO
+
+import perf_gate
+import verify
+from metrics import parse_time
+from probes import ProbePool, summarize
+from timeline import FAILED, Timeline
+from verify import Check, CheckResult, ProbeResult, VerificationEngine
+
+POLL_INTERVAL = 5.0
+MAX_WAIT = 600.0
+RENDER_RATE = 2.0             # Render CLI calls per second, across the whole fleet
+RENDER_BURST = 4
+RENDER_CONCURRENCY = 4        # CLI processes in flight at once
+RATE_LIMIT_PAUSE = 10.0       # seconds every caller waits after the CLI reports a 429
+LATENCY_PROBES = 10
+REDRAW_INTERVAL = 1.0
+TERMINAL = ("live", "canceled", "deactivated") + FAILED
+
+
+@dataclass
+class ServiceConfig:
+    name: str
+    service_id: str
+    url: Optional[str] = None          # no URL: deploy only, no verification
+    health_path: str = "/api/health"
+    routes: list = field(default_factory=lambda: ["/"])
+    max_p95_ms: Optional[float] = None
+    perf_gate: Any = None              # Knowledge API URL, or true for ``url`` itself
+    latency_probes: int = LATENCY_PROBES
+
+
+@dataclass
+class FleetConfig:
+    services: list
+    poll_interval: float = POLL_INTERVAL
+    max_wait: float = MAX_WAIT
+    deadline: float = verify.DEFAULT_DEADLINE
+    render_rate: float = RENDER_RATE
+    render_burst: int = RENDER_BURST
+    render_concurrency: int = RENDER_CONCURRENCY
+
+
+def load_config(path: str) -> FleetConfig:
+    """Read and validate a fleet config; raises ValueError on mistakes."""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    known = {f.name for f in fields(ServiceConfig)}
+    services = []
+    for i, entry in enumerate(raw.get("services") or []):
+        unknown = set(entry) - known
+        if unknown:
+            raise ValueError(f"services[{i}]: unknown keys {sorted(unknown)}")
+        if not entry.get("name") or not entry.get("service_id"):
+            raise ValueError(f"services[{i}]: 'name' and 'service_id' are required")
+        services.append(ServiceConfig(**entry))
+    if not services:
+        raise ValueError(f"{path}: no services")
+    names = [s.name for s in services]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{path}: duplicate service names")
+    render = raw.get("render") or {}
+    return FleetConfig(
+        services=services,
+        poll_interval=float(raw.get("poll_interval", POLL_INTERVAL)),
+        max_wait=float(raw.get("max_wait", MAX_WAIT)),
+        deadline=float(raw.get("deadline", verify.DEFAULT_DEADLINE)),
+        render_rate=float(render.get("rate", RENDER_RATE)),
+        render_burst=int(render.get("burst", RENDER_BURST)),
+        render_concurrency=int(render.get("concurrency", RENDER_CONCURRENCY)),
+    )
+
+
+class RenderLimiter:
+    """Token bucket plus a cap on in-flight commands, shared by every service's Render CLI calls."""
+
+    def __init__(self, rate: float = RENDER_RATE, burst: int = RENDER_BURST,
+                 concurrency: int = RENDER_CONCURRENCY):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(concurrency)
+        self.calls = 0
+        self.throttled = 0.0          # total seconds callers spent waiting for a token or a slot
+        self.rate_limited = 0
+
+    async def _take(self) -> None:
+        # Holding the lock while sleeping hands out tokens in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def run(self, command: str, timeout: float = verify.COMMAND_TIMEOUT) -> tuple[int, str, str]:
+        waiting = time.monotonic()
+        async with self._slots:
+            await self._take()
+            self.throttled += time.monotonic() - waiting
+            self.calls += 1
+            code, stdout, stderr = await verify.run_command(command, timeout)
+        if code != 0 and ("429" in stderr or "rate limit" in stderr.lower()):
+            # Drain the bucket so every service backs off, not just this one
+            self.rate_limited += 1
+            self._tokens = min(self._tokens, 0.0) - RATE_LIMIT_PAUSE * self.rate
+        return code, stdout, stderr
+
+
+async def probe_route(pool: ProbePool, route: str, conclusive_4xx: bool) -> ProbeResult:
+    """2xx/3xx passes; 5xx and connection errors are retried, 4xx too unless ``conclusive_4xx``"""
+    timing = await pool.probe(route)
+    if timing.ok:
+        return ProbeResult(True, detail=f"{route} HTTP {timing.status} ({timing.total:.0f} ms)", data=timing)
+    conclusive = conclusive_4xx and 400 <= timing.status < 500
+    return ProbeResult(False, conclusive=conclusive, detail=f"{route} {timing.error or f'HTTP {timing.status}'}",
+                       data=timing)
+
+
+async def probe_latency(pool: ProbePool, routes: list[str], n: int, max_p95_ms: Optional[float]) -> ProbeResult:
+    timings = await pool.burst(routes, n)
+    if not any(t.ok for t in timings):
+        return ProbeResult(False, conclusive=False, detail="no successful probes yet")
+    summary = summarize(timings)
+    worst = max((stats["total"]["p95"] for stats in summary.values() if stats["total"]), default=0.0)
+    detail = f"worst p95 {worst:.0f} ms"
+    if max_p95_ms is not None and worst > max_p95_ms:
+        return ProbeResult(False, detail=f"{detail} over {max_p95_ms:.0f} ms budget", data=summary)
+    return ProbeResult(True, detail=detail, data=summary)
+
+
+async def probe_perf_gate(base_url: str) -> ProbeResult:
+    result = await perf_gate.run_gate(base_url, perf_gate.load_baseline())
+    if not result.measured:
+        return ProbeResult(False, conclusive=False, detail=(result.errors or ["no samples"])[0])
+    regressions = [v.phase for v in result.verdicts if v.regressed]
+    return ProbeResult(result.passed, detail=f"regressed: {', '.join(regressions)}" if regressions
+                       else "no regression", data=result)
+
+
+class ServiceMonitor:
+    """Follows one service's latest deploy to a verdict; ``state`` and ``detail`` feed the status table."""
+
+    def __init__(self, config: ServiceConfig, render: RenderLimiter, fleet: FleetConfig,
+                 verify_only: bool = False, timeline_path: Optional[str] = None):
+        self.config = config
+        self.render = render
+        self.fleet = fleet
+        self.verify_only = verify_only
+        self.timeline_path = timeline_path
+        self.deploy_id = ""
+        self.state = "pending"
+        self.detail = ""
+        self.ok: Optional[bool] = None
+        self.started = time.monotonic()
+        self.state_since = self.started
+        self.results: list[CheckResult] = []
+        self.version = 0              # bumped on every change, so plain output prints only changes
+
+    def _set(self, state: str, detail: str = "") -> None:
+        if state != self.state:
+            self.state_since = time.monotonic()
+        if (state, detail) != (self.state, self.detail):
+            self.version += 1
+        self.state, self.detail = state, detail
+
+    async def run(self) -> bool:
+        try:
+            self.ok = await self._run()
+        except asyncio.CancelledError:
+            self.ok = False
+            self._set("cancelled")
+            raise
+        except Exception as e:  # one broken service must not take the fleet down
+            self.ok = False
+            self._set("error", f"{type(e).__name__}: {e}")
+        return self.ok
+
+    async def _run(self) -> bool:
+        if not self.verify_only:
+            self.deploy_id = await self._latest_deploy()
+            if not self.deploy_id:
+                return False
+            if not await self._follow_deploy():
+                return False
+        if not self.config.url:
+            self._set("passed", "deploy live, no url to verify")
+            return True
+        return await self._verify()
+
+    async def _latest_deploy(self) -> str:
+        self._set("finding deploy")
+        code, stdout, stderr = await self.render.run(
+            f"render deploys list -s {self.config.service_id} -o json --limit 1")
+        try:
+            deploys = json.loads(stdout) if code == 0 else []
+        except json.JSONDecodeError:
+            deploys = []
+        if not deploys:
+            self._set("error", stderr.strip()[:120] or "no deploys found")
+            return ""
+        return deploys[0].get("id", "")
+
+    async def _follow_deploy(self) -> bool:
+        """Poll until live/failed or ``max_wait``; records phase timings either way."""
+        transitions: list[tuple[str, float]] = []
+        info: dict = {}
+        status = "unknown"
+        stop_at = time.monotonic() + self.fleet.max_wait
+        while time.monotonic() < stop_at:
+            code, stdout, stderr = await self.render.run(
+                f"render deploys show -s {self.config.service_id} -d {self.deploy_id} -o json")
+            try:
+                info = json.loads(stdout) if code == 0 else {}
+            except json.JSONDecodeError:
+                info = {}
+            status = info.get("status", "unknown")
+            if status != "unknown" and (not transitions or transitions[-1][0] != status):
+                transitions.append((status, time.time()))
+            self._set(status, "" if status != "unknown" else stderr.strip()[:120])
+            if status in TERMINAL:
+                break
+            await asyncio.sleep(self.fleet.poll_interval)
+        else:
+            status = "timeout"
+            self._set("timeout", f"not live after {self.fleet.max_wait:.0f}s")
+        self._record(info, transitions, status)
+        if status != "live":
+            if status != "timeout":
+                self._set(status, f"deploy {status}")
+            return False
+        return True
+
+    def _record(self, info: dict, transitions: list, outcome: str) -> None:
+        commit = info.get("commit") or {}
+        created_at = info.get("createdAt")
+        try:
+            with Timeline(*([self.timeline_path] if self.timeline_path else [])) as store:
+                store.record(self.deploy_id, self.config.service_id, transitions, outcome, time.time(),
+                             commit_id=commit.get("id", ""), commit_message=commit.get("message", ""),
+                             created_at=parse_time(created_at) if created_at else None)
+        except (sqlite3.Error, OSError, ValueError):
+            pass  # the timeline is a report, never a reason to fail a deploy
+
+    def _checks(self, pool: ProbePool) -> list[Check]:
+        c = self.config
+        checks = [Check("health", lambda: probe_route(pool, c.health_path, conclusive_4xx=False))]
+        checks += [Check(f"route {route}", lambda route=route: probe_route(pool, route, conclusive_4xx=True))
+                   for route in c.routes if route != c.health_path]
+        if c.latency_probes:
+            checks.append(Check("latency", lambda: probe_latency(pool, list(dict.fromkeys([c.health_path, *c.routes])),
+                                                                 c.latency_probes, c.max_p95_ms),
+                                required=c.max_p95_ms is not None))
+        if c.perf_gate:
+            gate_url = c.url if c.perf_gate is True else c.perf_gate
+            checks.append(Check("perf_gate", lambda: probe_perf_gate(gate_url)))
+        return checks
+
+    async def _verify(self) -> bool:
+        self._set("verifying")
+        pool = ProbePool(self.config.url.rstrip("/"))
+        engine = VerificationEngine(self._checks(pool), deadline=self.fleet.deadline,
+                                    on_result=lambda r: self._set("verifying", f"{r.name}: {'ok' if r.ok else 'FAILED'}"))
+        try:
+            self.results = await engine.run()
+        finally:
+            pool.close()
+        failed = [r for r in self.results if r.required and not r.ok]
+        if failed:
+            self._set("failed", "; ".join(f"{r.name}: {r.detail}" for r in failed)[:160])
+            return False
+        latency = next((r for r in self.results if r.name == "latency" and r.ok), None)
+        self._set("passed", f"{len(self.results)} checks in {engine.elapsed:.1f}s"
+                            + (f", {latency.detail}" if latency else ""))
+        return True
+
+
+def _clock(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def format_table(monitors: list[ServiceMonitor], render: RenderLimiter, width: int = 120) -> list[str]:
+    now = time.monotonic()
+    name_width = max(7, *(len(m.config.name) for m in monitors))
+    icon = {True: "✅", False: "❌", None: "⏳"}
+    lines = [f"   {'service':{name_width}}  {'deploy':24}  {'state':22}  {'phase':>5}  {'total':>5}  detail"]
+    for m in monitors:
+        row = (f"{icon[m.ok]} {m.config.name:{name_width}}  {m.deploy_id or '-':24}  {m.state:22}  "
+               f"{_clock(now - m.state_since):>5}  {_clock(now - m.started):>5}  ")
+        lines.append((row + m.detail)[:width])
+    done = sum(m.ok is not None for m in monitors)
+    lines.append(f"{done}/{len(monitors)} done, {sum(m.ok is False for m in monitors)} failed | render: "
+                 f"{render.calls} calls, {render.throttled:.1f}s throttled"
+                 + (f", {render.rate_limited} rate-limited" if render.rate_limited else ""))
+    return lines
+
+
+def _print_changes(monitors: list[ServiceMonitor], seen: dict, out: TextIO) -> None:
+    for m in monitors:
+        if m.version != seen.get(id(m)):
+            seen[id(m)] = m.version
+            stamp = datetime.now().strftime("%H:%M:%S")
+            out.write(f"[{stamp}] {m.config.name}: {m.state}{f' ({m.detail})' if m.detail else ''}\n")
+    out.flush()
+
+
+async def _display(monitors: list[ServiceMonitor], render: RenderLimiter, out: TextIO, live: bool,
+                   seen: dict) -> None:
+    """Redraw the table in place on a terminal; otherwise print one line per change."""
+    drawn = 0
+    while True:
+        if live:
+            width = os.get_terminal_size(out.fileno()).columns if out.isatty() else 120
+            lines = format_table(monitors, render, width)
+            # Cursor to the first line of the previous frame, then overwrite and clear each line
+            out.write((f"\033[{drawn}F" if drawn else "") + "".join(f"{line}\033[K\n" for line in lines))
+            out.flush()
+            drawn = len(lines)
+        else:
+            _print_changes(monitors, seen, out)
+        await asyncio.sleep(REDRAW_INTERVAL)
+
+
+async def run_fleet(config: FleetConfig, verify_only: bool = False, live: Optional[bool] = None,
+                    out: TextIO = sys.stdout, timeline_path: Optional[str] = None) -> list[ServiceMonitor]:
+    """Monitor every service concurrently; returns the monitors with their verdicts."""
+    render = RenderLimiter(config.render_rate, config.render_burst, config.render_concurrency)
+    monitors = [ServiceMonitor(s, render, config, verify_only, timeline_path) for s in config.services]
+    live = out.isatty() if live is None else live
+    seen: dict = {}
+    display = asyncio.create_task(_display(monitors, render, out, live, seen))
+    try:
+        await asyncio.gather(*(m.run() for m in monitors))
+    finally:
+        display.cancel()
+        await asyncio.gather(display, return_exceptions=True)
+    # The last frame may predate the final verdicts
+    if live:
+        out.write("\n".join(format_table(monitors, render, 1000)) + "\n\n")
+    else:
+        _print_changes(monitors, seen, out)
+        out.write("\n".join(format_table(monitors, render, 1000)) + "\n")
+    for m in monitors:
+        for r in m.results:
+            if r.required and not r.ok:
+                out.write(f"{m.config.name}: {r.name} failed: {r.detail}\n")
+    return monitors
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Monitor and verify deploys of several Render services at once")
+    parser.add_argument("config", help="fleet JSON config")
+    parser.add_argument("--verify-only", action="store_true", help="skip deploy polling, only run the checks")
+    parser.add_argument("--plain", action="store_true", help="print state changes instead of a live table")
+    args = parser.parse_args(argv)
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError) as e:
+        print(f"fleet config: {e}", file=sys.stderr)
+        return 2
+    monitors = asyncio.run(run_fleet(config, args.verify_only, live=False if args.plain else None))
+    return 0 if all(m.ok for m in monitors) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
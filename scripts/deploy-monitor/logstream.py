@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Streaming log analysis with bounded memory
+
+`monitor_logs_realtime` used to start ``render logs --follow``, sleep, and
+kill it without reading a line. Failed deploys printed the last 2000
+characters of the log. `LogAnalyzer` reads a log one line at a time and
+keeps only aggregates:
+
+- each line is classified by pre-compiled patterns: error, timeout, and
+  request lines that carry a duration (``GET /x 200 1234ms``,
+  ``--> POST /v1/knowledge/query 200 2s``)
+- sliding-window rates over the last WINDOW seconds, in one-second buckets:
+  lines, errors, timeouts, and a log-scale latency histogram for p50/p95
+- error exemplars grouped by signature (numbers, hex ids and UUIDs masked)
+  with counts, capped at MAX_SIGNATURES (least frequent evicted), plus the
+  SLOWEST_K slowest requests
+
+Memory stays the same whether the follow runs for a minute or a day.
+
+    render logs srv-... --tail 100 --follow | python3 logstream.py
+    python3 logstream.py saved.log --json
+"""
+
+import argparse
+import asyncio
+import heapq
+import json
+import math
+import re
+import shlex
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+WINDOW = 60                   # seconds for rates
+MAX_SIGNATURES = 200
+TOP_K = 5
+SLOWEST_K = 5
+SLOW_MS = 2000.0
+LATENCY_BINS = 64             # log2-spaced buckets, 4 per octave, from 1 ms
+REPORT_INTERVAL = 10.0
+
+# Case-sensitive on purpose: "errors: 0" or "error_rate" in an info line is not an error
+ERROR_RE = re.compile(
+    r"\b(?:ERROR|FATAL|CRITICAL|Unhandled|Uncaught|Traceback|panic:)|\bError:|\b[A-Z]\w*(?:Error|Exception)\b"
+    r"|\blevel[=:]\s*\"?(?:error|fatal|ERROR|FATAL)\b|\bstatus[=:]\s*5\d\d\b")
+TIMEOUT_RE = re.compile(r"\btimed?\s?out\b|ETIMEDOUT|ESOCKETTIMEDOUT|deadline exceeded", re.IGNORECASE)
+# Method, path, optional status, then a duration in ms or s
+REQUEST_RE = re.compile(
+    r"\b(GET|POST|PUT|PATCH|DELETE|HEAD|OPTIONS)\s+(\S+)(?:\s+(\d{3}))?\b.*?(\d+(?:\.\d+)?)\s?(ms|s)\b")
+# Render prefixes lines with an ISO timestamp; strip it before grouping
+TIMESTAMP_RE = re.compile(r"^\s*\[?\d{4}-\d{2}-\d{2}[T ][\d:.]+Z?\]?\s*")
+SIGNATURE_RE = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|0x[0-9a-f]+|\b(?=[0-9a-f]*\d)[0-9a-f]{4,}\b|\d+", re.IGNORECASE)
+
+
+def _latency_bin(ms: float) -> int:
+    return max(0, min(LATENCY_BINS - 1, int(math.log2(max(ms, 1.0)) * 4)))
+
+
+def _bin_value(index: int) -> float:
+    return 2 ** ((index + 0.5) / 4)
+
+
+@dataclass
+class _Bucket:
+    second: int
+    lines: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    slow: int = 0
+    latency: Optional[list] = None
+
+
+class LogAnalyzer:
+    """Incremental line classifier with sliding-window rates and bounded exemplars."""
+
+    def __init__(self, window: int = WINDOW, slow_ms: float = SLOW_MS, clock: Callable[[], float] = time.time):
+        self.window = window
+        self.slow_ms = slow_ms
+        self.clock = clock
+        self.buckets: deque = deque()
+        self.totals = {"lines": 0, "errors": 0, "timeouts": 0, "requests": 0, "slow": 0}
+        self.signatures: dict[str, list] = {}    # signature -> [count, first example]
+        self.slowest: list = []                  # min-heap of (ms, line)
+        self.started = clock()
+
+    def _bucket(self, now: float) -> _Bucket:
+        second = int(now)
+        if not self.buckets or self.buckets[-1].second != second:
+            self.buckets.append(_Bucket(second))
+        while self.buckets and self.buckets[0].second <= second - self.window:
+            self.buckets.popleft()
+        return self.buckets[-1]
+
+    def _remember_error(self, line: str) -> None:
+        text = TIMESTAMP_RE.sub("", line).strip()
+        signature = SIGNATURE_RE.sub("#", text)[:160]
+        entry = self.signatures.get(signature)
+        if entry:
+            entry[0] += 1
+            return
+        if len(self.signatures) >= MAX_SIGNATURES:
+            # Evict the rarest signature and let the newcomer inherit its count (space-saving),
+            # so counts stay upper bounds and frequent errors are never lost
+            rarest = min(self.signatures, key=lambda s: self.signatures[s][0])
+            count = self.signatures.pop(rarest)[0]
+            self.signatures[signature] = [count + 1, text[:300]]
+        else:
+            self.signatures[signature] = [1, text[:300]]
+
+    def feed(self, line: str, now: Optional[float] = None) -> None:
+        bucket = self._bucket(self.clock() if now is None else now)
+        bucket.lines += 1
+        self.totals["lines"] += 1
+        request = REQUEST_RE.search(line)
+        status = int(request.group(3)) if request and request.group(3) else 0
+        if request:
+            ms = float(request.group(4)) * (1000 if request.group(5) == "s" else 1)
+            self.totals["requests"] += 1
+            if bucket.latency is None:
+                bucket.latency = [0] * LATENCY_BINS
+            bucket.latency[_latency_bin(ms)] += 1
+            if ms >= self.slow_ms:
+                bucket.slow += 1
+                self.totals["slow"] += 1
+            item = (ms, line.strip()[:300])
+            if len(self.slowest) < SLOWEST_K:
+                heapq.heappush(self.slowest, item)
+            elif ms > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, item)
+        if status == 504 or TIMEOUT_RE.search(line):
+            bucket.timeouts += 1
+            self.totals["timeouts"] += 1
+        if status >= 500 or ERROR_RE.search(line):
+            bucket.errors += 1
+            self.totals["errors"] += 1
+            self._remember_error(line)
+
+    def window_stats(self, now: Optional[float] = None) -> dict:
+        """Rates and latency percentiles over the last ``window`` seconds."""
+        now = self.clock() if now is None else now
+        live = [b for b in self.buckets if b.second > now - self.window]
+        lines = sum(b.lines for b in live)
+        histogram = [0] * LATENCY_BINS
+        for b in live:
+            if b.latency:
+                histogram = [x + y for x, y in zip(histogram, b.latency)]
+        requests = sum(histogram)
+        span = min(self.window, max(1.0, now - self.started))
+        stats = {
+            "lines_per_s": round(lines / span, 2),
+            "errors_per_min": round(sum(b.errors for b in live) / span * 60, 2),
+            "timeouts_per_min": round(sum(b.timeouts for b in live) / span * 60, 2),
+            "error_ratio": round(sum(b.errors for b in live) / lines, 4) if lines else 0.0,
+            "requests": requests,
+            "slow_ratio": round(sum(b.slow for b in live) / requests, 4) if requests else 0.0,
+        }
+        for pct in (50, 95):
+            stats[f"latency_p{pct}_ms"] = round(self._histogram_percentile(histogram, pct), 1) if requests else None
+        return stats
+
+    @staticmethod
+    def _histogram_percentile(histogram: list, pct: float) -> float:
+        target = sum(histogram) * pct / 100
+        seen = 0
+        for index, count in enumerate(histogram):
+            seen += count
+            if seen >= target and count:
+                return _bin_value(index)
+        return 0.0
+
+    def top_errors(self, k: int = TOP_K) -> list[tuple[int, str]]:
+        return [(count, example) for count, example in
+                heapq.nlargest(k, self.signatures.values(), key=lambda entry: entry[0])]
+
+    def summary(self, now: Optional[float] = None) -> dict:
+        return {
+            "totals": dict(self.totals),
+            "window": self.window_stats(now),
+            "top_errors": self.top_errors(),
+            "slowest": [{"ms": ms, "line": line} for ms, line in sorted(self.slowest, reverse=True)],
+        }
+
+    def status_line(self, now: Optional[float] = None) -> str:
+        w = self.window_stats(now)
+        latency = f", p50 {w['latency_p50_ms']:.0f} / p95 {w['latency_p95_ms']:.0f} ms" if w["requests"] else ""
+        return (f"{self.totals['lines']} lines, last {self.window}s: {w['errors_per_min']:.1f} errors/min, "
+                f"{w['timeouts_per_min']:.1f} timeouts/min, {w['requests']} requests{latency}")
+
+    def format_report(self, live: bool = True) -> list[str]:
+        """Status plus top error signatures and slow requests; ``live=False`` reports totals, not rates."""
+        t = self.totals
+        lines = [self.status_line() if live else
+                 f"{t['lines']} lines: {t['errors']} errors, {t['timeouts']} timeouts, "
+                 f"{t['requests']} requests ({t['slow']} over {self.slow_ms:.0f} ms)"]
+        for count, example in self.top_errors():
+            lines.append(f"  {count:>5} x {example[:160]}")
+        for ms, line in sorted(self.slowest, reverse=True)[:3]:
+            if ms >= self.slow_ms:
+                lines.append(f"  slow {ms:.0f} ms: {line[:150]}")
+        return lines
+
+
+def analyze_text(text: str, window: int = WINDOW) -> LogAnalyzer:
+    """Analyze an already-fetched log (e.g. ``render logs --tail 100``)."""
+    analyzer = LogAnalyzer(window=window)
+    for line in text.splitlines():
+        analyzer.feed(line)
+    return analyzer
+
+
+async def follow(command: str, duration: float, analyzer: LogAnalyzer,
+                 on_report: Optional[Callable[[LogAnalyzer], None]] = None,
+                 report_interval: float = REPORT_INTERVAL) -> LogAnalyzer:
+    """Run ``command`` (no shell), feed its stdout line by line for ``duration`` seconds."""
+    process = await asyncio.create_subprocess_exec(
+        *shlex.split(command), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+    stop_at = time.monotonic() + duration
+    next_report = time.monotonic() + report_interval
+    try:
+        while True:
+            remaining = stop_at - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                raw = await asyncio.wait_for(process.stdout.readline(), min(remaining, report_interval))
+            except asyncio.TimeoutError:
+                raw = None
+            if raw == b"":
+                break  # the command exited
+            if raw:
+                analyzer.feed(raw.decode("utf-8", errors="replace"))
+            if on_report and time.monotonic() >= next_report:
+                on_report(analyzer)
+                next_report = time.monotonic() + report_interval
+    finally:
+        if process.returncode is None:
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), 5)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+    return analyzer
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Classify a log stream and keep bounded aggregates")
+    parser.add_argument("log", nargs="?", help="log file; stdin when omitted")
+    parser.add_argument("--window", type=int, default=WINDOW)
+    parser.add_argument("--slow-ms", type=float, default=SLOW_MS)
+    parser.add_argument("--report-every", type=float, default=REPORT_INTERVAL, help="seconds between status lines (stdin)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    analyzer = LogAnalyzer(window=args.window, slow_ms=args.slow_ms)
+    source = open(args.log, "r", encoding="utf-8", errors="replace") if args.log else sys.stdin
+    next_report = time.monotonic() + args.report_every
+    try:
+        for line in source:
+            analyzer.feed(line)
+            if not args.log and not args.json and time.monotonic() >= next_report:
+                print(analyzer.status_line(), flush=True)
+                next_report = time.monotonic() + args.report_every
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.log:
+            source.close()
+    if args.json:
+        print(json.dumps(analyzer.summary(), indent=2))
+    else:
+        print("\n".join(analyzer.format_report(live=not args.log)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
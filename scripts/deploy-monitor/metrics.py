@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+CPU and memory before and after a deploy
+
+`render metrics ... -o json` used to be fetched, parsed and dropped. Here the
+series are loaded into fixed-size ring buffers (two ``array('d')`` per
+series: timestamps and values). Then the window before go-live is compared
+with the window after it:
+
+- mean and p95 before and after, plus a rolling mean/p95 over the last
+  ROLLING_POINTS samples
+- a one-sided CUSUM, standardized by the pre-deploy mean and spread, finds
+  the first post-deploy point where the level shifted up
+- for memory, the least-squares slope after go-live in MB/hour. A steady
+  climb that began at the deploy is flagged as a leak.
+
+`watch()` keeps polling after verification, appends only new points to the
+buffers and prints the verdict whenever it changes. Leaks and CPU regressions
+then show up within minutes of go-live. Verdicts are appended to
+tmp/deploy-monitor/metrics.jsonl.
+
+    python3 metrics.py saved-metrics.json --deployed-at 2026-01-03T07:40:00Z
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from array import array
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable, Optional
+
+from probes import percentile
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+STATE_DIR = os.environ.get("DEPLOY_MONITOR_DIR", os.path.join(REPO_ROOT, "tmp", "deploy-monitor"))
+VERDICTS_FILE = os.path.join(STATE_DIR, "metrics.jsonl")
+CAPACITY = 4096               # points per series; 1-minute samples for ~3 days
+PRE_WINDOW = 30 * 60          # seconds of history before go-live to compare against
+ROLLING_POINTS = 5
+CUSUM_DRIFT = 0.5             # slack, in pre-deploy standard deviations
+CUSUM_LIMIT = 5.0             # alarm level, in pre-deploy standard deviations
+CPU_REGRESSION = 0.25         # post mean this much above pre mean
+LEAK_MB_PER_HOUR = 50.0
+WATCH_INTERVAL = 60
+
+
+class RingBuffer:
+    """Fixed-capacity (timestamp, value) series; the oldest points are overwritten."""
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.capacity = capacity
+        self._ts = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._start = 0
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    @property
+    def last_ts(self) -> float:
+        return self._ts[(self._start + self._len - 1) % self.capacity] if self._len else -math.inf
+
+    def append(self, ts: float, value: float) -> None:
+        end = (self._start + self._len) % self.capacity
+        self._ts[end] = ts
+        self._values[end] = value
+        if self._len < self.capacity:
+            self._len += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def extend(self, points: Iterable[tuple[float, float]]) -> int:
+        """Append points newer than the last one held; returns how many were added."""
+        added = 0
+        for ts, value in sorted(points):
+            if ts > self.last_ts:
+                self.append(ts, value)
+                added += 1
+        return added
+
+    def __iter__(self):
+        for i in range(self._len):
+            j = (self._start + i) % self.capacity
+            yield self._ts[j], self._values[j]
+
+    def window(self, start: float = -math.inf, end: float = math.inf) -> tuple[list[float], list[float]]:
+        """Timestamps and values with ``start <= ts < end``."""
+        ts, values = [], []
+        for t, v in self:
+            if start <= t < end:
+                ts.append(t)
+                values.append(v)
+        return ts, values
+
+
+def parse_time(value) -> float:
+    """Epoch seconds from epoch seconds/milliseconds or an ISO 8601 string."""
+    if isinstance(value, str) and value.replace(".", "", 1).isdigit():
+        value = float(value)
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e12 else float(value)
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+def _metric_name(entry: dict) -> str:
+    for key in ("metric", "name", "type"):
+        if entry.get(key):
+            return str(entry[key])
+    labels = {label.get("field"): label.get("value") for label in entry.get("labels") or [] if isinstance(label, dict)}
+    for key in ("metric", "name"):
+        if labels.get(key):
+            return str(labels[key])
+    unit = (entry.get("unit") or "").lower()
+    return "memory_usage" if unit in ("bytes", "mb", "gb") else "cpu_usage"
+
+
+def _points(raw) -> list[tuple[float, float]]:
+    points = []
+    for point in raw or []:
+        if isinstance(point, dict):
+            ts = point.get("timestamp", point.get("time", point.get("t")))
+            value = point.get("value", point.get("v"))
+        else:
+            ts, value = point[0], point[1]
+        if ts is not None and value is not None:
+            points.append((parse_time(ts), float(value)))
+    return points
+
+
+def parse_metrics(payload) -> dict[str, list[tuple[float, float]]]:
+    """
+    Series by metric name from `render metrics -o json` output.
+
+    Accepts the Render API shape (``[{"labels": [...], "unit": ..., "values":
+    [{"timestamp", "value"}]}]``), a list of ``{"metric": name, "values" |
+    "data" | "points": [...]}``, or a ``{name: [points]}`` mapping.
+    """
+    series: dict[str, list[tuple[float, float]]] = {}
+    if isinstance(payload, dict) and not any(k in payload for k in ("values", "data", "points")):
+        entries = [{"metric": name, "values": points} for name, points in payload.items()]
+    else:
+        entries = payload if isinstance(payload, list) else [payload]
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        raw = entry.get("values") or entry.get("data") or entry.get("points")
+        series.setdefault(_metric_name(entry), []).extend(_points(raw))
+    return series
+
+
+def cusum_change_point(values: list[float], mean: float, std: float) -> Optional[int]:
+    """Index of the first upward level shift, or None (one-sided standardized CUSUM)."""
+    total = 0.0
+    start = 0
+    for i, value in enumerate(values):
+        step = (value - mean) / std - CUSUM_DRIFT
+        if total + step <= 0:
+            total, start = 0.0, i + 1
+        else:
+            total += step
+        if total > CUSUM_LIMIT:
+            return start
+    return None
+
+
+def slope_per_hour(ts: list[float], values: list[float]) -> float:
+    if len(ts) < 3:
+        return 0.0
+    mean_t, mean_v = statistics.fmean(ts), statistics.fmean(values)
+    var = sum((t - mean_t) ** 2 for t in ts)
+    if not var:
+        return 0.0
+    return sum((t - mean_t) * (v - mean_v) for t, v in zip(ts, values)) / var * 3600
+
+
+@dataclass
+class SeriesVerdict:
+    metric: str
+    status: str                     # ok | regression | leak | insufficient_data
+    pre_mean: float = 0.0
+    post_mean: float = 0.0
+    pre_p95: float = 0.0
+    post_p95: float = 0.0
+    rolling_mean: float = 0.0
+    rolling_p95: float = 0.0
+    change_at: Optional[float] = None
+    slope_per_hour: float = 0.0
+    pre_points: int = 0
+    post_points: int = 0
+    notes: list = field(default_factory=list)
+
+    def describe(self) -> str:
+        if self.status == "insufficient_data":
+            return f"{self.metric}: not enough data ({self.pre_points} before, {self.post_points} after go-live)"
+        in_bytes = abs(self.pre_mean) > 2**20
+        fmt = (lambda v: f"{v / 2**20:.0f} MB") if in_bytes else (lambda v: f"{v:.2f}")
+        text = (f"{self.metric}: mean {fmt(self.pre_mean)} -> {fmt(self.post_mean)}, "
+                f"p95 {fmt(self.pre_p95)} -> {fmt(self.post_p95)}, last {ROLLING_POINTS} avg {fmt(self.rolling_mean)}")
+        if "memory" in self.metric or in_bytes:
+            text += f", {self.slope_per_hour / (2**20 if in_bytes else 1):+.0f} MB/h"
+        if self.change_at:
+            text += f", shift at {datetime.fromtimestamp(self.change_at).strftime('%H:%M')}"
+        return f"{text} [{self.status.upper()}]"
+
+
+def _looks_like_bytes(values: list[float]) -> bool:
+    return bool(values) and statistics.median(values) > 2**20
+
+
+def compare(name: str, buffer: RingBuffer, deployed_at: float, pre_window: float = PRE_WINDOW) -> SeriesVerdict:
+    """Line up the pre- and post-deploy windows of one series and judge the post window."""
+    pre_ts, pre = buffer.window(deployed_at - pre_window, deployed_at)
+    post_ts, post = buffer.window(deployed_at)
+    verdict = SeriesVerdict(name, "insufficient_data", pre_points=len(pre), post_points=len(post))
+    if len(pre) < 3 or len(post) < 2:
+        return verdict
+    mean = statistics.fmean(pre)
+    # Floor the spread so a perfectly flat baseline doesn't turn noise into alarms
+    std = max(statistics.pstdev(pre), abs(mean) * 0.02, 1e-9)
+    tail = post[-ROLLING_POINTS:]
+    verdict.pre_mean, verdict.post_mean = mean, statistics.fmean(post)
+    verdict.pre_p95, verdict.post_p95 = percentile(pre, 95), percentile(post, 95)
+    verdict.rolling_mean, verdict.rolling_p95 = statistics.fmean(tail), percentile(tail, 95)
+    change = cusum_change_point(post, mean, std)
+    verdict.change_at = post_ts[change] if change is not None else None
+    verdict.slope_per_hour = slope_per_hour(post_ts, post)
+    verdict.status = "ok"
+
+    if "memory" in name or _looks_like_bytes(pre):
+        leak_rate = LEAK_MB_PER_HOUR * 2**20 if _looks_like_bytes(pre) else LEAK_MB_PER_HOUR
+        pre_slope = slope_per_hour(pre_ts, pre)
+        if verdict.slope_per_hour > leak_rate and verdict.slope_per_hour > 2 * max(pre_slope, 0) and change is not None:
+            verdict.status = "leak"
+            verdict.notes.append("memory climbing steadily since go-live")
+    elif change is not None and verdict.post_mean > mean * (1 + CPU_REGRESSION):
+        verdict.status = "regression"
+        verdict.notes.append(f"mean up {verdict.post_mean / mean - 1:.0%} since go-live")
+    return verdict
+
+
+class MetricsMonitor:
+    """Ring buffers per metric plus the pre/post comparison."""
+
+    def __init__(self, deployed_at: float, capacity: int = CAPACITY, pre_window: float = PRE_WINDOW):
+        self.deployed_at = deployed_at
+        self.capacity = capacity
+        self.pre_window = pre_window
+        self.buffers: dict[str, RingBuffer] = {}
+
+    def ingest(self, payload) -> int:
+        added = 0
+        for name, points in parse_metrics(payload).items():
+            added += self.buffers.setdefault(name, RingBuffer(self.capacity)).extend(points)
+        return added
+
+    def verdicts(self) -> list[SeriesVerdict]:
+        return [compare(name, buffer, self.deployed_at, self.pre_window) for name, buffer in sorted(self.buffers.items())]
+
+    def summary(self) -> str:
+        verdicts = self.verdicts()
+        bad = [v for v in verdicts if v.status in ("regression", "leak")]
+        if bad:
+            return "; ".join(f"{v.metric} {v.status}" for v in bad)
+        return "ok" if any(v.status == "ok" for v in verdicts) else "insufficient data"
+
+
+def store(verdicts: list[SeriesVerdict], deployed_at: float, service: str = "", deploy_id: str = "",
+          path: str = VERDICTS_FILE) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    record = {"checked_at": time.time(), "deployed_at": deployed_at, "service": service, "deploy_id": deploy_id,
+              "verdicts": [asdict(v) for v in verdicts]}
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+async def watch(monitor: MetricsMonitor, fetch: Callable[[], Awaitable[Optional[object]]], duration: float,
+                report: Callable[[str, list[SeriesVerdict]], None], interval: float = WATCH_INTERVAL) -> list[SeriesVerdict]:
+    """Poll ``fetch`` for ``duration`` seconds; ``report`` is called whenever the summary changes."""
+    stop_at = time.monotonic() + duration
+    last = None
+    while True:
+        payload = await fetch()
+        if payload is not None:
+            monitor.ingest(payload)
+        summary = monitor.summary()
+        if summary != last:
+            report(summary, monitor.verdicts())
+            last = summary
+        if time.monotonic() + interval > stop_at:
+            return monitor.verdicts()
+        await asyncio.sleep(interval)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare CPU/memory before and after a deploy")
+    parser.add_argument("metrics_json", help="saved `render metrics ... -o json` output")
+    parser.add_argument("--deployed-at", required=True, help="ISO time or epoch seconds the deploy went live")
+    parser.add_argument("--pre-window", type=float, default=PRE_WINDOW / 60, help="minutes before go-live")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.metrics_json, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    monitor = MetricsMonitor(parse_time(args.deployed_at), pre_window=args.pre_window * 60)
+    monitor.ingest(payload)
+    verdicts = monitor.verdicts()
+    if args.json:
+        print(json.dumps([asdict(v) for v in verdicts], indent=2))
+    else:
+        for verdict in verdicts:
+            print(verdict.describe())
+    return 1 if any(v.status in ("regression", "leak") for v in verdicts) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Post-deploy performance regression gate
+
+Replays the query set from baseline-performance-2026-01-03.json against
+the Knowledge API (``POST /v1/knowledge/query``). Each response carries
+embedding_ms, search_ms, synthesis_ms and total_ms in ``metrics``. Those are
+compared with the baseline, phase by phase:
+
+- every (query, repetition) sample becomes a ratio to that query's baseline
+  value
+- the gate bootstraps the median ratio. A phase regresses when the lower end
+  of its 95% interval is above ``--max-ratio`` (1.5 by default), i.e. we are
+  confident it is at least that much slower, not just noisy
+- requests run with bounded concurrency (2 by default, close to the serial
+  run the baseline came from), each repetition with a slightly different
+  ``threshold`` so the response cache never answers
+- the embedding cache is keyed by query text, so only the first repetition of
+  a query has a real embedding time. Samples at or below CACHED_EMBEDDING_MS
+  don't count for embedding_ms or total_ms.
+
+Exit status is 1 on a regression, 2 if the service could not be measured.
+
+    python3 perf_gate.py http://localhost:3006
+    python3 perf_gate.py https://knowledge.example.com --repetitions 10 --max-ratio 1.3
+    python3 perf_gate.py http://localhost:3006 --write-baseline baseline-performance-$(date +%F).json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from probes import ProbePool, percentile
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+BASELINE_FILE = os.path.join(REPO_ROOT, "baseline-performance-2026-01-03.json")
+QUERY_ROUTE = "/v1/knowledge/query"
+PHASES = ("embedding_ms", "search_ms", "synthesis_ms", "total_ms")
+REPETITIONS = 5
+CONCURRENCY = 2
+MAX_RATIO = 1.5
+CONFIDENCE = 0.95
+BOOTSTRAP_ROUNDS = 2000
+CACHED_EMBEDDING_MS = 5       # embedding_ms at or below this came from the embedding cache
+BASE_THRESHOLD = 0.2          # the API's DEFAULT_THRESHOLD
+REQUEST_TIMEOUT = 60.0
+
+
+@dataclass
+class PhaseVerdict:
+    phase: str
+    samples: int
+    baseline_p50: float
+    current_p50: float
+    current_p95: float
+    ratio: float                  # median of current/baseline ratios
+    ratio_low: float              # lower end of the bootstrap interval
+    ratio_high: float
+    regressed: bool
+
+    def describe(self) -> str:
+        change = f"{self.ratio:.2f}x (95% CI {self.ratio_low:.2f}-{self.ratio_high:.2f})"
+        return (f"{self.phase}: p50 {self.current_p50:.0f} ms vs baseline {self.baseline_p50:.0f} ms, "
+                f"{change}, n={self.samples}{'  REGRESSION' if self.regressed else ''}")
+
+
+@dataclass
+class GateResult:
+    verdicts: list = field(default_factory=list)
+    samples: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+    @property
+    def measured(self) -> bool:
+        return any(v.samples for v in self.verdicts)
+
+    @property
+    def passed(self) -> bool:
+        return self.measured and not any(v.regressed for v in self.verdicts)
+
+
+def load_baseline(path: str = BASELINE_FILE) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def bootstrap_median(values: list[float], rounds: int = BOOTSTRAP_ROUNDS,
+                     confidence: float = CONFIDENCE, seed: int = 0) -> tuple[float, float]:
+    """Percentile-bootstrap interval for the median."""
+    if len(values) == 1:
+        return values[0], values[0]
+    rng = random.Random(seed)
+    medians = sorted(statistics.median(rng.choices(values, k=len(values))) for _ in range(rounds))
+    tail = (1 - confidence) / 2 * 100
+    return percentile(medians, tail), percentile(medians, 100 - tail)
+
+
+async def replay(pool: ProbePool, queries: list[str], repetitions: int,
+                 synthesize: bool = True) -> tuple[list[dict], list[str]]:
+    """Send every query ``repetitions`` times; returns per-request samples and errors."""
+    samples, errors = [], []
+
+    async def one(query: str, rep: int) -> None:
+        body = json.dumps({
+            "query": query,
+            "synthesize": synthesize,
+            # A different threshold per repetition misses the response cache without changing results
+            "threshold": BASE_THRESHOLD + rep * 1e-6,
+        }).encode("utf-8")
+        timing, data = await pool.fetch(QUERY_ROUTE, "POST", body, {"Content-Type": "application/json"})
+        if not timing.ok:
+            errors.append(f"{query[:40]!r}: {timing.error or f'HTTP {timing.status}'}")
+            return
+        try:
+            metrics = json.loads(data).get("metrics") or {}
+        except ValueError:
+            errors.append(f"{query[:40]!r}: response is not JSON")
+            return
+        if metrics.get("cache_hit"):
+            return
+        samples.append({"query": query, "rep": rep, "client_ms": round(timing.total, 1),
+                        **{phase: metrics.get(phase) for phase in PHASES}})
+
+    # Repetition-major order, so one slow moment doesn't land on a single query
+    await asyncio.gather(*(one(query, rep) for rep in range(repetitions) for query in queries))
+    return samples, errors
+
+
+def compare(baseline: dict, samples: list[dict], max_ratio: float = MAX_RATIO) -> list[PhaseVerdict]:
+    reference = {q["query"]: q for q in baseline.get("queries", [])}
+    verdicts = []
+    for phase in PHASES:
+        ratios, current = [], []
+        for sample in samples:
+            value = sample.get(phase)
+            base = reference.get(sample["query"], {}).get(phase)
+            if value is None or not base:
+                continue
+            if phase in ("embedding_ms", "total_ms") and (sample.get("embedding_ms") or 0) <= CACHED_EMBEDDING_MS:
+                continue
+            ratios.append(value / base)
+            current.append(value)
+        base_values = [q[phase] for q in reference.values() if q.get(phase)]
+        if not ratios:
+            verdicts.append(PhaseVerdict(phase, 0, statistics.median(base_values) if base_values else 0.0,
+                                         0.0, 0.0, 0.0, 0.0, 0.0, False))
+            continue
+        low, high = bootstrap_median(ratios)
+        verdicts.append(PhaseVerdict(
+            phase=phase,
+            samples=len(ratios),
+            baseline_p50=statistics.median(base_values),
+            current_p50=statistics.median(current),
+            current_p95=percentile(current, 95),
+            ratio=statistics.median(ratios),
+            ratio_low=low,
+            ratio_high=high,
+            regressed=low > max_ratio,
+        ))
+    return verdicts
+
+
+async def run_gate(base_url: str, baseline: dict, repetitions: int = REPETITIONS,
+                   concurrency: int = CONCURRENCY, max_ratio: float = MAX_RATIO,
+                   synthesize: bool = True) -> GateResult:
+    queries = [q["query"] for q in baseline.get("queries", []) if q.get("query")]
+    pool = ProbePool(base_url, size=concurrency, timeout=REQUEST_TIMEOUT)
+    try:
+        samples, errors = await replay(pool, queries, repetitions, synthesize)
+    finally:
+        pool.close()
+    return GateResult(compare(baseline, samples, max_ratio), samples, errors)
+
+
+def baseline_from_samples(samples: list[dict], base_url: str) -> dict:
+    """A new baseline file in the same shape as baseline-performance-2026-01-03.json."""
+    queries = []
+    for query in dict.fromkeys(s["query"] for s in samples):
+        rows = [s for s in samples if s["query"] == query]
+        cold = [s for s in rows if (s.get("embedding_ms") or 0) > CACHED_EMBEDDING_MS] or rows
+        entry = {"query": query}
+        for phase in PHASES:
+            values = [s[phase] for s in (cold if phase in ("embedding_ms", "total_ms") else rows)
+                      if s.get(phase) is not None]
+            if values:
+                entry[phase] = round(statistics.median(values))
+        queries.append(entry)
+    averages = {phase: round(statistics.mean(q[phase] for q in queries if phase in q))
+                for phase in PHASES if any(phase in q for q in queries)}
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+        "test": "perf-gate-replay",
+        "description": f"Median per query over perf_gate.py repetitions against {base_url}",
+        "queries": queries,
+        "averages": averages,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fail a deploy whose RAG latency regressed against the baseline")
+    parser.add_argument("base_url", help="Knowledge API base URL, e.g. http://localhost:3006")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--repetitions", type=int, default=REPETITIONS)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--max-ratio", type=float, default=MAX_RATIO,
+                        help="fail when a phase is confidently this many times slower than the baseline")
+    parser.add_argument("--no-synthesis", action="store_true", help="skip LLM synthesis (synthesis_ms not compared)")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--write-baseline", metavar="PATH", help="also save this run as a new baseline file")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    result = asyncio.run(run_gate(args.base_url, baseline, args.repetitions, args.concurrency,
+                                  args.max_ratio, not args.no_synthesis))
+    if args.json:
+        print(json.dumps({"passed": result.passed, "verdicts": [v.__dict__ for v in result.verdicts],
+                          "errors": result.errors}, indent=2))
+    else:
+        for verdict in result.verdicts:
+            if verdict.samples:
+                print(verdict.describe())
+        for error in result.errors[:5]:
+            print(f"error: {error}")
+    if args.write_baseline and result.samples:
+        with open(args.write_baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline_from_samples(result.samples, args.base_url), f, indent=2)
+    if not result.measured:
+        return 2
+    return 0 if result.passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Pooled HTTP probes with per-phase timings
+
+Replaces forking ``curl`` through a shell for every health check. A
+`ProbePool` keeps keep-alive connections to one origin, so repeated probes
+skip DNS, TCP and TLS setup. Every request records:
+
+    dns, connect, tls    only on requests that opened a new connection
+    ttfb                 request sent -> response headers parsed
+    total                start -> body fully read
+
+`ProbePool.burst()` fires N probes at a list of routes with bounded
+concurrency, and `summarize()` turns the timings into p50/p95/p99. Deploy
+verification can then report whether the service is fast as well as up.
+
+    python3 probes.py https://iamsiam.ai /api/health / -n 50 -c 8
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import queue
+import socket
+import ssl
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+from urllib.parse import urlsplit
+
+DEFAULT_TIMEOUT = 10.0
+POOL_SIZE = 8
+PHASES = ("dns", "connect", "tls", "ttfb", "total")
+USER_AGENT = "siam-deploy-monitor/1.0"
+
+
+@dataclass
+class ProbeTiming:
+    route: str
+    status: int = 0
+    dns: float = 0.0          # milliseconds
+    connect: float = 0.0
+    tls: float = 0.0
+    ttfb: float = 0.0
+    total: float = 0.0
+    bytes: int = 0
+    reused: bool = False
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error and 200 <= self.status < 400
+
+
+class ProbePool:
+    """Keep-alive connections to one origin, shared by sync and asyncio callers."""
+
+    def __init__(self, base_url: str, size: int = POOL_SIZE, timeout: float = DEFAULT_TIMEOUT):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "https"
+        self.host = parts.hostname or ""
+        self.port = parts.port or (443 if self.scheme == "https" else 80)
+        self.prefix = parts.path.rstrip("/")
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+        self._ssl = ssl.create_default_context() if self.scheme == "https" else None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _open(self, timing: ProbeTiming) -> http.client.HTTPConnection:
+        start = time.perf_counter()
+        family, kind, proto, _, address = socket.getaddrinfo(self.host, self.port, type=socket.SOCK_STREAM)[0]
+        resolved = time.perf_counter()
+        sock = socket.socket(family, kind, proto)
+        sock.settimeout(self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            sock.connect(address)
+            connected = time.perf_counter()
+            if self._ssl:
+                sock = self._ssl.wrap_socket(sock, server_hostname=self.host)
+        except BaseException:
+            sock.close()
+            raise
+        handshaken = time.perf_counter()
+        timing.dns = (resolved - start) * 1000
+        timing.connect = (connected - resolved) * 1000
+        timing.tls = (handshaken - connected) * 1000 if self._ssl else 0.0
+        conn_class = http.client.HTTPSConnection if self._ssl else http.client.HTTPConnection
+        conn = conn_class(self.host, self.port, timeout=self.timeout)
+        conn.sock = sock  # already connected; http.client reuses it as is
+        return conn
+
+    def request(self, route: str, method: str = "GET", body: Optional[bytes] = None,
+                headers: Optional[dict] = None) -> tuple[ProbeTiming, bytes]:
+        """One blocking request; returns the timing and the response body."""
+        timing = ProbeTiming(route)
+        start = time.perf_counter()
+        data = b""
+        conn = None
+        try:
+            try:
+                conn = self._idle.get_nowait()
+                timing.reused = True
+            except queue.Empty:
+                conn = self._open(timing)
+            sent = time.perf_counter()
+            headers = {"User-Agent": USER_AGENT, "Connection": "keep-alive", **(headers or {})}
+            try:
+                conn.request(method, self.prefix + route, body=body, headers=headers)
+                response = conn.getresponse()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                if not timing.reused:
+                    raise
+                # The server closed an idle keep-alive connection; retry once on a fresh one
+                conn.close()
+                timing.reused = False
+                conn = self._open(timing)
+                sent = time.perf_counter()
+                conn.request(method, self.prefix + route, body=body, headers=headers)
+                response = conn.getresponse()
+            timing.ttfb = (time.perf_counter() - sent) * 1000
+            data = response.read()
+            timing.status = response.status
+            timing.bytes = len(data)
+            if response.will_close:
+                conn.close()
+            else:
+                self._idle.put(conn)
+            conn = None
+        except (OSError, http.client.HTTPException) as e:
+            timing.error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+        finally:
+            if conn is not None:
+                conn.close()
+            timing.total = (time.perf_counter() - start) * 1000
+        return timing, data
+
+    async def fetch(self, route: str, method: str = "GET", body: Optional[bytes] = None,
+                    headers: Optional[dict] = None) -> tuple[ProbeTiming, bytes]:
+        """`request()` on a worker thread, at most ``size`` at a time."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.size)
+        async with self._semaphore:
+            return await asyncio.to_thread(self.request, route, method, body, headers)
+
+    async def probe(self, route: str) -> ProbeTiming:
+        return (await self.fetch(route))[0]
+
+    async def burst(self, routes: list[str], n: int) -> list[ProbeTiming]:
+        """``n`` probes per route, interleaved, with the pool's concurrency."""
+        return list(await asyncio.gather(*(self.probe(route) for _ in range(n) for route in routes)))
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Linear-interpolated percentile, ``pct`` in 0..100."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(timings: list[ProbeTiming]) -> dict:
+    """Per-route success counts and p50/p95/p99 for every phase, in ms."""
+    summary = {}
+    for route in dict.fromkeys(t.route for t in timings):
+        rows = [t for t in timings if t.route == route]
+        ok = [t for t in rows if t.ok]
+        fresh = [t for t in ok if not t.reused]
+        stats = {"probes": len(rows), "ok": len(ok), "reused": len(ok) - len(fresh),
+                 "errors": sorted({t.error or f"HTTP {t.status}" for t in rows if not t.ok})[:3]}
+        for phase in PHASES:
+            # Connection setup phases only mean something on new connections
+            values = [getattr(t, phase) for t in (fresh if phase in ("dns", "connect", "tls") else ok)]
+            stats[phase] = {f"p{p}": round(percentile(values, p), 1) for p in (50, 95, 99)} if values else None
+        summary[route] = stats
+    return summary
+
+
+def format_summary(summary: dict) -> list[str]:
+    lines = []
+    for route, stats in summary.items():
+        total, ttfb = stats["total"], stats["ttfb"]
+        line = f"{route}: {stats['ok']}/{stats['probes']} ok"
+        if total:
+            line += (f", total p50 {total['p50']:.0f} / p95 {total['p95']:.0f} / p99 {total['p99']:.0f} ms"
+                     f", ttfb p50 {ttfb['p50']:.0f} ms")
+        if stats["connect"]:
+            line += f", new conn dns {stats['dns']['p50']:.0f} + tcp {stats['connect']['p50']:.0f}"
+            line += f" + tls {stats['tls']['p50']:.0f} ms" if stats["tls"]["p50"] else " ms"
+        if stats["errors"]:
+            line += f" ({'; '.join(stats['errors'])})"
+        lines.append(line)
+    return lines
+
+
+async def _main(args) -> int:
+    pool = ProbePool(args.base_url, size=args.concurrency, timeout=args.timeout)
+    try:
+        timings = await pool.burst(args.routes or ["/api/health"], args.n)
+    finally:
+        pool.close()
+    summary = summarize(timings)
+    if args.json:
+        print(json.dumps({"summary": summary, "probes": [asdict(t) for t in timings]} if args.raw else summary, indent=2))
+    else:
+        print("\n".join(format_summary(summary)))
+    return 0 if all(t.ok for t in timings) else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Pooled HTTP latency probes")
+    parser.add_argument("base_url")
+    parser.add_argument("routes", nargs="*")
+    parser.add_argument("-n", type=int, default=20, help="probes per route")
+    parser.add_argument("-c", "--concurrency", type=int, default=POOL_SIZE)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--raw", action="store_true", help="with --json, include every probe")
+    return asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Deploy timeline store
+
+monitor-deployment.py sees each deploy move through build_in_progress ->
+pre_deploy_in_progress -> update_in_progress -> live. This records every
+run's phase durations, deploy id, commit and outcome in SQLite
+(tmp/deploy-monitor/timeline.sqlite) and reports per-phase trends:
+
+- p50/p90 per phase over the last N deploys, a text percentile bar, and a
+  sparkline of the rolling median over the last 2N
+- a regression alert when a phase's median over the last N deploys is more
+  than ALERT_RATIO above its median over the N before that
+
+Phase boundaries are the first poll that saw each status, so they are
+accurate to the poll interval (5 s). When monitoring begins during the build
+and Render reports the deploy's ``createdAt``, the build phase starts there.
+Otherwise, a phase that was already running when monitoring began (including
+a later phase, which ``createdAt`` says nothing about) is marked partial and
+left out of the trends.
+
+    python3 timeline.py report
+    python3 timeline.py report --service srv-... --last 20 --alert 0.3
+    python3 timeline.py list --limit 10
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+from datetime import datetime
+from typing import Optional
+
+from metrics import STATE_DIR
+from probes import percentile
+
+DB_FILE = os.path.join(STATE_DIR, "timeline.sqlite")
+PHASE_ORDER = ("build_in_progress", "pre_deploy_in_progress", "update_in_progress")
+# Render reports a failure by the phase that failed
+FAILED = ("failed", "build_failed", "pre_deploy_failed", "update_failed")
+TERMINAL = ("live", "canceled", "deactivated", "timeout") + FAILED
+LAST_N = 20
+ALERT_RATIO = 0.2
+SPARK = "▁▂▃▄▅▆▇█"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deploys (
+    deploy_id TEXT PRIMARY KEY,
+    service TEXT NOT NULL,
+    commit_id TEXT,
+    commit_message TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    outcome TEXT,
+    total_s REAL
+);
+CREATE TABLE IF NOT EXISTS phases (
+    deploy_id TEXT NOT NULL REFERENCES deploys(deploy_id) ON DELETE CASCADE,
+    phase TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    duration_s REAL NOT NULL,
+    partial INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (deploy_id, phase)
+);
+CREATE INDEX IF NOT EXISTS deploys_by_service ON deploys (service, started_at);
+"""
+
+
+class Timeline:
+    """SQLite store of deploy phase timings; safe to share between monitor processes."""
+
+    def __init__(self, path: str = DB_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(SCHEMA)
+
+    def record(self, deploy_id: str, service: str, transitions: list[tuple[str, float]], outcome: str,
+               finished_at: float, commit_id: str = "", commit_message: str = "",
+               created_at: Optional[float] = None) -> None:
+        """
+        Store one deploy. ``transitions`` are ``(status, first_seen_epoch)`` in
+        order; each phase lasts until the next transition (or ``finished_at``).
+        """
+        if not transitions:
+            return
+        first_status, first_seen = transitions[0]
+        # createdAt is when the build began, so it only anchors a first phase that is the build
+        anchored = bool(created_at) and created_at <= first_seen and first_status == PHASE_ORDER[0]
+        started_at = created_at if anchored else first_seen
+        rows = []
+        for i, (status, seen_at) in enumerate(transitions):
+            if status in TERMINAL:
+                break
+            end = transitions[i + 1][1] if i + 1 < len(transitions) else finished_at
+            begin = started_at if i == 0 else seen_at
+            # Joined mid-phase with nothing to anchor it: the duration is a lower bound
+            partial = i == 0 and not anchored
+            rows.append((deploy_id, status, begin, max(0.0, end - begin), int(partial)))
+        with self._db:
+            self._db.execute("DELETE FROM deploys WHERE deploy_id = ?", (deploy_id,))
+            self._db.execute("INSERT INTO deploys VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (deploy_id, service, commit_id, (commit_message or "").splitlines()[0][:200]
+                              if commit_message else "", started_at, finished_at, outcome, finished_at - started_at))
+            self._db.executemany("INSERT INTO phases VALUES (?, ?, ?, ?, ?)", rows)
+
+    def deploys(self, service: Optional[str] = None, limit: int = 50) -> list[dict]:
+        query = "SELECT * FROM deploys" + (" WHERE service = ?" if service else "") + " ORDER BY started_at DESC LIMIT ?"
+        cursor = self._db.execute(query, (service, limit) if service else (limit,))
+        names = [c[0] for c in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def phase_history(self, service: Optional[str] = None, limit: int = 2 * LAST_N) -> dict[str, list[tuple]]:
+        """Phase -> [(started_at, duration_s, deploy_id, commit_id)] for the last ``limit`` successful deploys, oldest first."""
+        query = """
+            SELECT p.phase, d.started_at, p.duration_s, d.deploy_id, d.commit_id FROM phases p
+            JOIN (SELECT * FROM deploys WHERE outcome = 'live' {where} ORDER BY started_at DESC LIMIT ?) d
+              ON d.deploy_id = p.deploy_id
+            WHERE p.partial = 0
+            ORDER BY d.started_at
+        """.format(where="AND service = ?" if service else "")
+        history: dict[str, list[tuple]] = {}
+        for phase, started_at, duration, deploy_id, commit_id in self._db.execute(
+                query, (service, limit) if service else (limit,)):
+            history.setdefault(phase, []).append((started_at, duration, deploy_id, commit_id))
+        return history
+
+    def report(self, service: Optional[str] = None, last: int = LAST_N, alert: float = ALERT_RATIO) -> dict:
+        """Per-phase stats over the last ``last`` deploys vs the ``last`` before them."""
+        history = self.phase_history(service, 2 * last)
+        phases = {}
+        for phase in sorted(history, key=lambda p: PHASE_ORDER.index(p) if p in PHASE_ORDER else len(PHASE_ORDER)):
+            rows = history[phase]
+            durations = [d for _, d, _, _ in rows]
+            recent = durations[-last:]
+            previous = durations[:-last]
+            stats = {
+                "deploys": len(recent),
+                "p10": percentile(recent, 10),
+                "p50": percentile(recent, 50),
+                "p90": percentile(recent, 90),
+                "max": max(recent),
+                # Both windows, so the sparkline shows where a step change happened
+                "rolling_median": rolling_median(durations, 5),
+                "durations": recent,
+                "previous_p50": statistics.median(previous) if previous else None,
+                "change": None,
+                "alert": False,
+            }
+            if previous and stats["previous_p50"]:
+                stats["change"] = stats["p50"] / stats["previous_p50"] - 1
+                stats["alert"] = stats["change"] > alert
+            phases[phase] = stats
+        return phases
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def rolling_median(values: list[float], width: int) -> list[float]:
+    return [statistics.median(values[max(0, i - width + 1):i + 1]) for i in range(len(values))]
+
+
+def sparkline(values: list[float]) -> str:
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    span = (high - low) or 1.0
+    return "".join(SPARK[min(len(SPARK) - 1, int((v - low) / span * len(SPARK)))] for v in values)
+
+
+def percentile_bar(stats: dict, scale: float, width: int = 40) -> str:
+    """``├──[███|███]──┤`` from p10..p90 with the median marked, on a shared scale."""
+    pos = lambda v: min(width - 1, int(v / scale * (width - 1))) if scale else 0
+    cells = [" "] * width
+    for i in range(pos(stats["p10"]), pos(stats["max"]) + 1):
+        cells[i] = "─"
+    for i in range(pos(stats["p10"]), pos(stats["p90"]) + 1):
+        cells[i] = "█"
+    cells[pos(stats["p50"])] = "┃"
+    return "".join(cells)
+
+
+def format_report(phases: dict, last: int) -> list[str]:
+    if not phases:
+        return ["No completed deploys recorded yet."]
+    scale = max(s["max"] for s in phases.values())
+    lines = [f"{'phase':24} {'n':>3} {'p50':>7} {'p90':>7}  {'p10..p90 (┃ p50), 0..' + f'{scale:.0f}s':42} trend"]
+    for phase, s in phases.items():
+        lines.append(f"{phase:24} {s['deploys']:>3} {s['p50']:>6.0f}s {s['p90']:>6.0f}s  "
+                     f"{percentile_bar(s, scale):42} {sparkline(s['rolling_median'])}")
+    for phase, s in phases.items():
+        if s["alert"]:
+            lines.append(f"⚠️  {phase.replace('_in_progress', '')} phase p50 up {s['change']:.0%} over the last "
+                         f"{s['deploys']} deploys ({s['previous_p50']:.0f}s -> {s['p50']:.0f}s)")
+    return lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Deploy phase timings across runs")
+    parser.add_argument("--db", default=DB_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("report", help="per-phase percentiles, trend and regression alerts")
+    p.add_argument("--service")
+    p.add_argument("--last", type=int, default=LAST_N, help="deploys per comparison window")
+    p.add_argument("--alert", type=float, default=ALERT_RATIO, help="alert when p50 rises by more than this fraction")
+    p.add_argument("--json", action="store_true")
+    p = sub.add_parser("list", help="recent deploys")
+    p.add_argument("--service")
+    p.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with Timeline(args.db) as timeline:
+        if args.command == "report":
+            phases = timeline.report(args.service, args.last, args.alert)
+            if args.json:
+                print(json.dumps(phases, indent=2))
+            else:
+                print("\n".join(format_report(phases, args.last)))
+            return 1 if any(s["alert"] for s in phases.values()) else 0
+        for deploy in timeline.deploys(args.service, args.limit):
+            started = datetime.fromtimestamp(deploy["started_at"]).strftime("%Y-%m-%d %H:%M")
+            print(f"{started}  {deploy['deploy_id']}  {deploy['outcome']:8} {deploy['total_s'] or 0:6.0f}s  "
+                  f"{(deploy['commit_id'] or '')[:8]}  {deploy['commit_message'] or ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Concurrent post-deploy verification
+
+monitor-deployment.py used to sleep 20 s after a deploy went live, then run
+the site check, the health check (30 tries, 10 s apart), metrics and logs one
+after another. Here every check is a coroutine, and all of them run at once
+under one overall deadline:
+
+- a probe that isn't conclusive yet is retried with jittered exponential
+  backoff (0.5 s doubling to 8 s), so a service that is ready after 3 s is
+  verified after about 3 s
+- a probe returns as soon as it is conclusive; `VerificationEngine.run()`
+  returns as soon as every check has
+- checks still pending at the deadline are cancelled and count as failed
+  when they are required
+- Render CLI calls run as exec'd subprocesses, without a shell, each with
+  its own timeout
+"""
+
+import asyncio
+import random
+import shlex
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+DEFAULT_DEADLINE = 300.0      # seconds, for the whole verification
+COMMAND_TIMEOUT = 30.0
+PROBE_TIMEOUT = 10.0
+
+
+@dataclass
+class Backoff:
+    """Exponential backoff with full jitter."""
+    base: float = 0.5
+    factor: float = 2.0
+    cap: float = 8.0
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(self.base / 2, min(self.cap, self.base * self.factor ** attempt))
+
+
+@dataclass
+class ProbeResult:
+    """One attempt. ``conclusive`` stops the retries; ``ok`` is the outcome."""
+    ok: bool
+    conclusive: bool = True
+    detail: str = ""
+    data: object = None
+
+
+@dataclass
+class CheckResult:
+    name: str
+    ok: bool
+    required: bool
+    attempts: int = 0
+    elapsed: float = 0.0
+    detail: str = ""
+    data: object = None
+    timed_out: bool = False
+
+
+@dataclass
+class Check:
+    """A named probe, retried until it is conclusive or the deadline passes."""
+    name: str
+    probe: Callable[[], Awaitable[ProbeResult]]
+    required: bool = True
+    retry: bool = True
+    backoff: Backoff = field(default_factory=Backoff)
+
+
+async def run_command(command: str, timeout: float = COMMAND_TIMEOUT) -> tuple[int, str, str]:
+    """Run a command without a shell and return exit code, stdout, stderr"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *shlex.split(command),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError as e:
+        return 127, "", str(e)
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return 1, "", "Command timed out"
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+    return process.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+
+class VerificationEngine:
+    """Runs checks concurrently and returns once all are conclusive or the deadline passes."""
+
+    def __init__(self, checks: list[Check], deadline: float = DEFAULT_DEADLINE,
+                 on_result: Optional[Callable[[CheckResult], None]] = None):
+        self.checks = checks
+        self.deadline = deadline
+        self.on_result = on_result
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    async def _run_check(self, check: Check, stop_at: float) -> CheckResult:
+        result = CheckResult(check.name, ok=False, required=check.required)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                outcome = await check.probe()
+            except Exception as e:  # a crashing probe is an inconclusive attempt
+                outcome = ProbeResult(False, conclusive=False, detail=f"{type(e).__name__}: {e}")
+            result.attempts = attempt
+            result.detail = outcome.detail
+            result.data = outcome.data
+            if outcome.conclusive or not check.retry:
+                result.ok = outcome.ok
+                break
+            delay = check.backoff.delay(attempt - 1)
+            if time.monotonic() + delay >= stop_at:
+                result.timed_out = True
+                break
+            await asyncio.sleep(delay)
+        result.elapsed = time.monotonic() - self.started
+        if self.on_result:
+            self.on_result(result)
+        return result
+
+    async def run(self) -> list[CheckResult]:
+        self.started = time.monotonic()
+        stop_at = self.started + self.deadline
+        tasks = {asyncio.create_task(self._run_check(check, stop_at)): check for check in self.checks}
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self.elapsed = time.monotonic() - self.started
+
+        results = []
+        for task, check in tasks.items():
+            if task in done and not task.cancelled():
+                results.append(task.result())
+            else:
+                result = CheckResult(check.name, ok=False, required=check.required, elapsed=self.elapsed,
+                                     detail=f"no verdict within {self.deadline:.0f}s", timed_out=True)
+                if self.on_result:
+                    self.on_result(result)
+                results.append(result)
+        return results
+
+
+def passed(results: list[CheckResult]) -> bool:
+    return all(r.ok for r in results if r.required)
@@ -34,6 +34,7 @@ def parse_document(file_path: str) -> dict:
                 InputFormat.PDF,
                 InputFormat.DOCX,
                 InputFormat.PPTX,
+                InputFormat.XLSX,
                 InputFormat.HTML,
                 InputFormat.MD,
             ]
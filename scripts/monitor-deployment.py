@@ -6,17 +6,35 @@ Uses Render MCP integration for real-time monitoring
 
 import os
 import sys
+import argparse
 import time
 import json
+import sqlite3
+import asyncio
 import subprocess
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "deploy-monitor"))
+import verify  # noqa: E402
+from verify import Check, CheckResult, ProbeResult, VerificationEngine  # noqa: E402
+from probes import ProbePool, format_summary, summarize  # noqa: E402
+import perf_gate  # noqa: E402
+import metrics  # noqa: E402
+from metrics import MetricsMonitor  # noqa: E402
+import logstream  # noqa: E402
+from logstream import LogAnalyzer  # noqa: E402
+from timeline import FAILED, Timeline  # noqa: E402
+import fleet  # noqa: E402
+
 # Configuration
 RENDER_SERVICE_ID = "srv-d2f8f0emcj7s73eh647g"
 PRODUCTION_URL = "https://iamsiam.ai"
 MAX_WAIT_TIME = 600  # 10 minutes
 CHECK_INTERVAL = 5  # seconds
+VERIFY_DEADLINE = 300  # seconds for all post-deploy checks together
+PROBE_ROUTES = ["/api/health", "/"]
+LATENCY_PROBES = 20  # per route
 
 # ANSI color codes
 class Colors:
@@ -96,6 +114,8 @@ def monitor_deployment(deploy_id: str) -> bool:
     start_time = datetime.now()
     timeout = timedelta(seconds=MAX_WAIT_TIME)
     last_status = None
+    deploy_info: Dict[str, Any] = {}
+    transitions: list[tuple[str, float]] = []
     
     while datetime.now() - start_time < timeout:
         deploy_info = get_deploy_status(deploy_id)
@@ -104,12 +124,16 @@ def monitor_deployment(deploy_id: str) -> bool:
         # Only print if status changed
         if status != last_status:
             elapsed = (datetime.now() - start_time).total_seconds()
+            if status != 'unknown':
+                transitions.append((status, time.time()))
             
             if status == 'live':
                 print_status(f"✅ Deployment is LIVE! (took {elapsed:.0f}s)", Colors.OKGREEN)
+                record_timeline(deploy_id, deploy_info, transitions, 'live')
                 return True
-            elif status in ['failed', 'canceled']:
+            elif status in FAILED or status in ['canceled', 'deactivated']:
                 print_status(f"❌ Deployment {status}!", Colors.FAIL)
+                record_timeline(deploy_id, deploy_info, transitions, status)
                 
                 # Try to get error logs
                 print_status("Fetching error logs...", Colors.WARNING)
@@ -118,7 +142,8 @@ def monitor_deployment(deploy_id: str) -> bool:
                 )
                 if code == 0:
                     print("\n--- Recent Logs ---")
-                    print(logs[-2000:])  # Last 2000 chars
+                    print("\n".join(logstream.analyze_text(logs).format_report(live=False)))
+                    print("\n".join(logs.splitlines()[-20:]))
                     print("--- End Logs ---\n")
                 
                 return False
@@ -136,129 +161,242 @@ def monitor_deployment(deploy_id: str) -> bool:
         time.sleep(CHECK_INTERVAL)
     
     print_status(f"⏱️ Deployment timed out after {MAX_WAIT_TIME}s", Colors.FAIL)
+    record_timeline(deploy_id, deploy_info, transitions, 'timeout')
     return False
 
-def check_health() -> bool:
-    """Check if the health endpoint is responding"""
-    print_status("Checking health endpoint...", Colors.OKBLUE)
-    
-    max_retries = 30
-    for i in range(max_retries):
-        code, stdout, stderr = run_command(
-            f"curl -s -f -m 10 {PRODUCTION_URL}/api/health"
-        )
-        
-        if code == 0:
-            print_status("✅ Health check passed!", Colors.OKGREEN)
-            return True
-        
-        if i < max_retries - 1:
-            print_status(f"Health check attempt {i+1}/{max_retries} failed, retrying...", Colors.WARNING)
-            time.sleep(10)
-    
-    print_status("❌ Health check failed!", Colors.FAIL)
-    return False
+def record_timeline(deploy_id: str, deploy_info: Dict[str, Any], transitions: list, outcome: str) -> None:
+    """Store phase timings for `timeline.py report`; never fails the monitor"""
+    commit = deploy_info.get('commit') or {}
+    created_at = deploy_info.get('createdAt')
+    try:
+        with Timeline() as store:
+            store.record(deploy_id, RENDER_SERVICE_ID, transitions, outcome, time.time(),
+                         commit_id=commit.get('id', ''), commit_message=commit.get('message', ''),
+                         created_at=metrics.parse_time(created_at) if created_at else None)
+            alerts = [(phase, s) for phase, s in store.report(RENDER_SERVICE_ID).items() if s["alert"]]
+    except (sqlite3.Error, OSError, ValueError) as e:
+        print_status(f"Could not record deploy timeline: {e}", Colors.WARNING)
+        return
+    for phase, s in alerts:
+        print_status(f"⚠️ {phase.replace('_in_progress', '')} phase p50 up {s['change']:.0%} over the last "
+                     f"{s['deploys']} deploys ({s['previous_p50']:.0f}s -> {s['p50']:.0f}s)", Colors.WARNING)
 
-def check_site_accessible() -> bool:
-    """Check if the production site is accessible"""
-    print_status("Checking site accessibility...", Colors.OKBLUE)
-    
-    code, stdout, stderr = run_command(
-        f"curl -s -I -m 10 {PRODUCTION_URL}"
-    )
-    
-    if code == 0 and ('200' in stdout or '301' in stdout or '302' in stdout):
-        print_status("✅ Site is accessible!", Colors.OKGREEN)
-        return True
-    
-    print_status("❌ Site is not accessible!", Colors.FAIL)
-    return False
+async def probe_health(pool: ProbePool) -> ProbeResult:
+    """Health endpoint returns 2xx"""
+    timing = await pool.probe("/api/health")
+    if timing.ok:
+        return ProbeResult(True, detail=f"health endpoint OK ({timing.total:.0f} ms)", data=timing)
+    return ProbeResult(False, conclusive=False, detail=timing.error or f"HTTP {timing.status}", data=timing)
 
-def get_metrics() -> None:
-    """Get recent performance metrics"""
-    print_status("Fetching performance metrics...", Colors.OKBLUE)
-    
-    # Get CPU and memory metrics for the last hour
-    code, stdout, stderr = run_command(
-        f"render metrics {RENDER_SERVICE_ID} --metric cpu_usage --metric memory_usage --duration 1h -o json"
-    )
-    
-    if code == 0:
-        try:
-            metrics = json.loads(stdout)
-            # Process and display metrics
-            print_status("📊 Recent Performance:", Colors.OKCYAN)
-            # Add metric processing here if needed
-        except json.JSONDecodeError:
-            pass
-
-def monitor_logs_realtime(duration: int = 30) -> None:
-    """Stream logs for a duration"""
-    print_status(f"Streaming logs for {duration} seconds...", Colors.OKBLUE)
-    
-    # Start streaming logs in background
-    process = subprocess.Popen(
-        f"render logs {RENDER_SERVICE_ID} --tail 100 --follow",
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
+async def probe_site(pool: ProbePool) -> ProbeResult:
+    """Site root answers 2xx/3xx; 5xx and connection errors are retried"""
+    timing = await pool.probe("/")
+    if timing.ok:
+        return ProbeResult(True, detail=f"HTTP {timing.status} ({timing.total:.0f} ms)", data=timing)
+    if 400 <= timing.status < 500:
+        return ProbeResult(False, detail=f"HTTP {timing.status}", data=timing)
+    return ProbeResult(False, conclusive=False, detail=timing.error or f"HTTP {timing.status}", data=timing)
+
+async def probe_latency(pool: ProbePool, n: int, max_p95_ms: Optional[float]) -> ProbeResult:
+    """Burst of probes at PROBE_ROUTES; p95 of total time against the budget, if any"""
+    timings = await pool.burst(PROBE_ROUTES, n)
+    if not any(t.ok for t in timings):
+        return ProbeResult(False, conclusive=False, detail="no successful probes yet")
+    summary = summarize(timings)
+    detail = "; ".join(format_summary(summary))
+    worst = max((stats["total"]["p95"] for stats in summary.values() if stats["total"]), default=0.0)
+    if max_p95_ms is not None and worst > max_p95_ms:
+        return ProbeResult(False, detail=f"p95 {worst:.0f} ms over {max_p95_ms:.0f} ms budget: {detail}", data=summary)
+    return ProbeResult(True, detail=detail, data=summary)
+
+async def probe_perf_gate(base_url: str) -> ProbeResult:
+    """Replay the baseline RAG queries; fails on a confident per-phase regression"""
+    result = await perf_gate.run_gate(base_url, perf_gate.load_baseline())
+    if not result.measured:
+        return ProbeResult(False, conclusive=False, detail=(result.errors or ["no samples"])[0])
+    lines = [v.describe() for v in result.verdicts if v.samples]
+    regressions = [v.phase for v in result.verdicts if v.regressed]
+    detail = (f"regressed: {', '.join(regressions)}" if regressions else "no regression") + "\n    " + "\n    ".join(lines)
+    return ProbeResult(result.passed, detail=detail, data=result)
+
+async def fetch_metrics(duration: str = "1h") -> Optional[Any]:
+    """CPU and memory series from the Render CLI, or None"""
+    code, stdout, stderr = await verify.run_command(
+        f"render metrics {RENDER_SERVICE_ID} --metric cpu_usage --metric memory_usage --duration {duration} -o json"
     )
-    
+    if code != 0:
+        return None
+    try:
+        return json.loads(stdout)
+    except json.JSONDecodeError:
+        return None
+
+async def probe_metrics(monitor: MetricsMonitor) -> ProbeResult:
+    """CPU and memory before vs after go-live (informational)"""
+    payload = await fetch_metrics()
+    if payload is None:
+        return ProbeResult(False, detail="Failed to fetch metrics")
+    monitor.ingest(payload)
+    summary = monitor.summary()
+    lines = "\n    ".join(v.describe() for v in monitor.verdicts())
+    return ProbeResult(summary in ("ok", "insufficient data"), detail=f"{summary}\n    {lines}", data=monitor)
+
+async def probe_logs() -> ProbeResult:
+    """Recent log lines (informational)"""
+    code, stdout, stderr = await verify.run_command(f"render logs {RENDER_SERVICE_ID} --tail 20")
+    if code != 0:
+        return ProbeResult(False, detail=stderr.strip()[:200] or f"exit {code}")
+    return ProbeResult(True, detail=f"{len(stdout.splitlines())} lines", data=stdout)
+
+def verification_checks(pool: ProbePool, args, monitor: MetricsMonitor) -> list[Check]:
+    checks = [
+        Check("site", lambda: probe_site(pool)),
+        Check("health", lambda: probe_health(pool)),
+        Check("latency", lambda: probe_latency(pool, args.latency_probes, args.max_p95_ms),
+              required=args.max_p95_ms is not None),
+        Check("metrics", lambda: probe_metrics(monitor), required=False, retry=False),
+        Check("logs", probe_logs, required=False, retry=False),
+    ]
+    if args.perf_gate:
+        checks.append(Check("perf_gate", lambda: probe_perf_gate(args.perf_gate)))
+    if args.follow_logs:
+        checks.append(Check("log_stream", lambda: probe_log_stream(args.follow_logs, args.max_errors_per_min),
+                            required=args.max_errors_per_min is not None, retry=False))
+    return checks
+
+def report_check(result: CheckResult) -> None:
+    """Print each check as soon as it reaches a verdict"""
+    attempts = f", {result.attempts} attempt{'s' if result.attempts != 1 else ''}" if result.attempts else ""
+    message = f"{result.name}: {result.detail} ({result.elapsed:.1f}s{attempts})"
+    if result.ok:
+        print_status(f"✅ {message}", Colors.OKGREEN)
+    elif result.required:
+        print_status(f"❌ {message}", Colors.FAIL)
+    else:
+        print_status(f"⚠️ {message}", Colors.WARNING)
+
+def report_metrics(summary: str, verdicts: list) -> None:
+    """Print the metrics verdict whenever it changes during --watch-metrics"""
+    color = Colors.FAIL if any(v.status in ("regression", "leak") for v in verdicts) else Colors.OKCYAN
+    print_status(f"📊 Metrics: {summary}", color)
+    for verdict in verdicts:
+        print(f"    {verdict.describe()}")
+
+def verify_deployment(args, deployed_at: float, deploy_id: str = "") -> bool:
+    """Run all verification checks concurrently; returns True if the required ones passed"""
+    pool = ProbePool(PRODUCTION_URL)
+    monitor = MetricsMonitor(deployed_at)
+    engine = VerificationEngine(verification_checks(pool, args, monitor),
+                                deadline=args.deadline, on_result=report_check)
     try:
-        # Let it run for specified duration
-        time.sleep(duration)
+        results = asyncio.run(engine.run())
     finally:
-        process.terminate()
-        process.wait(timeout=5)
+        pool.close()
+    by_name = {r.name: r for r in results}
+
+    if by_name["logs"].ok:
+        print_status("\n📜 Recent logs:", Colors.HEADER)
+        print(by_name["logs"].data)
+
+    print_status(f"⏱️ Verification verdict after {engine.elapsed:.1f}s", Colors.OKCYAN)
+    passed = verify.passed(results)
+
+    if args.watch_metrics:
+        # Keep sampling so a leak or CPU regression shows up minutes after go-live
+        print_status(f"\n📊 Watching CPU/memory for {args.watch_metrics:g} min...", Colors.HEADER)
+        asyncio.run(metrics.watch(monitor, lambda: fetch_metrics("15m"), args.watch_metrics * 60, report_metrics))
+        if any(v.status in ("regression", "leak") for v in monitor.verdicts()):
+            passed = False
+    if monitor.buffers:
+        metrics.store(monitor.verdicts(), deployed_at, RENDER_SERVICE_ID, deploy_id)
+    return passed
+
+def report_log_stream(analyzer: LogAnalyzer) -> None:
+    print_status(f"📜 {analyzer.status_line()}", Colors.OKBLUE)
+
+def follow_logs_command() -> str:
+    # --tail 0: no back-fill. Old lines would be counted as if logged now, so errors
+    # from before go-live would land in the current window and could fail a healthy deploy
+    # on the error-rate gate
+    return f"render logs {RENDER_SERVICE_ID} --tail 0 --follow"
+
+async def probe_log_stream(duration: float, max_errors_per_min: Optional[float]) -> ProbeResult:
+    """Follow the service log for ``duration`` seconds; error rate of new lines against the budget, if any"""
+    analyzer = await logstream.follow(follow_logs_command(), duration,
+                                      LogAnalyzer(), on_report=report_log_stream)
+    rate = analyzer.totals["errors"] / max(duration, 1) * 60
+    detail = "\n    ".join(analyzer.format_report())
+    if max_errors_per_min is not None and rate > max_errors_per_min:
+        return ProbeResult(False, detail=f"{rate:.1f} errors/min over {max_errors_per_min:g} budget\n    {detail}",
+                           data=analyzer)
+    return ProbeResult(True, detail=detail, data=analyzer)
+
+def monitor_logs_realtime(duration: int = 30) -> LogAnalyzer:
+    """Stream logs for a duration, keeping rates and exemplars rather than the raw lines"""
+    print_status(f"Streaming logs for {duration} seconds...", Colors.OKBLUE)
+    analyzer = asyncio.run(logstream.follow(follow_logs_command(), duration,
+                                            LogAnalyzer(), on_report=report_log_stream))
+    for line in analyzer.format_report():
+        print(line)
+    return analyzer
+
+def parse_args():
+    global PRODUCTION_URL
+    parser = argparse.ArgumentParser(description="Monitor the latest Render deploy and verify it")
+    parser.add_argument("--url", default=PRODUCTION_URL, help="base URL to verify")
+    parser.add_argument("--verify-only", action="store_true", help="skip deploy polling, only run the checks")
+    parser.add_argument("--deadline", type=float, default=VERIFY_DEADLINE, help="seconds for all checks together")
+    parser.add_argument("--latency-probes", type=int, default=LATENCY_PROBES, help="probes per route for the latency check")
+    parser.add_argument("--max-p95-ms", type=float, help="fail verification if any route's p95 exceeds this")
+    parser.add_argument("--watch-metrics", type=float, metavar="MINUTES",
+                        help="after verification, keep comparing CPU/memory to the pre-deploy window; fails on leak/regression")
+    parser.add_argument("--follow-logs", type=float, metavar="SECONDS",
+                        help="follow the service log during verification and report error/latency rates")
+    parser.add_argument("--max-errors-per-min", type=float,
+                        help="with --follow-logs, fail verification above this error rate")
+    parser.add_argument("--deployed-at", help="go-live time (ISO or epoch) for --verify-only; defaults to now")
+    parser.add_argument("--perf-gate", metavar="KNOWLEDGE_API_URL", default=os.environ.get("PERF_GATE_URL"),
+                        help="replay the baseline RAG queries against this Knowledge API and fail on regression")
+    parser.add_argument("--fleet", metavar="CONFIG",
+                        help="monitor every service in this JSON config concurrently (see deploy-monitor/fleet.py)")
+    args = parser.parse_args()
+    PRODUCTION_URL = args.url.rstrip("/")
+    return args
 
 def main():
     """Main monitoring function"""
+    args = parse_args()
+    if args.fleet:
+        # One event loop for all services; exits 1 if any deploy or required check failed
+        print_status(f"🚀 SIAM Fleet Monitor: {args.fleet}", Colors.HEADER)
+        sys.exit(fleet.main([args.fleet] + (["--verify-only"] if args.verify_only else [])))
     print_status("🚀 SIAM Deployment Monitor Starting...", Colors.HEADER)
     print_status(f"Service: {RENDER_SERVICE_ID}", Colors.OKCYAN)
     print_status(f"URL: {PRODUCTION_URL}", Colors.OKCYAN)
     print("")
     
-    # Get latest deployment
-    deploy_id = get_latest_deploy_id()
-    
-    if not deploy_id:
-        print_status("Could not fetch deployment ID", Colors.FAIL)
-        sys.exit(1)
-    
-    # Monitor the deployment
-    success = monitor_deployment(deploy_id)
-    
-    if not success:
-        print_status("Deployment failed or timed out", Colors.FAIL)
-        sys.exit(1)
-    
-    # Wait for service to be ready
-    print_status("Waiting for service to be fully ready...", Colors.OKBLUE)
-    time.sleep(20)
+    deploy_id = ""
+    deployed_at = metrics.parse_time(args.deployed_at) if args.deployed_at else time.time()
+    if not args.verify_only:
+        # Get latest deployment
+        deploy_id = get_latest_deploy_id()
+
+        if not deploy_id:
+            print_status("Could not fetch deployment ID", Colors.FAIL)
+            sys.exit(1)
+
+        # Monitor the deployment
+        success = monitor_deployment(deploy_id)
+
+        if not success:
+            print_status("Deployment failed or timed out", Colors.FAIL)
+            sys.exit(1)
+        deployed_at = time.time()
     
-    # Verify deployment
+    # Verify deployment: all probes at once, retried until ready or the deadline
     print_status("\n📋 Running verification checks...", Colors.HEADER)
-    
-    checks_passed = True
-    
-    if not check_site_accessible():
-        checks_passed = False
-    
-    if not check_health():
-        checks_passed = False
-    
-    # Get metrics
-    get_metrics()
-    
-    # Stream some logs to see if there are any errors
-    print_status("\n📜 Recent logs:", Colors.HEADER)
-    code, logs, _ = run_command(
-        f"render logs {RENDER_SERVICE_ID} --tail 20"
-    )
-    if code == 0:
-        print(logs)
-    
+    checks_passed = verify_deployment(args, deployed_at, deploy_id)
+
     if checks_passed:
         print_status("\n✅ All checks passed! Deployment successful!", Colors.OKGREEN)
         print_status(f"🌐 Site is live at: {PRODUCTION_URL}", Colors.OKGREEN)